@@ -1,7 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
 from django.db import transaction
-from .models import PostCategory, Post, ContentBlock, VideoCategory, Video, AboutPage, Subscriber
-from .forms import PostCategoryForm, PostForm, ContentBlockForm, VideoCategoryForm, VideoForm, AboutPageForm
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from .models import PostCategory, Post, ContentBlock, VideoCategory, Video, AboutPage, Subscriber, Broadcast, NotificationDelivery, TaskRun
+from .forms import PostCategoryForm, PostForm, ContentBlockForm, VideoCategoryForm, VideoForm, AboutPageForm, SubscriberImportForm
+from .rendering import schedule_post_body_refresh
+from .subscribers import export_rows, import_subscribers, open_text
 from .tasks import send_post_notification_email_task, send_video_notification_email_task
 
 
@@ -61,6 +69,12 @@ class PostAdmin(admin.ModelAdmin):
                 lambda: send_post_notification_email_task(obj.id)
             )
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Inline block saves already queue this, so it still runs once per save.
+        # Doing it here too renders new posts that have no blocks yet.
+        schedule_post_body_refresh(form.instance.pk)
+
 @admin.register(VideoCategory)
 class VideoCategoryAdmin(admin.ModelAdmin):
     form = VideoCategoryForm
@@ -120,4 +134,71 @@ class AboutPageAdmin(admin.ModelAdmin):
 class SubscriberAdmin(admin.ModelAdmin):
     list_display = ('email', 'is_active', 'subscribed_at')
     list_filter = ('is_active', 'subscribed_at')
-    search_fields = ('email',)
\ No newline at end of file
+    search_fields = ('email',)
+    actions = ['export_csv']
+    change_list_template = 'admin/home/subscriber/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import-csv/', self.admin_site.admin_view(self.import_csv_view), name='home_subscriber_import_csv'),
+            *super().get_urls(),
+        ]
+
+    @admin.action(description="Export selected subscribers as CSV")
+    def export_csv(self, request, queryset):
+        # Streamed straight from the database cursor, so "select all" on a
+        # large list doesn't build the file in memory.
+        response = StreamingHttpResponse(export_rows(queryset), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="subscribers-{timezone.localtime():%Y%m%d-%H%M}.csv"'
+        return response
+
+    def import_csv_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = SubscriberImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            result = import_subscribers(open_text(form.cleaned_data['csv_file'].file))
+            self.message_user(request, f"Imported {result}.", messages.SUCCESS)
+            if result.errors:
+                self.message_user(request, "Skipped " + "; ".join(result.errors), messages.WARNING)
+            return redirect('admin:home_subscriber_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import subscribers',
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/home/subscriber/import_csv.html', context)
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'recipients_sent', 'chunks_sent', 'started_at', 'completed_at')
+    list_filter = ('content_type', 'completed_at')
+    readonly_fields = ('content_type', 'object_id', 'last_subscriber_id', 'recipients_sent', 'chunks_sent', 'started_at', 'updated_at', 'completed_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('subscriber', 'content_type', 'object_id', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'content_type')
+    search_fields = ('subscriber__email', 'provider_message_id')
+    list_select_related = ('subscriber', 'content_type')
+    readonly_fields = ('content_type', 'object_id', 'subscriber', 'status', 'attempts', 'provider_message_id', 'created_at', 'updated_at', 'sent_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = ('task_name', 'queue', 'wait', 'duration', 'worker', 'claimed_at')
+    list_filter = ('queue', 'claimed_at')
+    search_fields = ('task_name',)
+    readonly_fields = ('task_name', 'queue', 'worker', 'due_at', 'claimed_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,286 @@
+# home/assets.py
+"""
+Static asset bundles, minification and critical CSS.
+
+Each page links one CSS bundle and one JS bundle instead of every source
+file. `collectstatic` builds them through BundledStaticFilesStorage: the
+sources are minified and concatenated into `css/<name>.bundle.css` and
+`js/<name>.bundle.js`. WhiteNoise then fingerprints them and writes .gz and
+.br copies, which it serves directly. Bundles sit next to their sources, so
+relative url()s in the CSS still resolve. With STATIC_BUNDLES off (the
+default in DEBUG) the templates link the source files as before.
+
+Third-party assets (htmx, the Font Awesome icons the templates use, the
+Google fonts) are served from static/vendor/ once `manage.py vendor_assets`
+has downloaded them, which the Docker build does before collectstatic, and
+from their CDNs until then.
+
+Critical CSS is the subset of a bundle's rules that style the top of the
+page. It is inlined with {% critical_css %} so the page can paint before the
+full bundle, loaded without blocking, arrives.
+"""
+
+import logging
+import re
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+CSS_BUNDLES = {
+    'site': ['css/base.css'],
+    'home': ['css/base.css', 'css/home.css'],
+    'about': ['css/base.css', 'css/about.css'],
+    'blog': ['css/base.css', 'css/blog.css'],
+    'search': ['css/base.css', 'css/blog.css', 'css/search.css'],
+    'video': ['css/base.css', 'css/video.css'],
+}
+SITE_JS = ['js/main.js', 'js/scroll-to-top.js', 'js/scroll-animations.js']
+JS_BUNDLES = {
+    'site': SITE_JS,
+    'home': SITE_JS + ['js/contact-form.js'],
+}
+
+# name: (file under static/ written by vendor_assets, CDN URL used until then).
+VENDOR = {
+    'htmx': ('vendor/htmx/htmx.min.js', 'https://unpkg.com/htmx.org@1.9.12/dist/htmx.min.js'),
+    'icons': ('vendor/fontawesome/icons.css',
+              'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css'),
+    'fonts': ('vendor/fonts/fonts.css',
+              'https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700'
+              '&family=Playfair+Display&display=swap'),
+}
+
+# Selectors styling what is on screen before scrolling: the header on every
+# page, plus the hero on the home page. A rule is critical if one of its
+# selectors starts with one of these.
+SITE_CRITICAL_SELECTORS = (
+    ':root', '*', 'html', 'body', 'a', 'ul', 'img', 'header', '.navbar', '.logo', '.nav-links',
+    '.hamburger', '.bar', '.mobile-only', '.btn', '.primary-btn', '.secondary-btn',
+)
+CRITICAL_SELECTORS = {
+    'site': SITE_CRITICAL_SELECTORS,
+    'home': SITE_CRITICAL_SELECTORS + ('.home-section', '.overlay', '.home-content', '.cta-buttons',
+                                       '.scroll-down', '.arrow'),
+}
+
+
+def bundle_path(name, kind):
+    return f"{kind}/{name}.bundle.{kind}"
+
+
+def bundles():
+    """(bundle path, source paths, kind) for every bundle."""
+    for name, sources in CSS_BUNDLES.items():
+        yield bundle_path(name, 'css'), sources, 'css'
+    for name, sources in JS_BUNDLES.items():
+        yield bundle_path(name, 'js'), sources, 'js'
+
+
+# --- Minification ---
+
+# Strings and /*! license */ comments are kept as they are.
+_CSS_TOKENS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*!.*?\*/)|(/\*.*?\*/|\s+)|([^"'/\s]+|/)""", re.S)
+_CSS_NO_SPACE_AFTER = set('{};,>:(/')
+_CSS_NO_SPACE_BEFORE = set('{};,>)!')
+
+
+def minify_css(css):
+    """Drops comments and whitespace that doesn't separate anything."""
+    out = []
+    space = False
+    for string, gap, text in _CSS_TOKENS.findall(css):
+        if gap:
+            space = True
+            continue
+        token = string or text
+        if out and text.startswith('}') and out[-1].endswith(';') and not out[-1].startswith(('"', "'", '/*')):
+            out[-1] = out[-1][:-1]
+            if not out[-1]:
+                out.pop()
+        if out and space and out[-1][-1] not in _CSS_NO_SPACE_AFTER and token[0] not in _CSS_NO_SPACE_BEFORE:
+            out.append(' ')
+        out.append(token.replace(';}', '}') if text else token)
+        space = False
+    return ''.join(out)
+
+
+_JS_TOKENS = re.compile(r"""
+    (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<space>\s+)
+  | (?P<word>[\w$]+)
+  | (?P<punct>.)
+""", re.S | re.X)
+_JS_REGEX = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*")
+# A `/` after one of these starts a regex literal rather than a division.
+_JS_REGEX_AFTER_PUNCT = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_AFTER_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                         'throw', 'instanceof', 'yield', 'await'}
+
+
+def _is_word_char(char):
+    return char.isalnum() or char in '_$'
+
+
+def minify_js(js):
+    """
+    Drops comments, indentation and blank lines. Line breaks are kept, so
+    semicolon insertion works exactly as before; strings, template literals
+    and regex literals are copied unchanged.
+    """
+    out = []
+    gap = ''  # '', ' ' or '\n': whitespace seen since the last token.
+    last = None  # Last token written.
+    position = 0
+    while position < len(js):
+        if js[position] == '/' and js[position + 1:position + 2] not in ('/', '*') and (
+                last is None or last in _JS_REGEX_AFTER_WORDS or last in _JS_REGEX_AFTER_PUNCT):
+            match = _JS_REGEX.match(js, position)
+            if match:
+                kind, token = 'regex', match.group()
+            else:
+                kind, token = 'punct', '/'
+            end = position + len(token)
+        else:
+            match = _JS_TOKENS.match(js, position)
+            kind, token, end = match.lastgroup, match.group(), match.end()
+        position = end
+
+        if kind in ('space', 'comment'):
+            if '\n' in token or (kind == 'comment' and token.startswith('//')):
+                gap = '\n'
+            elif not gap:
+                gap = ' '
+            continue
+        if out and gap == '\n':
+            out.append('\n')
+        elif out and gap and (
+                (_is_word_char(out[-1][-1]) and _is_word_char(token[0]))
+                or (out[-1][-1] in '+-' and token[0] == out[-1][-1])):
+            out.append(' ')
+        out.append(token)
+        last = token
+        gap = ''
+    return ''.join(out) + '\n'
+
+
+def minify(content, kind):
+    return minify_css(content) if kind == 'css' else minify_js(content)
+
+
+# --- Building ---
+
+def build_bundles(storage, paths):
+    """
+    Minifies and concatenates every bundle's sources from `paths` (as given
+    to a storage's post_process) and saves the bundle to `storage`.
+    Returns the new entries for `paths`.
+    """
+    built = {}
+    for name, sources, kind in bundles():
+        parts = []
+        for source in sources:
+            source_storage, source_path = paths[source]
+            with source_storage.open(source_path) as f:
+                parts.append(minify(f.read().decode('utf-8'), kind))
+        # A statement left open at the end of one script mustn't run into the next.
+        content = ('\n' if kind == 'css' else ';\n').join(parts)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(content.encode('utf-8')))
+        built[name] = (storage, name)
+        logger.info(f"Built {name} from {len(sources)} files, {len(content)} bytes minified.")
+    return built
+
+
+# --- Templates ---
+
+def source_text(path):
+    found = finders.find(path)
+    if not found:
+        raise ValueError(f"Static file {path!r} not found.")
+    with open(found, encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def vendor_url(name):
+    """The vendored copy if vendor_assets has downloaded it, otherwise the CDN."""
+    local, cdn = VENDOR[name]
+    return static(local) if finders.find(local) else cdn
+
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _absolute_urls(css, source):
+    """Rewrites url()s relative to `source` as static URLs, for CSS inlined into a page."""
+    directory = source.rsplit('/', 1)[0]
+
+    def rewrite(match):
+        url = match.group(2)
+        if url.startswith(('/', 'data:', 'http:', 'https:', '#')):
+            return match.group()
+        parts = directory.split('/')
+        for segment in url.split('/'):
+            if segment == '..':
+                parts.pop()
+            elif segment != '.':
+                parts.append(segment)
+        return f"url('{static('/'.join(parts))}')"
+
+    return CSS_URL.sub(rewrite, css)
+
+
+def css_rules(css):
+    """Splits minified CSS into top-level (prelude, body) pairs; @-rule bodies are left whole."""
+    rules, position = [], 0
+    while position < len(css):
+        brace = css.find('{', position)
+        semicolon = css.find(';', position)
+        if brace == -1:
+            break
+        if semicolon != -1 and semicolon < brace:  # @import/@charset
+            rules.append((css[position:semicolon], None))
+            position = semicolon + 1
+            continue
+        depth, end = 1, brace + 1
+        while depth and end < len(css):
+            depth += {'{': 1, '}': -1}.get(css[end], 0)
+            end += 1
+        rules.append((css[position:brace].strip(), css[brace + 1:end - 1]))
+        position = end
+    return rules
+
+
+_SELECTOR_START = re.compile(r'\s*(:root|\*|[.#]?[A-Za-z_][\w-]*)')
+
+
+def _critical_rules(css, selectors):
+    kept = []
+    for prelude, body in css_rules(css):
+        if body is None:
+            continue
+        if prelude.startswith(('@media', '@supports')):
+            inner = _critical_rules(body, selectors)
+            if inner:
+                kept.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith('@keyframes'):
+            kept.append(f"{prelude}{{{body}}}")
+        elif not prelude.startswith('@'):
+            starts = (_SELECTOR_START.match(selector) for selector in prelude.split(','))
+            if any(match and match.group(1) in selectors for match in starts):
+                kept.append(f"{prelude}{{{body}}}")
+    return ''.join(kept)
+
+
+@lru_cache(maxsize=None)
+def critical_css(name):
+    """The rules of CSS bundle `name` that style the top of the page, with absolute url()s."""
+    selectors = set(CRITICAL_SELECTORS[name])
+    css = ''.join(_absolute_urls(minify_css(source_text(source)), source) for source in CSS_BUNDLES[name])
+    return _critical_rules(css, selectors)
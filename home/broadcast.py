@@ -0,0 +1,131 @@
+# home/broadcast.py
+import logging
+from itertools import islice
+
+import resend
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+
+from .email_async import AsyncDispatcher
+from .email_client import RESEND_BATCH_LIMIT
+from .models import Broadcast, NotificationDelivery, Subscriber
+
+logger = logging.getLogger(__name__)
+
+
+def iter_subscriber_chunks(after_id=0, chunk_size=RESEND_BATCH_LIMIT):
+    """Yields lists of (id, email) for active subscribers, keyset-paginated on id."""
+    while True:
+        chunk = list(
+            Subscriber.objects.filter(is_active=True, id__gt=after_id)
+            .order_by('id')
+            .values_list('id', 'email')[:chunk_size]
+            .iterator()
+        )
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after_id = chunk[-1][0]
+
+
+def _pending_deliveries(content_type, obj, chunk):
+    """
+    Records ledger rows for a chunk of (id, email) pairs and returns the
+    (delivery, email) pairs that have not been delivered yet.
+    """
+    NotificationDelivery.objects.bulk_create(
+        [NotificationDelivery(content_type=content_type, object_id=obj.pk, subscriber_id=subscriber_id)
+         for subscriber_id, _ in chunk],
+        ignore_conflicts=True,
+    )
+    emails = dict(chunk)
+    pending = (
+        NotificationDelivery.objects
+        .filter(content_type=content_type, object_id=obj.pk, subscriber_id__in=emails)
+        .exclude(status=NotificationDelivery.STATUS_SENT)
+        .order_by('subscriber_id')
+    )
+    return [(delivery, emails[delivery.subscriber_id]) for delivery in pending]
+
+
+def run_broadcast(obj, build_email):
+    """
+    Sends `build_email(address)` to every active subscriber through the Resend
+    batch endpoint, one recipient per email.
+
+    Chunks are sent in waves of BROADCAST_CONCURRENCY concurrent async
+    requests, throttled to BROADCAST_RATE_LIMIT calls per second. Every
+    recipient has a NotificationDelivery row, and only rows that are not yet
+    sent are handed to the provider, so a failed chunk is the only thing a
+    retry resends.
+    Progress is also stored on the object's Broadcast row after every wave,
+    letting a retried task skip straight past the confirmed subscribers.
+    """
+    content_type = ContentType.objects.get_for_model(obj)
+    broadcast, _ = Broadcast.objects.get_or_create(content_type=content_type, object_id=obj.pk)
+    if broadcast.completed_at:
+        return broadcast
+
+    chunk_size = max(1, min(settings.BROADCAST_CHUNK_SIZE, RESEND_BATCH_LIMIT))
+    key_prefix = f"{content_type.model}-{obj.pk}"
+
+    async def send_chunk(pending):
+        first, last = pending[0][0], pending[-1][0]
+        attempt = max(delivery.attempts for delivery, _ in pending)
+        # The idempotency key lets Resend drop a chunk it already accepted
+        # before the worker crashed, while a retry after a recorded failure
+        # gets a fresh key.
+        response = await resend.Batch.send_async(
+            [build_email(email) for _, email in pending],
+            options={'idempotency_key': f"{key_prefix}-{first.pk}-{last.pk}-{len(pending)}-{attempt}"},
+        )
+        return [item['id'] for item in response['data']]
+
+    chunks = iter_subscriber_chunks(broadcast.last_subscriber_id, chunk_size)
+    concurrency = max(1, settings.BROADCAST_CONCURRENCY)
+    with AsyncDispatcher(concurrency, settings.BROADCAST_RATE_LIMIT) as dispatcher:
+        while True:
+            wave = list(islice(chunks, concurrency))
+            if not wave:
+                break
+
+            # Ledger reads and writes happen between dispatches; the event loop only talks HTTP.
+            prepared = [_pending_deliveries(content_type, obj, chunk) for chunk in wave]
+            prepared = [pending for pending in prepared if pending]
+            results = dispatcher.map(send_chunk, prepared, return_exceptions=True)
+
+            now = timezone.now()
+            deliveries, error = [], None
+            for pending, message_ids in zip(prepared, results):
+                failed = isinstance(message_ids, Exception)
+                if failed:
+                    error = error or message_ids
+                for i, (delivery, _) in enumerate(pending):
+                    delivery.attempts += 1
+                    delivery.updated_at = now
+                    if failed:
+                        delivery.status = NotificationDelivery.STATUS_FAILED
+                    else:
+                        delivery.status = NotificationDelivery.STATUS_SENT
+                        delivery.provider_message_id = message_ids[i]
+                        delivery.sent_at = now
+                    deliveries.append(delivery)
+            NotificationDelivery.objects.bulk_update(
+                deliveries, ['status', 'attempts', 'provider_message_id', 'sent_at', 'updated_at']
+            )
+            if error:
+                # Progress stays at the previous wave; delivered rows are skipped on retry.
+                raise error
+
+            broadcast.last_subscriber_id = wave[-1][-1][0]
+            broadcast.recipients_sent += sum(len(chunk) for chunk in wave)
+            broadcast.chunks_sent += len(wave)
+            broadcast.save(update_fields=['last_subscriber_id', 'recipients_sent', 'chunks_sent', 'updated_at'])
+            logger.info(f"{broadcast}: {broadcast.recipients_sent} recipients sent so far.")
+
+    broadcast.completed_at = timezone.now()
+    broadcast.save(update_fields=['completed_at', 'updated_at'])
+    return broadcast
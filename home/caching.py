@@ -0,0 +1,103 @@
+# home/caching.py
+"""
+Version-keyed caching for the blog and video listings.
+
+Every cached listing fragment embeds its namespace's current version in the
+key. Saving or deleting a Post/PostCategory bumps the 'blog' version, a
+Video/VideoCategory bumps 'video' and an AboutPage bumps 'about' (see
+signals.py), so stale fragments are never read again and simply age out of
+the cache backend. Sitemaps, feeds and the category/AboutPage registry
+(registry.py) are cached the same way.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.safestring import mark_safe
+
+
+def _version_key(namespace):
+    return f"listing:{namespace}:version"
+
+
+def listing_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # A timestamp never collides with a version that was evicted earlier.
+        cache.add(_version_key(namespace), time.time_ns(), None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump_listing_version(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def listing_cache_key(namespace, view_name, request):
+    params = request.GET
+    hx = int(bool(request.headers.get('HX-Request')))
+    # The fragments echo the raw query string into their links, so it is part of the key.
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+    return (
+        f"listing:{namespace}:{listing_version(namespace)}:{view_name}:"
+        f"{params.get('category', '')}:{params.get('featured', '')}:{params.get('page', '')}:{hx}:{query}"
+    )
+
+
+def cached_listing(namespace, view_name, request, render):
+    """Returns the cached HTML for this listing request, calling `render()` on a miss."""
+    key = listing_cache_key(namespace, view_name, request)
+    content = cache.get(key)
+    if content is None:
+        content = render()
+        cache.set(key, str(content), settings.LISTING_CACHE_TIMEOUT)
+    return mark_safe(content)
+
+
+def versioned_key(prefix, namespaces, request):
+    """A cache key for `request` that changes whenever any of `namespaces` is bumped."""
+    versions = ':'.join(f"{namespace}{listing_version(namespace)}" for namespace in namespaces)
+    # Feeds embed the requested host in their links, so it is part of the key.
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"{prefix}:{versions}:{url}"
+
+
+def cache_while_streaming(key, chunks, timeout=None):
+    """
+    Yields `chunks` unchanged and stores their concatenation under `key` once
+    the last one has been sent, so a miss is streamed rather than buffered.
+    Nothing is cached if the client disconnects part way.
+    """
+    sent = []
+    for chunk in chunks:
+        sent.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(sent), settings.LISTING_CACHE_TIMEOUT if timeout is None else timeout)
+
+
+def cached_response(*namespaces):
+    """
+    Caches a view's successful responses until the next bump of any of
+    `namespaces`. Used for feeds, which are small and built in one go.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = versioned_key('response', namespaces, request)
+            cached = cache.get(key)
+            if cached is not None:
+                content_type, content = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response['Content-Type'], response.content), settings.LISTING_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
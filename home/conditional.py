@@ -0,0 +1,138 @@
+# home/conditional.py
+"""
+Conditional GET support for the content views.
+
+Each view gets a "stamp" function that returns the newest `updated_at` (plus
+anything else that should change the ETag) from a single aggregate query.
+The stamp is computed once per request and drives both the ETag and the
+Last-Modified header, so a revalidating browser or CDN gets a 304 without
+the view or its templates running.
+
+Every ETag also covers the release: settings.RELEASE and the hash of the
+static manifest, whose fingerprinted URLs every page embeds. Last-Modified
+is never older than the manifest. Detail pages also cover their related
+list: its rows are rewritten, with new ids, whenever it changes.
+"""
+
+import hashlib
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .caching import listing_version
+from .models import Post, RelatedContent, Video
+from .registry import about_page
+
+# Pages embed the visitor's CSRF token, so only their browser may store them.
+PAGE_CACHE_CONTROL = {'private': True, 'max_age': 0, 'must_revalidate': True}
+# HTMX fragments carry no per-visitor data and can be revalidated by shared caches.
+PARTIAL_CACHE_CONTROL = {'public': True, 'max_age': 0, 'must_revalidate': True}
+
+
+def _listing_stamp(namespace, queryset):
+    # The aggregate is cached under the listing version, so it is recomputed
+    # once per content change rather than once per request. The version is
+    # part of the stamp so category edits change the ETag too.
+    version = listing_version(namespace)
+    key = f"listing:{namespace}:{version}:stamp"
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = queryset.aggregate(latest=Max('updated_at'), total=Count('id'))
+        cache.set(key, stamp, settings.LISTING_CACHE_TIMEOUT)
+    return {**stamp, 'version': version}
+
+
+def blog_listing_stamp(request, *args, **kwargs):
+    # Unpublished posts are included so unpublishing one still moves the stamp.
+    return _listing_stamp('blog', Post.objects.all())
+
+
+def video_listing_stamp(request, *args, **kwargs):
+    return _listing_stamp('video', Video.objects.all())
+
+
+@lru_cache(maxsize=None)
+def release():
+    """(version, time) of the running code and collected static files; the time is None without a manifest."""
+    manifest_hash = getattr(staticfiles_storage, 'manifest_hash', '')
+    try:
+        released_at = staticfiles_storage.get_modified_time(staticfiles_storage.manifest_name)
+    except (AttributeError, NotImplementedError, OSError):
+        released_at = None
+    return f"{settings.RELEASE}:{manifest_hash}", released_at
+
+
+def _detail_stamp(model, namespace, slug):
+    # The newest row id of the item's related list, in the same query.
+    related = (
+        RelatedContent.objects
+        .filter(content_type=ContentType.objects.get_for_model(model), object_id=OuterRef('pk'))
+        .values('object_id').annotate(last=Max('id')).values('last')
+    )
+    row = (
+        model.objects.filter(slug=slug, is_published=True)
+        .annotate(related=Subquery(related)).values('updated_at', 'related').first()
+    )
+    if row is None:
+        return {'latest': None}
+    stamp = {'latest': row['updated_at'], 'related': row['related']}
+    if row['related'] is None:
+        # No list: the page falls back to items from the same category.
+        stamp['version'] = listing_version(namespace)
+    return stamp
+
+
+def post_stamp(request, post_slug):
+    return _detail_stamp(Post, 'blog', post_slug)
+
+
+def video_stamp(request, video_slug):
+    return _detail_stamp(Video, 'video', video_slug)
+
+
+def about_stamp(request):
+    page = about_page()
+    return {'latest': page.updated_at if page else None}
+
+
+def conditional_view(stamp_func, cache_control, vary=()):
+    """
+    Decorates a view with ETag/Last-Modified handling from `stamp_func` and
+    applies the given Cache-Control and Vary policy to every response,
+    including 304s.
+    """
+    def get_stamp(request, *args, **kwargs):
+        if not hasattr(request, '_content_stamp'):
+            request._content_stamp = stamp_func(request, *args, **kwargs)
+        return request._content_stamp
+
+    def etag(request, *args, **kwargs):
+        stamp = get_stamp(request, *args, **kwargs)
+        if stamp['latest'] is None:
+            return None
+        return hashlib.md5(repr((release()[0], sorted(stamp.items()))).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        latest, released_at = get_stamp(request, *args, **kwargs)['latest'], release()[1]
+        if latest is None or released_at is None:
+            return latest
+        return max(latest, released_at)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            patch_cache_control(response, **cache_control)
+            if vary:
+                patch_vary_headers(response, vary)
+            return response
+        return wrapper
+    return decorator
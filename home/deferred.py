@@ -0,0 +1,30 @@
+# home/deferred.py
+"""
+Coalesces work triggered by model signals. Each (function, args) pair is run
+once after the current transaction commits, however many saves asked for it.
+"""
+
+import threading
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def _flush():
+    calls = getattr(_pending, 'calls', {})
+    _pending.calls = {}
+    for func, args in calls:
+        func(*args)
+
+
+def on_commit_once(func, *args):
+    """
+    Runs func(*args) after the current transaction commits, once per distinct
+    call. Calls from a rolled-back transaction run with the next commit, so
+    `func` must only read committed state.
+    """
+    if not hasattr(_pending, 'calls'):
+        _pending.calls = {}
+    _pending.calls[(func, args)] = None
+    transaction.on_commit(_flush)
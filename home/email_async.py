@@ -0,0 +1,91 @@
+# home/email_async.py
+
+import asyncio
+
+import httpx
+import resend
+
+from .email_client import TokenBucket, get_resend_client
+
+
+class PooledHTTPXClient(resend.AsyncHTTPClient):
+    """
+    Async Resend HTTP client backed by one httpx.AsyncClient, so concurrent
+    requests share a bounded pool of keep-alive connections.
+    """
+
+    def __init__(self, timeout=30, max_connections=10):
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def request(self, method, url, headers, json=None, files=None, data=None):
+        try:
+            if files is not None:
+                resp = await self.client.request(method=method, url=url, headers=headers, files=files, data=data)
+            else:
+                resp = await self.client.request(
+                    method=method, url=url, headers=headers,
+                    json=json if data is None else None, data=data,
+                )
+            return resp.content, resp.status_code, resp.headers
+        except httpx.RequestError as e:
+            # Resend's AsyncRequest.perform() turns this into a ResendError.
+            raise RuntimeError(f"Request failed: {e}") from e
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class AsyncDispatcher:
+    """
+    Lets synchronous code (background tasks) keep many Resend requests in
+    flight at once. The dispatcher owns an event loop and a pooled async
+    client for its lifetime; `map` fans calls out with at most `concurrency`
+    running together and, if `rate_limit` is set, no more than that many
+    starting per second.
+
+        with AsyncDispatcher(concurrency=10) as dispatcher:
+            results = dispatcher.map(resend.Emails.send_async, params_list)
+
+    Each `map` call runs to completion before returning, so the ORM can be
+    used freely between calls.
+    """
+
+    def __init__(self, concurrency=10, rate_limit=0):
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate_limit)
+
+    def __enter__(self):
+        get_resend_client()  # sets the API key
+        self.loop = asyncio.new_event_loop()
+        self.client = PooledHTTPXClient(max_connections=self.concurrency)
+        self._previous_client = resend.default_async_http_client
+        resend.default_async_http_client = self.client
+        return self
+
+    def __exit__(self, *exc_info):
+        resend.default_async_http_client = self._previous_client
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+    async def _map(self, func, items, return_exceptions):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(item):
+            async with semaphore:
+                await self.bucket.acquire_async()
+                return await func(item)
+
+        return await asyncio.gather(*(run(item) for item in items), return_exceptions=return_exceptions)
+
+    def map(self, func, items, return_exceptions=False):
+        """Awaits `func(item)` for every item and returns the results in order."""
+        return self.loop.run_until_complete(self._map(func, items, return_exceptions))
+
+
+def send_emails(params_list, concurrency=10):
+    """Sends each Resend params dict as its own email, `concurrency` at a time."""
+    with AsyncDispatcher(concurrency=concurrency) as dispatcher:
+        return dispatcher.map(resend.Emails.send_async, params_list)
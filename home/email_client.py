@@ -0,0 +1,101 @@
+# home/email_client.py
+
+import asyncio
+import threading
+import time
+
+import requests
+import resend
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Resend's batch endpoint accepts at most 100 emails per call.
+RESEND_BATCH_LIMIT = 100
+
+
+class PooledRequestsClient(resend.HTTPClient):
+    """
+    Resend HTTP client backed by a single requests.Session, so consecutive
+    API calls reuse keep-alive connections instead of paying a new TLS
+    handshake each time.
+    """
+
+    def __init__(self, timeout=30, pool_size=10):
+        self._timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, headers, json=None, files=None, data=None):
+        try:
+            if files is not None:
+                resp = self.session.request(
+                    method=method, url=url, headers=headers,
+                    files=files, data=data, timeout=self._timeout,
+                )
+            else:
+                resp = self.session.request(
+                    method=method, url=url, headers=headers,
+                    json=json if data is None else None, data=data, timeout=self._timeout,
+                )
+            return resp.content, resp.status_code, resp.headers
+        except requests.RequestException as e:
+            # Resend's Request.perform() turns this into a ResendError, like its own client does.
+            raise RuntimeError(f"Request failed: {e}") from e
+
+    def close(self):
+        self.session.close()
+
+
+class TokenBucket:
+    """Token bucket that allows `rate` acquisitions per second across threads or tasks."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token if one is available, otherwise returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while wait := self._take():
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        if self.rate <= 0:
+            return
+        while wait := self._take():
+            await asyncio.sleep(wait)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_resend_client():
+    """
+    Returns the process-wide pooled client and installs it, along with the
+    API key, as the Resend SDK's default. Call this instead of setting
+    `resend.api_key` before using `resend.Emails` / `resend.Batch`.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PooledRequestsClient(pool_size=max(10, settings.BROADCAST_CONCURRENCY))
+        resend.api_key = settings.RESEND_API_KEY
+        resend.default_http_client = _client
+    return _client
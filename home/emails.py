@@ -0,0 +1,58 @@
+# home/emails.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signing import BadSignature, Signer
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+# Rendered emails carry this marker where each recipient's unsubscribe link goes.
+UNSUBSCRIBE_PLACEHOLDER = '__UNSUBSCRIBE_URL__'
+RENDER_CACHE_TIMEOUT = 60 * 60 * 24
+
+_unsubscribe_signer = Signer(salt='home.unsubscribe')
+
+
+def unsubscribe_token(email):
+    return _unsubscribe_signer.sign_object(email)
+
+
+def email_from_unsubscribe_token(token):
+    """Returns the address a token was issued for, or None if it was tampered with."""
+    try:
+        return _unsubscribe_signer.unsign_object(token)
+    except BadSignature:
+        return None
+
+
+def render_email(name, context=None, obj=None):
+    """
+    Renders templates/emails/<name>.html and .txt once and caches the result.
+    Broadcasts pass the object they announce; its id and updated_at are part
+    of the cache key, so an edit gets a fresh render.
+    """
+    key = f"email:{name}"
+    if obj is not None:
+        key += f":{obj.pk}:{obj.updated_at.timestamp()}"
+
+    rendered = cache.get(key)
+    if rendered is None:
+        context = {**(context or {}), 'unsubscribe_url': UNSUBSCRIBE_PLACEHOLDER}
+        rendered = {
+            'html': render_to_string(f'emails/{name}.html', context),
+            'text': render_to_string(f'emails/{name}.txt', context),
+        }
+        cache.set(key, rendered, RENDER_CACHE_TIMEOUT)
+    return rendered
+
+
+def personalize(rendered, email):
+    """
+    Fills one recipient's unsubscribe link into a rendered email, and adds
+    the List-Unsubscribe headers for one-click unsubscribes (RFC 8058).
+    """
+    url = f"{settings.SITE_DOMAIN}{reverse('unsubscribe', args=[unsubscribe_token(email)])}"
+    return {
+        **{part: body.replace(UNSUBSCRIBE_PLACEHOLDER, url) for part, body in rendered.items()},
+        'headers': {'List-Unsubscribe': f'<{url}>', 'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click'},
+    }
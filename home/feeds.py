@@ -0,0 +1,110 @@
+# home/feeds.py
+"""RSS and Atom feeds for the blog and videos, overall and per category."""
+
+from django.contrib.syndication.views import Feed
+from django.http import Http404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import Post, Video
+from .registry import post_categories, video_categories
+
+FEED_ITEMS = 20
+SITE_NAME = "Sudheesh Sathya"
+
+
+def _category(registry, slug):
+    if slug is None:
+        return None
+    category = registry.get(slug)
+    if category is None:
+        raise Http404("No such category.")
+    return category
+
+
+class PostFeed(Feed):
+    def get_object(self, request, category_slug=None):
+        return _category(post_categories(), category_slug)
+
+    def title(self, category):
+        return f"{SITE_NAME} - {category.name}" if category else f"{SITE_NAME} - Blog"
+
+    def link(self, category):
+        return category.get_absolute_url() if category else reverse('blog_list')
+
+    def description(self, category):
+        if category and category.description:
+            return category.description
+        return "Thoughts on finance, fitness and self-mastery."
+
+    def items(self, category):
+        posts = Post.objects.filter(is_published=True).select_related('category').defer('body_html')
+        if category:
+            posts = posts.filter(category=category)
+        return posts.order_by('-published_date')[:FEED_ITEMS]
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.excerpt
+
+    def item_pubdate(self, post):
+        return post.published_date
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_categories(self, post):
+        return [post.category.name]
+
+
+class PostAtomFeed(PostFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
+
+
+class VideoFeed(Feed):
+    def get_object(self, request, category_slug=None):
+        return _category(video_categories(), category_slug)
+
+    def title(self, category):
+        return f"{SITE_NAME} - {category.name} Videos" if category else f"{SITE_NAME} - Videos"
+
+    def link(self, category):
+        return category.get_absolute_url() if category else reverse('video_list')
+
+    def description(self, category):
+        if category and category.description:
+            return category.description
+        return "New videos from Sudheesh Sathya."
+
+    def items(self, category):
+        videos = Video.objects.filter(is_published=True).select_related('category')
+        if category:
+            videos = videos.filter(category=category)
+        return videos.order_by('-published_date')[:FEED_ITEMS]
+
+    def item_title(self, video):
+        return video.title
+
+    def item_description(self, video):
+        return video.excerpt or video.description
+
+    def item_pubdate(self, video):
+        return video.published_date
+
+    def item_updateddate(self, video):
+        return video.updated_at
+
+    def item_categories(self, video):
+        return [video.category.name] if video.category else []
+
+
+class VideoAtomFeed(VideoFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
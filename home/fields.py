@@ -0,0 +1,28 @@
+# home/fields.py
+
+from django.db.models.fields.files import ImageField, ImageFieldFile
+
+
+class ContentAddressedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        save_blob = getattr(self.storage, 'save_blob', None)
+        if save_blob is None:
+            return super().save(name, content, save)
+        name = self.field.generate_filename(self.instance, name)
+        self.name = save_blob(name, content, max_length=self.field.max_length)
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+
+class ContentAddressedImageField(ImageField):
+    """
+    ImageField whose uploads are named after their content hash when the
+    storage supports it (see ContentAddressedStorage.save_blob), so the same
+    image uploaded twice is stored once.
+    """
+
+    attr_class = ContentAddressedImageFieldFile
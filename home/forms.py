@@ -2,6 +2,21 @@
 
 from django import forms
 from .models import Post, PostCategory, ContentBlock, AboutPage, Video, VideoCategory, Subscriber
+from .uploads import check_image_limits, normalize_image, validate_upload_size
+
+class NormalizedImageField(forms.ImageField):
+    """
+    ImageField that refuses uploads over the size and pixel limits, and
+    hands the model an upright, EXIF-free copy scaled to IMAGE_UPLOAD_MAX_EDGE
+    (see home/uploads.py).
+    """
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return super().to_python(data)
+        validate_upload_size(data)
+        check_image_limits(data)
+        return normalize_image(super().to_python(data))
 
 class PostForm(forms.ModelForm):
     """
@@ -16,6 +31,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ['title', 'slug', 'excerpt', 'image', 'category', 'is_published', 'is_featured', 'send_to_subscribers']
+        field_classes = {'image': NormalizedImageField}
         widgets = {
             'excerpt': forms.Textarea(attrs={'rows': 3}),
         }
@@ -33,6 +49,7 @@ class ContentBlockForm(forms.ModelForm):
     class Meta:
         model = ContentBlock
         fields = ['block_type', 'content', 'image', 'caption', 'order']
+        field_classes = {'image': NormalizedImageField}
         widgets = {
             'content': forms.Textarea(attrs={'rows': 4}),
             'order': forms.NumberInput(attrs={'class': 'form-control', 'style': 'width: 8ch;'}),
@@ -50,6 +67,7 @@ class AboutPageForm(forms.ModelForm):
     class Meta:
         model = AboutPage
         fields = ['title', 'subtitle', 'content', 'profile_image']
+        field_classes = {'profile_image': NormalizedImageField}
         widgets = {
             'content': forms.Textarea(attrs={'class': 'rich-text-editor'}),
             'subtitle': forms.Textarea(attrs={'rows': 2}),
@@ -81,6 +99,7 @@ class VideoForm(forms.ModelForm):
             'thumbnail', 'category', 'is_published', 'is_featured', 
             'send_to_subscribers'
         ]
+        field_classes = {'thumbnail': NormalizedImageField}
         widgets = {
             'excerpt': forms.Textarea(attrs={'rows': 3}),
             'description': forms.Textarea(attrs={'rows': 4}),
@@ -95,4 +114,12 @@ class VideoForm(forms.ModelForm):
         if self.instance and self.instance.pk and self.instance.notification_sent_at:
             self.fields['send_to_subscribers'].disabled = True
             self.fields['send_to_subscribers'].help_text = f"A notification was already sent on {self.instance.notification_sent_at.strftime('%Y-%m-%d %H:%M')}."
-    # ----------------------------------------------
\ No newline at end of file
+    # ----------------------------------------------
+
+class SubscriberImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="CSV file",
+        validators=[validate_upload_size],
+        help_text="One email per row, or a column headed 'email' (an export from this page works as-is). "
+                  "Existing subscribers are left unchanged."
+    )
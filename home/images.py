@@ -0,0 +1,131 @@
+# home/images.py
+"""
+Responsive derivatives for uploaded images.
+
+For an original such as `blog/cover.jpg` the pipeline writes resized copies
+next to it (`blog/cover.480w.webp`, `blog/cover.960w.jpg`, ...) plus a small
+manifest, `blog/cover.variants.json`, listing what was generated. Templates
+read the manifest through `image_variants()` to build srcset attributes, and
+fall back to the original until the background task has run.
+"""
+
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# (model label, field name) for every image that gets derivatives.
+IMAGE_FIELDS = (
+    ('home.Post', 'image'),
+    ('home.ContentBlock', 'image'),
+    ('home.Video', 'thumbnail'),
+    ('home.AboutPage', 'profile_image'),
+)
+
+FORMATS = {
+    'avif': {'pillow': 'AVIF', 'ext': 'avif', 'mime': 'image/avif', 'options': {'quality': 60}},
+    'webp': {'pillow': 'WEBP', 'ext': 'webp', 'mime': 'image/webp', 'options': {'quality': 80, 'method': 6}},
+    'jpeg': {'pillow': 'JPEG', 'ext': 'jpg', 'mime': 'image/jpeg', 'options': {'quality': 82, 'optimize': True, 'progressive': True}},
+    # Fallback for images with transparency, used by the static image optimizer.
+    'png': {'pillow': 'PNG', 'ext': 'png', 'mime': 'image/png', 'options': {'optimize': True}},
+}
+
+# A missing manifest is re-checked soon, since the task may still be running.
+MISSING_MANIFEST_TIMEOUT = 60
+
+
+def _manifest_name(name):
+    return f"{os.path.splitext(name)[0]}.variants.json"
+
+
+def _cache_key(name):
+    return f"image:variants:{name}"
+
+
+def derivative_name(name, width, fmt):
+    return f"{os.path.splitext(name)[0]}.{width}w.{FORMATS[fmt]['ext']}"
+
+
+def enabled_formats():
+    """Configured formats this Pillow build can actually encode."""
+    return [fmt for fmt in settings.IMAGE_DERIVATIVE_FORMATS
+            if fmt in FORMATS and (fmt in ('jpeg', 'png') or features.check(fmt))]
+
+
+def load_image(fh):
+    """Opens an image upright (EXIF orientation applied) as RGB, or RGBA if it has transparency."""
+    image = ImageOps.exif_transpose(Image.open(fh))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    image.load()
+    return image
+
+
+def encode_image(image, fmt):
+    spec = FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, spec['pillow'], **spec['options'])
+    return buffer.getvalue()
+
+
+def generate_derivatives(field_file):
+    """
+    Writes every missing width/format variant of `field_file` and its manifest.
+    Widths wider than the original are capped at the original width, so a
+    small upload still gets converted but never upscaled. Returns the manifest.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as fh:
+        original = load_image(fh)
+
+    widths = sorted({min(width, original.width) for width in settings.IMAGE_DERIVATIVE_WIDTHS})
+    manifest = {'width': original.width, 'height': original.height, 'formats': {}}
+
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for fmt in enabled_formats():
+            name = derivative_name(field_file.name, width, fmt)
+            if not storage.exists(name):
+                storage.save(name, ContentFile(encode_image(resized, fmt)))
+            manifest['formats'].setdefault(fmt, []).append([width, name])
+
+    manifest_name = _manifest_name(field_file.name)
+    if storage.exists(manifest_name):
+        storage.delete(manifest_name)
+    storage.save(manifest_name, ContentFile(json.dumps(manifest).encode()))
+    cache.set(_cache_key(field_file.name), manifest, None)
+    logger.info(f"Generated {len(widths)} widths of {field_file.name} as {', '.join(enabled_formats())}.")
+    return manifest
+
+
+def image_variants_for(storage, name):
+    manifest = cache.get(_cache_key(name))
+    if manifest is not None:
+        return manifest or None
+    try:
+        with storage.open(_manifest_name(name), 'rb') as fh:
+            manifest = json.loads(fh.read())
+    except (FileNotFoundError, ValueError):
+        # Cached as an empty dict so a page full of pending images isn't
+        # a page full of storage lookups.
+        cache.set(_cache_key(name), {}, MISSING_MANIFEST_TIMEOUT)
+        return None
+    cache.set(_cache_key(name), manifest, None)
+    return manifest
+
+
+def image_variants(field_file):
+    """The manifest for `field_file`, or None if derivatives aren't ready yet."""
+    if not field_file:
+        return None
+    return image_variants_for(field_file.storage, field_file.name)
@@ -0,0 +1,56 @@
+# home/management/commands/bench_email_dispatch.py
+
+import time
+
+import resend
+from django.core.management.base import BaseCommand
+
+from home.email_async import AsyncDispatcher
+from home.email_client import get_resend_client
+from home.resend_stub import ResendStub
+
+
+class Command(BaseCommand):
+    help = 'Compares serial and async email dispatch throughput against a local Resend stub server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000)
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests kept in flight by the async path.')
+        parser.add_argument('--latency', type=float, default=0.01, help='Simulated provider latency per request, in seconds.')
+
+    def handle(self, *args, **options):
+        recipients = options['recipients']
+        params = [
+            {
+                "from": "bench@example.com",
+                "to": [f"subscriber{i}@example.com"],
+                "subject": "Benchmark",
+                "html": "<p>Hello</p>",
+            }
+            for i in range(recipients)
+        ]
+
+        self.stdout.write(f"Sending {recipients} emails, {options['latency'] * 1000:.0f} ms simulated latency...")
+
+        with ResendStub(latency=options['latency']) as stub:
+            get_resend_client()
+            start = time.perf_counter()
+            for email in params:
+                resend.Emails.send(email)
+            serial = time.perf_counter() - start
+        self._report('serial', recipients, serial, stub)
+
+        with ResendStub(latency=options['latency']) as stub:
+            start = time.perf_counter()
+            with AsyncDispatcher(concurrency=options['concurrency']) as dispatcher:
+                dispatcher.map(resend.Emails.send_async, params)
+            concurrent = time.perf_counter() - start
+        self._report(f"async (concurrency {options['concurrency']})", recipients, concurrent, stub)
+
+        self.stdout.write(self.style.SUCCESS(f"Async dispatch was {serial / concurrent:.1f}x faster."))
+
+    def _report(self, label, recipients, elapsed, stub):
+        self.stdout.write(
+            f"{label:>24}: {elapsed:7.2f}s  {recipients / elapsed:8.0f} emails/s  "
+            f"{stub.connections} connections"
+        )
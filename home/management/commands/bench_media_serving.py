@@ -0,0 +1,131 @@
+# home/management/commands/bench_media_serving.py
+
+import http.client
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.test.utils import override_settings
+from django.urls import re_path
+from django.views.static import serve
+
+from home.media import serve_media
+
+
+def static_serve(request, path):
+    # The view /media/ used before serve_media.
+    return serve(request, path, document_root=settings.MEDIA_ROOT)
+
+
+urlpatterns = [
+    re_path(r'^static-serve/(?P<path>.*)$', static_serve),
+    re_path(r'^media/(?P<path>.*)$', serve_media),
+]
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Compares django.views.static.serve with home.media.serve_media on large files under concurrent load.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=4, help='Size of each test file.')
+        parser.add_argument('--files', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='bench-media-')
+        for i in range(options['files']):
+            with open(os.path.join(media_root, f'photo-{i}.jpg'), 'wb') as fh:
+                fh.write(os.urandom(int(options['size_mb'] * 1024 * 1024)))
+
+        overrides = {
+            'ROOT_URLCONF': __name__,
+            'MEDIA_ROOT': media_root,
+            'ALLOWED_HOSTS': ['127.0.0.1'],
+            'SECURE_SSL_REDIRECT': False,
+            'DEBUG': False,
+        }
+        try:
+            with override_settings(**overrides):
+                server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+                server.set_app(WSGIHandler())
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                try:
+                    self._run(server.server_address[1], options)
+                finally:
+                    server.shutdown()
+                    server.server_close()
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def _run(self, port, options):
+        files = [f'photo-{i}.jpg' for i in range(options['files'])]
+
+        # A browser revalidating its cached copy: serve() only understands
+        # If-Modified-Since, serve_media also answers If-None-Match.
+        validators = {}
+        for prefix in ('static-serve', 'media'):
+            for name in files:
+                _, headers, _ = self._fetch(port, f'/{prefix}/{name}', {})
+                validators[prefix, name] = {'If-Modified-Since': headers['Last-Modified']}
+                if headers.get('ETag'):
+                    validators[prefix, name]['If-None-Match'] = headers['ETag']
+
+        scenarios = [
+            ('full download', lambda prefix, name: {}),
+            ('revalidation', lambda prefix, name: validators[prefix, name]),
+            ('range 0-64KiB', lambda prefix, name: {'Range': 'bytes=0-65535'}),
+        ]
+        self.stdout.write(f"{'scenario':<16}{'view':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'MiB sent':>10}  statuses")
+        for scenario, headers_for in scenarios:
+            for prefix, label in (('static-serve', 'static.serve'), ('media', 'serve_media')):
+                self._scenario(port, scenario, label, prefix, files, headers_for, options)
+
+        with override_settings(MEDIA_SERVE_MODE='x-accel'):
+            self._scenario(port, 'full download', 'x-accel', 'media', files, scenarios[0][1], options)
+
+    def _scenario(self, port, scenario, label, prefix, files, headers_for, options):
+        def one(i):
+            name = files[i % len(files)]
+            start = time.perf_counter()
+            status, _, size = self._fetch(port, f'/{prefix}/{name}', headers_for(prefix, name))
+            return time.perf_counter() - start, status, size
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(one, range(options['requests'])))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(r[0] for r in results)
+        statuses = sorted({r[1] for r in results})
+        sent = sum(r[2] for r in results) / (1024 * 1024)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{scenario:<16}{label:<14}{len(results) / elapsed:>9.1f}"
+            f"{statistics.median(latencies) * 1000:>9.1f}{p95 * 1000:>9.1f}{sent:>10.1f}  {statuses}"
+        )
+
+    def _fetch(self, port, path, headers):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            size = 0
+            while chunk := response.read(256 * 1024):
+                size += len(chunk)
+            return response.status, dict(response.getheaders()), size
+        finally:
+            conn.close()
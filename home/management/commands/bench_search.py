@@ -0,0 +1,104 @@
+# home/management/commands/bench_search.py
+
+import random
+import statistics
+import string
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from home.models import ContentBlock, Post, PostCategory, SearchDocument
+from home.search import search
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the full-text index with icontains filtering on a synthetic corpus. '
+        'Everything is created inside a transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"Database: {connection.vendor}")
+        try:
+            with transaction.atomic():
+                self._populate(rng, options['posts'])
+                self._compare(rng, options['queries'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Rolled back benchmark data.")
+
+    def _populate(self, rng, count):
+        # Zipf-distributed pseudo-words give realistic common/rare term mixes.
+        self.vocabulary = sorted({
+            ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+            for _ in range(5000)
+        })
+        rng.shuffle(self.vocabulary)
+        weights = [1 / (rank + 1) for rank in range(len(self.vocabulary))]
+
+        def text(words):
+            return ' '.join(rng.choices(self.vocabulary, weights, k=words))
+
+        category = PostCategory.objects.create(name='Benchmark', slug='bench-search-category')
+        started = time.perf_counter()
+        for start in range(0, count, 5000):
+            posts = Post.objects.bulk_create([
+                Post(title=text(6).title(), slug=f'bench-search-{i}', excerpt=text(30), category=category)
+                for i in range(start, min(start + 5000, count))
+            ])
+            blocks = ContentBlock.objects.bulk_create([ContentBlock(post=post, content=text(120)) for post in posts])
+            self._index(posts, blocks)
+        self.stdout.write(f"Created and indexed {count} posts in {time.perf_counter() - started:.1f}s")
+
+    def _index(self, posts, blocks):
+        # Same document shape as search.index_object, built in bulk.
+        content_type = ContentType.objects.get_for_model(Post)
+        SearchDocument.objects.bulk_create([
+            SearchDocument(
+                content_type=content_type, object_id=post.pk, title=post.title,
+                body=f"{post.excerpt}\n{block.content}", url=post.get_absolute_url(),
+                published_date=post.published_date,
+            )
+            for post, block in zip(posts, blocks)
+        ])
+
+    def _compare(self, rng, count):
+        # Terms from the middle of the frequency range, plus two-word queries.
+        middle = self.vocabulary[50:1000]
+        queries = [rng.choice(middle) for _ in range(count // 2)]
+        queries += [f"{rng.choice(middle)} {rng.choice(middle)}" for _ in range(count - len(queries))]
+
+        def icontains(query):
+            queryset = Post.objects.filter(is_published=True)
+            for term in query.split():
+                queryset = queryset.filter(
+                    Q(title__icontains=term) | Q(excerpt__icontains=term) | Q(content_blocks__content__icontains=term)
+                )
+            return list(queryset.distinct().order_by('-published_date')[:10])
+
+        def indexed(query):
+            return search(query, model=Post, limit=10)[0]
+
+        self.stdout.write(f"{'method':<12}{'median ms':>11}{'p95 ms':>9}{'max ms':>9}")
+        for name, run in (('icontains', icontains), ('full-text', indexed)):
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                run(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+            self.stdout.write(f"{name:<12}{statistics.median(timings):>11.1f}{p95:>9.1f}{timings[-1]:>9.1f}")
@@ -0,0 +1,174 @@
+# home/management/commands/bench_views.py
+
+import json
+import random
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from home.models import Post, PostCategory, Subscriber, Video
+from home.pagination import encode_cursor
+
+ENDPOINTS = ('blog_list', 'blog_list_partial', 'blog_detail', 'video_list', 'video_detail')
+HTMX = {'HTTP_HX_REQUEST': 'true'}
+
+
+def _percentile(values, fraction):
+    return values[max(int(len(values) * fraction + 0.5) - 1, 0)]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures p50/p95 latency and queries per request of the blog and video views through the test '
+        'client, against the data already in the database (see populate_db). Results are saved as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and pass.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='JSON file to write. Defaults to bench-results/views-<time>.json.')
+        parser.add_argument('--compare', help='Earlier results file to print the changes against.')
+
+    def handle(self, *args, **options):
+        if not Post.objects.filter(is_published=True).exists():
+            raise CommandError("No published posts. Seed some first, e.g. `populate_db --posts 100000`.")
+
+        rng = random.Random(options['seed'])
+        urls = {name: self._sample_urls(name, rng, options['requests']) for name in ENDPOINTS}
+        client = Client()
+
+        with override_settings(ALLOWED_HOSTS=['testserver'], SECURE_SSL_REDIRECT=False, DEBUG=False):
+            # Cold: the caches are emptied before every request. Warm: an unmeasured pass has filled
+            # them first. The first unmeasured pass also loads templates and renders any post bodies
+            # not rendered yet, so neither pass pays for that.
+            results = {}
+            for mode in ('cold', 'warm'):
+                for name in ENDPOINTS:
+                    for path, headers in urls[name]:
+                        self._get(client, path, headers)
+                    results[f"{name}:{mode}"] = self._measure(client, urls[name], clear_cache=mode == 'cold')
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'git_commit': _git_commit(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'requests_per_endpoint': options['requests'],
+            'seed': options['seed'],
+            'rows': {
+                'posts': Post.objects.count(),
+                'videos': Video.objects.count(),
+                'subscribers': Subscriber.objects.count(),
+            },
+            'results': results,
+        }
+        self._print(results)
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'bench-results'
+                      / f"views-{timezone.localtime():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {output}"))
+
+        if options['compare']:
+            self._compare(json.loads(Path(options['compare']).read_text()), report)
+
+    def _sample_urls(self, name, rng, count):
+        """`count` (path, headers) pairs for an endpoint, drawn the same way for the same seed."""
+        posts = Post.objects.filter(is_published=True)
+        videos = Video.objects.filter(is_published=True)
+        if name in ('blog_detail', 'video_detail'):
+            queryset = posts if name == 'blog_detail' else videos
+            slugs = list(queryset.order_by('id').values_list('slug', flat=True))
+            return [(reverse(name, args=[rng.choice(slugs)]), {}) for _ in range(count)]
+
+        if name == 'video_list':
+            pages = max(videos.count() // 9, 1)
+            return [(f"{reverse(name)}?page={rng.randint(1, min(pages, 20))}", {}) for _ in range(count)]
+
+        categories = list(PostCategory.objects.values_list('slug', flat=True))
+        pages = max(posts.count() // 9, 1)
+        # Cursors into the first few hundred pages, as "Load More" would produce.
+        cursor_posts = list(posts.order_by('-published_date', '-id')[:9 * 300:9])
+        choices = []
+        for _ in range(count):
+            kind = rng.choice(('page', 'category', 'featured', 'cursor') if name == 'blog_list_partial'
+                              else ('page', 'category', 'featured'))
+            if kind == 'page':
+                query = f"page={rng.randint(1, min(pages, 50))}"
+            elif kind == 'category':
+                query = f"category={rng.choice(categories)}"
+            elif kind == 'featured':
+                query = 'featured=true'
+            else:
+                query = f"cursor={encode_cursor(rng.choice(cursor_posts))}"
+            choices.append((f"{reverse(name)}?{query}", HTMX if name == 'blog_list_partial' else {}))
+        return choices
+
+    def _get(self, client, path, headers):
+        response = client.get(path, **headers)
+        if response.status_code != 200:
+            raise CommandError(f"GET {path} returned {response.status_code}")
+        return response
+
+    def _measure(self, client, urls, clear_cache):
+        timings, queries = [], []
+        for path, headers in urls:
+            if clear_cache:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self._get(client, path, headers)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(_percentile(timings, 0.95), 2),
+            'max_ms': round(timings[-1], 2),
+            'queries_mean': round(statistics.mean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def _print(self, results):
+        self.stdout.write(f"{'endpoint':<26}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'queries':>9}{'max q':>7}")
+        for key, row in results.items():
+            self.stdout.write(
+                f"{key:<26}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['max_ms']:>9.1f}"
+                f"{row['queries_mean']:>9.1f}{row['queries_max']:>7}"
+            )
+
+    def _compare(self, previous, current):
+        self.stdout.write(f"\nChanges since {previous.get('git_commit') or previous['created_at']}")
+        self.stdout.write(f"{'endpoint':<26}{'p50':>10}{'p95':>10}{'queries':>10}")
+        for key, row in current['results'].items():
+            before = previous['results'].get(key)
+            if before is None:
+                continue
+            self.stdout.write(
+                f"{key:<26}{row['p50_ms'] - before['p50_ms']:>+10.1f}{row['p95_ms'] - before['p95_ms']:>+10.1f}"
+                f"{row['queries_mean'] - before['queries_mean']:>+10.1f}"
+            )
+        if previous['rows'] != current['rows']:
+            self.stdout.write(self.style.WARNING(f"Row counts differ: {previous['rows']} then {current['rows']}"))
@@ -0,0 +1,28 @@
+# home/management/commands/export_subscribers.py
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from home.models import Subscriber
+from home.subscribers import export_rows
+
+
+class Command(BaseCommand):
+    help = 'Streams subscribers to a CSV file (or stdout) in the format import_subscribers reads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help='File to write; stdout if omitted.')
+        parser.add_argument('--active-only', action='store_true')
+
+    def handle(self, *args, **options):
+        queryset = Subscriber.objects.all()
+        if options['active_only']:
+            queryset = queryset.filter(is_active=True)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                fh.writelines(export_rows(queryset))
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            sys.stdout.writelines(export_rows(queryset))
@@ -0,0 +1,44 @@
+# home/management/commands/gc_media.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from home.media_gc import MediaCollector
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves referenced media to content-hashed names, merging byte-identical copies, and deletes files '
+        'under MEDIA_ROOT that nothing references. Only reports what it would do unless --apply is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apply', action='store_true', help='Move and delete files instead of only reporting.')
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced files modified within this many hours (default: 24).')
+
+    def handle(self, *args, **options):
+        collector = MediaCollector(settings.MEDIA_ROOT, grace_seconds=options['grace_hours'] * 3600,
+                                   log=self.stdout.write)
+        plan = collector.plan()
+
+        for name in plan.missing:
+            self.stderr.write(f"Referenced but missing: {name}")
+        for target, names in plan.duplicates.items():
+            self.stdout.write(f"{len(names)} identical copies -> {target}: {', '.join(names)}")
+        orphaned_bytes = sum(plan.orphans.values())
+        self.stdout.write(
+            f"{len(plan.moves)} files to move to their content hash ({len(plan.duplicates)} with duplicates), "
+            f"{len(plan.orphans)} orphaned files ({orphaned_bytes / 1024 / 1024:.1f} MB)."
+        )
+        if options['verbosity'] > 1:
+            for name in sorted(plan.orphans):
+                self.stdout.write(f"  orphan: {name}")
+
+        if not options['apply']:
+            self.stdout.write('Dry run; pass --apply to move and delete files.')
+            return
+        updated, deleted, freed = collector.apply(plan)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} rows and deleted {deleted} files, freeing {freed / 1024 / 1024:.1f} MB."
+        ))
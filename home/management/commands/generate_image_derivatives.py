@@ -0,0 +1,31 @@
+# home/management/commands/generate_image_derivatives.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from home.images import IMAGE_FIELDS, generate_derivatives, image_variants
+
+
+class Command(BaseCommand):
+    help = 'Generates responsive image variants for uploads that predate the derivative pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate the manifest even if one already exists.')
+
+    def handle(self, *args, **options):
+        generated = skipped = failed = 0
+        for label, field_name in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            for obj in model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}).iterator():
+                field_file = getattr(obj, field_name)
+                if not options['force'] and image_variants(field_file):
+                    skipped += 1
+                    continue
+                try:
+                    generate_derivatives(field_file)
+                    generated += 1
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"{label} #{obj.pk} ({field_file.name}): {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {generated}, skipped {skipped}, failed {failed}."))
@@ -0,0 +1,32 @@
+# home/management/commands/import_subscribers.py
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.subscribers import import_subscribers, open_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-imports subscribers from a CSV file ('-' for stdin). Emails come from the column headed "
+        "'email', or the first column. Existing subscribers are left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['path'] == '-':
+            result = import_subscribers(open_text(sys.stdin.buffer))
+        else:
+            with open(options['path'], 'rb') as fh:
+                result = import_subscribers(open_text(fh))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        if result.invalid > len(result.errors):
+            self.stderr.write(f"... and {result.invalid - len(result.errors)} more invalid rows.")
+        self.stdout.write(self.style.SUCCESS(f"{result} ({time.perf_counter() - started:.1f}s)."))
@@ -0,0 +1,23 @@
+# home/management/commands/optimize_static_images.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from home.static_images import OUTPUT_DIR, StaticImageOptimizer
+
+
+class Command(BaseCommand):
+    help = (
+        f'Writes resized AVIF/WebP/JPEG variants of static/images and the favicon sizes to static/{OUTPUT_DIR}/. '
+        'Only images whose content changed since the last run are re-encoded.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-encode every image.')
+
+    def handle(self, *args, **options):
+        optimizer = StaticImageOptimizer(settings.STATICFILES_DIRS[0], force=options['force'], log=self.stdout.write)
+        processed, unchanged, removed = optimizer.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Optimized {processed} images, {unchanged} unchanged, removed the variants of {removed}."
+        ))
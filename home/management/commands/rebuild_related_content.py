@@ -0,0 +1,21 @@
+# home/management/commands/rebuild_related_content.py
+
+from django.core.management.base import BaseCommand
+
+from home.models import RelatedTerm
+from home.related import rebuild_related
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the related posts and videos lists from scratch (run after rebuild_search_index).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-empty', action='store_true',
+                            help='Only compute the lists if no term vectors exist yet, e.g. after the first deploy.')
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and RelatedTerm.objects.exists():
+            self.stdout.write("The related lists are already computed.")
+            return
+        count = rebuild_related()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} related entries."))
@@ -0,0 +1,21 @@
+# home/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from home.models import SearchDocument
+from home.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from all published posts and videos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-empty', action='store_true',
+                            help='Only build the index if it has no documents yet, e.g. after the first deploy.')
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and SearchDocument.objects.exists():
+            self.stdout.write("The search index is already built.")
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents."))
@@ -0,0 +1,123 @@
+# home/management/commands/run_task_workers.py
+
+import multiprocessing
+import threading
+import time
+
+from background_task.tasks import autodiscover
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from home.task_queue import Worker, handle_shutdown_signals, prune_task_runs, run_worker_process, worker_lanes
+
+# How often the supervisor deletes expired TaskRun metrics.
+PRUNE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs background tasks on several worker processes (or threads), claiming them by lane: '
+        'interactive emails first, then default work, then bulk broadcasts. '
+        'SIGTERM/SIGINT let running tasks finish before exiting.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.TASK_WORKERS)
+        parser.add_argument('--reserved', type=int, default=settings.TASK_RESERVED_WORKERS,
+                            help='Workers that only run interactive tasks (contact and welcome emails).')
+        parser.add_argument('--mode', choices=('process', 'thread'), default=settings.TASK_WORKER_MODE)
+        parser.add_argument('--poll-interval', type=float, default=settings.TASK_POLL_INTERVAL,
+                            help='Seconds an idle worker waits before checking for tasks again.')
+        parser.add_argument('--grace', type=float, default=settings.TASK_SHUTDOWN_GRACE,
+                            help='Seconds running tasks get to finish after a shutdown signal.')
+        parser.add_argument('--burst', action='store_true', help='Exit once there are no ready tasks left.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+        if not 0 <= options['reserved'] < options['workers']:
+            raise CommandError('--reserved must leave at least one worker for the other lanes.')
+
+        autodiscover()
+        self.next_prune = 0
+        self._housekeeping()
+        stop = threading.Event()
+        handle_shutdown_signals(stop)
+        lanes = [worker_lanes(i, options['reserved']) for i in range(options['workers'])]
+        self.stdout.write(
+            f"Starting {options['workers']} {options['mode']} workers "
+            f"({options['reserved']} reserved for interactive tasks)."
+        )
+        if options['mode'] == 'thread':
+            self._run_threads(lanes, stop, options)
+        else:
+            self._run_processes(lanes, stop, options)
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
+
+    def _run_threads(self, lanes, stop, options):
+        threads = [
+            threading.Thread(
+                target=Worker(worker, stop, options['poll_interval'], options['burst']).run,
+                name=f'task-worker-{i}', daemon=True,
+            )
+            for i, worker in enumerate(lanes)
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads) and not stop.is_set():
+            self._housekeeping()
+            stop.wait(1)
+        self._join(threads, options['grace'])
+        if any(thread.is_alive() for thread in threads):
+            # Daemon threads die with the process; their tasks are retried after MAX_RUN_TIME.
+            self.stderr.write(f"Workers did not stop within {options['grace']}s, exiting anyway.")
+
+    def _run_processes(self, lanes, stop, options):
+        # Forked children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+
+        def start(worker):
+            process = context.Process(
+                target=run_worker_process, args=(worker, options['poll_interval'], options['burst']), daemon=True,
+            )
+            process.start()
+            return process
+
+        processes = [start(worker) for worker in lanes]
+        while not stop.is_set():
+            for i, process in enumerate(processes):
+                # A worker that crashed is replaced; a clean exit means it was told to stop,
+                # or in burst mode that the queue is drained.
+                if not process.is_alive() and process.exitcode != 0:
+                    self.stderr.write(f"Worker {process.pid} exited with code {process.exitcode}, restarting it.")
+                    processes[i] = start(lanes[i])
+            if not any(process.is_alive() for process in processes):
+                break
+            self._housekeeping()
+            stop.wait(1)
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: the worker finishes its current task.
+        self._join(processes, options['grace'])
+        for process in processes:
+            if process.is_alive():
+                self.stderr.write(f"Worker {process.pid} did not stop within {options['grace']}s, killing it.")
+                process.kill()
+                process.join()
+
+    def _housekeeping(self):
+        if time.monotonic() < self.next_prune:
+            return
+        self.next_prune = time.monotonic() + PRUNE_INTERVAL
+        pruned = prune_task_runs()
+        connections.close_all()
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} old task run records.")
+
+    def _join(self, workers, grace):
+        deadline = time.monotonic() + grace
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
@@ -0,0 +1,49 @@
+# home/management/commands/task_queue_stats.py
+
+import statistics
+from datetime import timedelta
+
+from background_task.tasks import autodiscover
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from home.models import TaskRun
+from home.task_queue import LANES, ready_tasks
+
+
+def _percentile(values, fraction):
+    return values[max(int(len(values) * fraction + 0.5) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Reports queue wait and run times per task lane, plus the tasks waiting right now.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='How far back to report.')
+
+    def handle(self, *args, **options):
+        autodiscover()
+        since = timezone.now() - timedelta(hours=options['hours'])
+        runs = {}
+        for queue, due_at, claimed_at, finished_at in TaskRun.objects.filter(claimed_at__gte=since).values_list(
+                'queue', 'due_at', 'claimed_at', 'finished_at'):
+            waits, durations = runs.setdefault(queue, ([], []))
+            waits.append(max((claimed_at - due_at).total_seconds(), 0) * 1000)
+            durations.append((finished_at - claimed_at).total_seconds() * 1000)
+
+        self.stdout.write(f"Task runs in the last {options['hours']:g}h")
+        self.stdout.write(f"{'lane':<14}{'runs':>7}{'wait p50':>11}{'wait p95':>11}{'wait max':>11}{'run p50':>11}  (ms)")
+        for queue in sorted(runs, key=lambda q: LANES.index(q) if q in LANES else len(LANES)):
+            waits, durations = (sorted(values) for values in runs[queue])
+            self.stdout.write(
+                f"{queue:<14}{len(waits):>7}{statistics.median(waits):>11.0f}{_percentile(waits, 0.95):>11.0f}"
+                f"{waits[-1]:>11.0f}{statistics.median(durations):>11.0f}"
+            )
+
+        now = timezone.now()
+        self.stdout.write("\nWaiting now")
+        for lane in LANES:
+            waiting = ready_tasks((lane,), now).order_by().aggregate(count=Count('id'), oldest=Min('run_at'))
+            oldest = f", oldest due {(now - waiting['oldest']).total_seconds():.0f}s ago" if waiting['count'] else ''
+            self.stdout.write(f"{lane:<14}{waiting['count']:>7}{oldest}")
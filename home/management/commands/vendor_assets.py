@@ -0,0 +1,96 @@
+# home/management/commands/vendor_assets.py
+
+import re
+import urllib.request
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.assets import CSS_URL, VENDOR, css_rules, minify_css
+
+# Google Fonts picks the font format from the User-Agent; this one gets woff2.
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+ICON_CLASS = re.compile(r'\bfa-[a-z0-9-]+')
+ICON_RULE = re.compile(r'^\.(fa-[a-z0-9-]+)::?before$')
+
+
+def fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.read()
+    except OSError as e:
+        raise CommandError(f"Could not download {url}: {e}")
+
+
+class Command(BaseCommand):
+    help = (
+        'Downloads htmx, the Font Awesome icons the templates use and the Google fonts into static/vendor/, '
+        'so pages stop loading them from three CDNs. The Docker build runs it before collectstatic; '
+        'templates use the CDNs until it has run.'
+    )
+
+    def handle(self, *args, **options):
+        self.static_dir = Path(settings.STATICFILES_DIRS[0])
+        self._htmx()
+        self._icons()
+        self._fonts()
+        self.stdout.write(self.style.SUCCESS('Vendored assets are in static/vendor/. Run collectstatic to serve them.'))
+
+    def _write(self, path, content):
+        target = self.static_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        self.stdout.write(f"  {path} ({len(content) // 1024} KB)")
+
+    def _localize(self, css, css_url, path):
+        """Downloads every url() in `css` next to `path` and points the CSS at the copies."""
+        directory = path.rsplit('/', 1)[0]
+        downloaded = {}
+
+        def rewrite(match):
+            url = urljoin(css_url, match.group(2))
+            name = f"files/{urlsplit(url).path.rsplit('/', 1)[-1]}"
+            if url not in downloaded:
+                self._write(f"{directory}/{name}", fetch(url))
+                downloaded[url] = name
+            return f"url('{name}')"
+
+        return CSS_URL.sub(rewrite, css)
+
+    def _htmx(self):
+        path, url = VENDOR['htmx']
+        self._write(path, fetch(url))
+
+    def _used_icons(self):
+        used = set()
+        roots = [Path(directory) for template in settings.TEMPLATES for directory in template['DIRS']]
+        roots.append(self.static_dir / 'js')
+        for root in roots:
+            for file in root.rglob('*'):
+                if file.suffix in ('.html', '.js'):
+                    used.update(ICON_CLASS.findall(file.read_text(encoding='utf-8', errors='ignore')))
+        return used
+
+    def _icons(self):
+        """The Font Awesome stylesheet without the rules for icons no template uses."""
+        path, url = VENDOR['icons']
+        used = self._used_icons()
+        kept = []
+        for prelude, body in css_rules(minify_css(fetch(url).decode('utf-8'))):
+            if body is None:
+                kept.append(f"{prelude};")
+                continue
+            icons = [ICON_RULE.match(selector.strip()) for selector in prelude.split(',')]
+            if all(icons) and not any(icon.group(1) in used for icon in icons):
+                continue
+            kept.append(f"{prelude}{{{body}}}")
+        self.stdout.write(f"Keeping {len(used)} icon classes: {', '.join(sorted(used))}")
+        self._write(path, self._localize(''.join(kept), url, path).encode('utf-8'))
+
+    def _fonts(self):
+        path, url = VENDOR['fonts']
+        css = fetch(url).decode('utf-8')
+        self._write(path, minify_css(self._localize(css, url, path)).encode('utf-8'))
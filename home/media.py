@@ -0,0 +1,155 @@
+# home/media.py
+"""
+Production serving for uploaded media.
+
+`serve_media` replaces django.views.static.serve for /media/. It answers
+conditional requests with 304 before touching the file, serves single byte
+ranges with 206, and marks content-hashed filenames as immutable. With
+MEDIA_SERVE_MODE set to 'x-accel' (nginx) or 'x-sendfile' (Apache,
+lighttpd, Caddy) the body is handed off to the front server and the worker
+only returns headers.
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+# `name.<12+ hex chars>.ext`, the scheme ManifestStaticFilesStorage uses, or
+# `<sha256>.ext`, the name ContentAddressedStorage gives uploads.
+HASHED_NAME_RE = re.compile(r'(?:\.[0-9a-f]{12,}|(?:^|/)[0-9a-f]{64})\.[^./]+$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class _FileRange:
+    """A file positioned at `start` that reads no further than `length` bytes."""
+
+    def __init__(self, fh, start, length):
+        self.fh = fh
+        self.name = fh.name
+        self.remaining = length
+        fh.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets gunicorn sendfile() from the current offset; it stops at Content-Length.
+        return self.fh.fileno()
+
+    def close(self):
+        self.fh.close()
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single-range `Range` header, None to
+    serve the whole file (missing, malformed or multi-range header), or
+    False if the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and int(mtime) <= modified
+
+
+def _cache_control(response, path):
+    if HASHED_NAME_RE.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+        stat = fullpath.stat()
+    except (OSError, ValueError):
+        raise Http404("Media file not found.")
+    if not fullpath.is_file():
+        raise Http404("Media file not found.")
+
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = _file_response(request, fullpath, stat, etag)
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    _cache_control(response, path)
+    return response
+
+
+def _file_response(request, fullpath, stat, etag):
+    content_type, encoding = mimetypes.guess_type(fullpath.name)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode in ('x-accel', 'x-sendfile'):
+        # The front server streams the body and handles Range itself.
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel':
+            relative = Path(os.path.relpath(fullpath, settings.MEDIA_ROOT)).as_posix()
+            response.headers['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(relative)
+        else:
+            response.headers['X-Sendfile'] = os.fspath(fullpath)
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+
+    byte_range = None
+    if request.method == 'GET' and _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f"bytes */{stat.st_size}"
+        return response
+
+    fh = fullpath.open('rb')
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(_FileRange(fh, start, end - start + 1), status=206, content_type=content_type)
+        response.headers['Content-Range'] = f"bytes {start}-{end}/{stat.st_size}"
+        response.headers['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(fh, content_type=content_type)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.block_size = STREAM_BLOCK_SIZE
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
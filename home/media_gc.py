@@ -0,0 +1,190 @@
+# home/media_gc.py
+"""
+Garbage collection for MEDIA_ROOT.
+
+Two kinds of waste pile up under MEDIA_ROOT. Files stop being referenced
+when an image is replaced or its row deleted, since blobs may be shared and
+are never deleted with a row. And uploads from before content addressing
+have byte-identical copies under different names (`f5.jpg`,
+`f5_22UpMKG.jpg`, ...).
+
+`manage.py gc_media` handles both. Every referenced file not yet stored
+under its hash is linked to its blob name along with its derivatives, and
+the rows pointing at it are re-saved, so copies of the same content collapse
+into one blob. Then every file no row references (other than derivatives of
+referenced images) is deleted. Files are hashed in chunks, never read whole.
+"""
+
+import json
+import logging
+import os
+import posixpath
+import re
+import shutil
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import models, transaction
+
+from .images import _cache_key, _manifest_name
+from .storage import TEMP_PREFIX, blob_name, file_sha256, is_blob_name
+
+logger = logging.getLogger(__name__)
+
+# `<stem>.<width>w.<ext>` and `<stem>.variants.json`, written by home/images.py.
+DERIVED_RE = re.compile(r'^(?P<stem>.+)\.(?:\d+w\.[a-z0-9]+|variants\.json)$')
+
+
+def file_fields():
+    """(model, field) for every FileField of every installed model."""
+    for model in apps.get_models():
+        for model_field in model._meta.get_fields():
+            if isinstance(model_field, models.FileField):
+                yield model, model_field
+
+
+def referenced_names():
+    names = set()
+    for model, model_field in file_fields():
+        names.update(
+            model._default_manager.exclude(**{model_field.name: ''}).exclude(**{f'{model_field.name}__isnull': True})
+            .values_list(model_field.name, flat=True).iterator()
+        )
+    return names
+
+
+def _stem(name):
+    return posixpath.splitext(name)[0]
+
+
+@dataclass
+class Plan:
+    # Referenced name: blob name it moves to.
+    moves: dict = field(default_factory=dict)
+    # Orphaned name: size in bytes.
+    orphans: dict = field(default_factory=dict)
+    # Referenced names missing from disk.
+    missing: list = field(default_factory=list)
+
+    @property
+    def duplicates(self):
+        """Blob name: the referenced names that share its content, for blobs with more than one."""
+        groups = defaultdict(list)
+        for name, target in self.moves.items():
+            groups[target].append(name)
+        return {target: sorted(names) for target, names in groups.items() if len(names) > 1}
+
+
+class MediaCollector:
+    def __init__(self, media_root, grace_seconds=24 * 60 * 60, log=None):
+        self.media_root = os.fspath(media_root)
+        self.grace_seconds = grace_seconds
+        self.log = log or (lambda message: None)
+
+    def path(self, name):
+        return os.path.join(self.media_root, *name.split('/'))
+
+    def files(self):
+        """Relative name: os.stat_result for every file under MEDIA_ROOT, dotfiles aside from abandoned uploads."""
+        found = {}
+        for directory, dirnames, filenames in os.walk(self.media_root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.') and not filename.startswith(TEMP_PREFIX):
+                    continue
+                path = os.path.join(directory, filename)
+                found[os.path.relpath(path, self.media_root).replace(os.sep, '/')] = os.stat(path)
+        return found
+
+    def plan(self):
+        files = self.files()
+        referenced = referenced_names()
+        plan = Plan(missing=sorted(name for name in referenced if name not in files))
+
+        for name in sorted(referenced):
+            if name in files and not is_blob_name(name):
+                plan.moves[name] = blob_name(posixpath.dirname(name), file_sha256(self.path(name)),
+                                             posixpath.splitext(name)[1])
+
+        kept = (referenced - plan.moves.keys()) | set(plan.moves.values())
+        kept_stems = {_stem(name) for name in kept}
+        cutoff = time.time() - self.grace_seconds
+        for name, stat in files.items():
+            if name in kept:
+                continue
+            derived = DERIVED_RE.match(name)
+            if derived and derived.group('stem') in kept_stems:
+                continue
+            # Recent files may belong to an upload whose row isn't committed yet.
+            if stat.st_mtime > cutoff:
+                continue
+            plan.orphans[name] = stat.st_size
+        return plan
+
+    def _link(self, source, target):
+        """Makes `target` a copy of `source` (a hard link when possible) unless it exists already."""
+        source_path, target_path = self.path(source), self.path(target)
+        if os.path.exists(target_path):
+            return
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copyfile(source_path, target_path)
+
+    def _move_derivatives(self, name, target):
+        old_stem, new_stem = _stem(name), _stem(target)
+        directory = posixpath.dirname(name)
+        for filename in os.listdir(self.path(directory) if directory else self.media_root):
+            derived = posixpath.join(directory, filename)
+            match = DERIVED_RE.match(derived)
+            if match and match.group('stem') == old_stem and not filename.endswith('.variants.json'):
+                self._link(derived, new_stem + derived[len(old_stem):])
+
+        manifest_path, new_manifest = self.path(_manifest_name(name)), self.path(_manifest_name(target))
+        if os.path.exists(manifest_path) and not os.path.exists(new_manifest):
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+            for variants in manifest['formats'].values():
+                for variant in variants:
+                    variant[1] = new_stem + variant[1][len(old_stem):]
+            with open(new_manifest, 'w') as fh:
+                json.dump(manifest, fh)
+
+    def _repoint(self, moves):
+        """Re-saves every row that references a moved name, so the usual signals refresh caches."""
+        updated = 0
+        for model, model_field in file_fields():
+            queryset = model._default_manager.filter(**{f'{model_field.name}__in': list(moves)})
+            for obj in queryset.iterator():
+                setattr(obj, model_field.attname, moves[getattr(obj, model_field.attname).name])
+                obj.save(update_fields=[model_field.name])
+                updated += 1
+        return updated
+
+    def apply(self, plan):
+        """Carries out `plan`. Returns (rows updated, files deleted, bytes freed)."""
+        for name, target in plan.moves.items():
+            self._link(name, target)
+            self._move_derivatives(name, target)
+        with transaction.atomic():
+            updated = self._repoint(plan.moves)
+        for name in plan.moves:
+            cache.delete(_cache_key(name))
+        if plan.moves:
+            self.log(f"Moved {len(plan.moves)} files to their content hash and updated {updated} rows.")
+
+        # The originals just moved are orphans now, along with their derivatives.
+        after = self.plan()
+        deleted = freed = 0
+        for name, size in after.orphans.items():
+            try:
+                os.unlink(self.path(name))
+            except FileNotFoundError:
+                continue
+            deleted += 1
+            freed += size
+        logger.info(f"Media GC: updated {updated} rows, deleted {deleted} files ({freed} bytes).")
+        return updated, deleted, freed
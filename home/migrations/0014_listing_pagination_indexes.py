@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_notificationdelivery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', 'published_date', 'id'], name='post_published_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', 'category', 'published_date'], name='post_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['is_published', 'published_date', 'id'], name='video_published_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['is_published', 'category', 'published_date'], name='video_category_date_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE home_searchdocument_fts USING fts5(
+        title, body,
+        content='home_searchdocument', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER home_searchdocument_ai AFTER INSERT ON home_searchdocument BEGIN
+        INSERT INTO home_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER home_searchdocument_ad AFTER DELETE ON home_searchdocument BEGIN
+        INSERT INTO home_searchdocument_fts(home_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER home_searchdocument_au AFTER UPDATE ON home_searchdocument BEGIN
+        INSERT INTO home_searchdocument_fts(home_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO home_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS home_searchdocument_au",
+    "DROP TRIGGER IF EXISTS home_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS home_searchdocument_ai",
+    "DROP TABLE IF EXISTS home_searchdocument_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE home_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX home_searchdocument_vector_idx ON home_searchdocument USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS home_searchdocument_vector_idx",
+    "ALTER TABLE home_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+create_search_index = _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+drop_search_index = _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('home', '0014_listing_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('url', models.CharField(max_length=300)),
+                ('published_date', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('home', '0016_post_body_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_sources', to='home.searchdocument')),
+            ],
+            options={
+                'verbose_name_plural': 'Related Content',
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['content_type', 'object_id', 'rank'], name='home_relate_content_3aa804_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0017_relatedcontent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=190)),
+                ('queue', models.CharField(max_length=190)),
+                ('worker', models.CharField(max_length=64)),
+                ('due_at', models.DateTimeField(help_text='When the task became ready to run.')),
+                ('claimed_at', models.DateTimeField(db_index=True)),
+                ('finished_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-claimed_at'],
+                'indexes': [models.Index(fields=['queue', 'claimed_at'], name='home_taskru_queue_66b4f4_idx')],
+            },
+        ),
+    ]
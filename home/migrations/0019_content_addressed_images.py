@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:20
+
+import home.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_taskrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aboutpage',
+            name='profile_image',
+            field=home.fields.ContentAddressedImageField(blank=True, null=True, upload_to='about/'),
+        ),
+        migrations.AlterField(
+            model_name='contentblock',
+            name='image',
+            field=home.fields.ContentAddressedImageField(blank=True, null=True, upload_to='content_blocks/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=home.fields.ContentAddressedImageField(blank=True, null=True, upload_to='blog/'),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='thumbnail',
+            field=home.fields.ContentAddressedImageField(blank=True, null=True, upload_to='video_thumbnails/'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('home', '0019_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'term', '-weight'], name='home_relate_content_906e8c_idx'), models.Index(fields=['content_type', 'object_id'], name='home_relate_content_bf4d3f_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TermIdf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('idf', models.FloatField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Term IDF',
+                'verbose_name_plural': 'Term IDFs',
+                'unique_together': {('content_type', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:48
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Lower
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """
+    Lower-cases every stored email, merging rows that only differ in case
+    into the oldest one. The merged row stays unsubscribed if any of them
+    was, and keeps the delivery history of all of them.
+    """
+    Subscriber = apps.get_model('home', 'Subscriber')
+    NotificationDelivery = apps.get_model('home', 'NotificationDelivery')
+    mixed = (
+        Subscriber.objects.annotate(normalized=Lower('email')).exclude(email=Lower('email'))
+        .values_list('normalized', flat=True).distinct()
+    )
+    for email in list(mixed):
+        rows = list(Subscriber.objects.annotate(normalized=Lower('email')).filter(normalized=email).order_by('id'))
+        keep, duplicates = rows[0], rows[1:]
+        for duplicate in duplicates:
+            # A broadcast both rows were part of keeps the kept row's record.
+            kept = NotificationDelivery.objects.filter(
+                subscriber=keep, content_type=OuterRef('content_type'), object_id=OuterRef('object_id'))
+            NotificationDelivery.objects.filter(subscriber=duplicate).exclude(Exists(kept)).update(subscriber=keep)
+            duplicate.delete()
+        keep.email = email
+        keep.is_active = all(row.is_active for row in rows)
+        keep.save(update_fields=['email', 'is_active'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0022_backfill_related_content'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='subscriber',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='subscriber_email_lower_unique'),
+        ),
+    ]
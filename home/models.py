@@ -1,8 +1,30 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import Lower
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.models import ContentType
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
 
+from .fields import ContentAddressedImageField
+
+
+def _related_items(queryset, obj, limit):
+    # One query: the precomputed list joined through SearchDocument back to the model.
+    related = list(
+        queryset
+        .filter(search_documents__related_sources__content_type=ContentType.objects.get_for_model(queryset.model),
+                search_documents__related_sources__object_id=obj.pk)
+        .order_by('search_documents__related_sources__rank')[:limit]
+    )
+    # No list yet (never computed, or nothing similar): other items from the same category.
+    if related or obj.category_id is None:
+        return related
+    return list(queryset.filter(category_id=obj.category_id, is_published=True).exclude(pk=obj.pk)[:limit])
+
+
 class PostCategory(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
@@ -28,7 +50,7 @@ class Post(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     excerpt = models.TextField(help_text="A short description of the post")
-    image = models.ImageField(upload_to='blog/', blank=True, null=True)
+    image = ContentAddressedImageField(upload_to='blog/', blank=True, null=True)
     category = models.ForeignKey(PostCategory, on_delete=models.CASCADE, related_name='posts')
     published_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -37,9 +59,20 @@ class Post(models.Model):
     is_published = models.BooleanField(default=True, db_index=True)
     
     notification_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    search_documents = GenericRelation('SearchDocument')
+
+    # Pre-rendered content blocks, refreshed whenever a block changes (see rendering.py).
+    body_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    body_rendered_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            # Keyset pagination on (published_date, id), optionally within a category.
+            models.Index(fields=['is_published', 'published_date', 'id'], name='post_published_date_id_idx'),
+            models.Index(fields=['is_published', 'category', 'published_date'], name='post_category_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -52,9 +85,14 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('blog_detail', args=[self.slug])
 
-    def get_related_posts(self):
-        """Get posts in the same category, excluding this post"""
-        return Post.objects.filter(category=self.category, is_published=True).exclude(id=self.id)[:3]
+    @property
+    def reading_time(self):
+        """Minutes to read the body at 200 words per minute, at least one."""
+        return max(1, -(-self.word_count // 200))
+
+    def get_related_posts(self, limit=3):
+        """Most similar published posts, precomputed by home/related.py."""
+        return _related_items(Post.objects.select_related('category').defer('body_html'), self, limit)
 
 
 class ContentBlock(models.Model):
@@ -69,7 +107,7 @@ class ContentBlock(models.Model):
     block_type = models.CharField(max_length=20, choices=BLOCK_TYPE_CHOICES, default='rich_text')
     
     content = models.TextField(blank=True)
-    image = models.ImageField(upload_to='content_blocks/', blank=True, null=True)
+    image = ContentAddressedImageField(upload_to='content_blocks/', blank=True, null=True)
     caption = models.CharField(max_length=255, blank=True)
     
     class Meta:
@@ -106,7 +144,7 @@ class Video(models.Model):
     excerpt = models.TextField(blank=True, help_text="A short description of the video.")
     description = models.TextField(blank=True)
     video_url = models.URLField(help_text="URL to the video (YouTube, Vimeo, etc.)")
-    thumbnail = models.ImageField(upload_to='video_thumbnails/', blank=True, null=True)
+    thumbnail = ContentAddressedImageField(upload_to='video_thumbnails/', blank=True, null=True)
     category = models.ForeignKey(VideoCategory, on_delete=models.SET_NULL, null=True, related_name='videos')
     
     is_featured = models.BooleanField(default=False, help_text="Check to feature this video on the main page.", db_index=True)
@@ -115,9 +153,14 @@ class Video(models.Model):
     is_published = models.BooleanField(default=True, db_index=True)
     
     notification_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    search_documents = GenericRelation('SearchDocument')
 
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            models.Index(fields=['is_published', 'published_date', 'id'], name='video_published_date_id_idx'),
+            models.Index(fields=['is_published', 'category', 'published_date'], name='video_category_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -130,6 +173,10 @@ class Video(models.Model):
     def get_absolute_url(self):
         return reverse('video_detail', args=[self.slug])
 
+    def get_related_videos(self, limit=3):
+        """Most similar published videos, precomputed by home/related.py."""
+        return _related_items(Video.objects.select_related('category'), self, limit)
+
     def get_embed_url(self):
      url = self.video_url.strip()
      if 'youtu.be/' in url:
@@ -146,7 +193,7 @@ class AboutPage(models.Model):
     title = models.CharField(max_length=200)
     subtitle = models.CharField(max_length=200)
     content = models.TextField()
-    profile_image = models.ImageField(upload_to='about/', blank=True, null=True)
+    profile_image = ContentAddressedImageField(upload_to='about/', blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -161,5 +208,180 @@ class Subscriber(models.Model):
     is_active = models.BooleanField(default=True)
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Emails are stored lower-cased; this also covers rows written by bulk_create.
+            models.UniqueConstraint(Lower('email'), name='subscriber_email_lower_unique'),
+        ]
+
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+    def save(self, *args, **kwargs):
+        self.email = self.email.strip().lower()
+        super().save(*args, **kwargs)
+
+
+class Broadcast(models.Model):
+    """Progress of a subscriber broadcast, so a crashed worker can resume it."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    last_subscriber_id = models.BigIntegerField(default=0, help_text="Highest subscriber id whose chunk has been sent.")
+    recipients_sent = models.PositiveIntegerField(default=0)
+    chunks_sent = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return f"Broadcast of {self.content_type.model} #{self.object_id}"
+
+
+class NotificationDelivery(models.Model):
+    """Per-subscriber delivery state for a broadcast."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    subscriber = models.ForeignKey(Subscriber, on_delete=models.CASCADE, related_name='deliveries')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    provider_message_id = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Notification Deliveries"
+        unique_together = ('content_type', 'object_id', 'subscriber')
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model} #{self.object_id} to {self.subscriber_id}: {self.status}"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalised text of one published Post (with its content blocks) or
+    Video. The full-text index itself is backend specific and lives outside
+    the ORM: an FTS5 table on SQLite, a tsvector column with a GIN index on
+    PostgreSQL (see migration 0015 and home/search.py).
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=300)
+    published_date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def kind(self):
+        return self.content_type.model
+
+
+class RelatedContent(models.Model):
+    """One entry in a Post's or Video's precomputed related list (see related.py)."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    target = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='related_sources')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name_plural = "Related Content"
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model} #{self.object_id} -> {self.target} ({self.score:.3f})"
+
+
+class RelatedTerm(models.Model):
+    """One of the heaviest terms in a Post's or Video's TF-IDF vector (see related.py)."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'term', '-weight']),
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model} #{self.object_id}: {self.term} ({self.weight:.3f})"
+
+
+class TermIdf(models.Model):
+    """Inverse document frequency of a term among posts or videos, as of the last rebuild_related."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    term = models.CharField(max_length=64)
+    idf = models.FloatField()
+
+    class Meta:
+        verbose_name = "Term IDF"
+        verbose_name_plural = "Term IDFs"
+        unique_together = ('content_type', 'term')
+
+    def __str__(self):
+        return f"{self.content_type.model}: {self.term} ({self.idf:.3f})"
+
+
+class TaskRun(models.Model):
+    """Queue wait and run time of one background task, recorded by run_task_workers."""
+    task_name = models.CharField(max_length=190)
+    queue = models.CharField(max_length=190)
+    worker = models.CharField(max_length=64)
+
+    due_at = models.DateTimeField(help_text="When the task became ready to run.")
+    claimed_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-claimed_at']
+        indexes = [
+            models.Index(fields=['queue', 'claimed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} on {self.queue}: waited {self.wait.total_seconds():.2f}s"
+
+    @property
+    def wait(self):
+        return max(self.claimed_at - self.due_at, timedelta(0))
+
+    @property
+    def duration(self):
+        return self.finished_at - self.claimed_at
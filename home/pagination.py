@@ -0,0 +1,63 @@
+# home/pagination.py
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    raw = f"{obj.published_date.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns (published_date, pk) for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        published, pk = raw.split('|')
+        return datetime.fromisoformat(published), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over (published_date, id), newest first. A page is
+    addressed by an opaque cursor pointing after the last item already shown,
+    so there is no COUNT(*) and no OFFSET: a deep page costs the same as the
+    first one. An unknown cursor falls back to the first page.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by('-published_date', '-id')
+        self.per_page = per_page
+
+    def get_page(self, cursor=None):
+        queryset = self.queryset
+        position = decode_cursor(cursor)
+        if position:
+            published, pk = position
+            queryset = queryset.filter(Q(published_date__lt=published) | Q(published_date=published, id__lt=pk))
+
+        # One extra row tells us whether there is a next page.
+        items = list(queryset[:self.per_page + 1])
+        next_cursor = encode_cursor(items[self.per_page - 1]) if len(items) > self.per_page else None
+        return CursorPage(items[:self.per_page], next_cursor)
@@ -0,0 +1,119 @@
+# home/profiling.py
+"""
+Per-request profiling: SQL query count, database time, template render time
+and total time, keyed by URL name (`blog_list`, `blog_detail`, ...).
+
+ProfilingMiddleware is active when PROFILE_REQUESTS is on, which it is by
+default with DEBUG. It puts the numbers on `request.profile` and sends them
+as a Server-Timing header, so they show up in the browser's network panel.
+The budget tests in test_budgets.py read `request.profile` to fail when a
+view goes over its query or time budget.
+
+Template time counts only the outermost render in progress, so included
+templates and render_to_string calls inside a render aren't counted twice.
+It is measured by wrapping Template.render, which is done once, when this
+module is imported with PROFILE_REQUESTS on, and undone if an
+override_settings turns it off again.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+_active = ContextVar('home_request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.url_name = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self._template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_ms:.1f};desc="templates", '
+            f'total;dur={self.total_ms:.1f}'
+        )
+
+    def __str__(self):
+        return (f"{self.url_name}: {self.total_ms:.1f}ms total, {self.queries} queries in {self.db_ms:.1f}ms, "
+                f"templates {self.template_ms:.1f}ms")
+
+
+_template_render = Template.render
+
+
+def _profiled_render(self, context):
+    profile = _active.get()
+    if profile is None:
+        return _template_render(self, context)
+    profile._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        profile._template_depth -= 1
+        if not profile._template_depth:
+            profile.template_ms += (time.perf_counter() - started) * 1000
+
+
+def _profile_templates(enabled):
+    Template.render = _profiled_render if enabled else _template_render
+
+
+_profile_templates(settings.PROFILE_REQUESTS)
+
+
+@receiver(setting_changed)
+def _profile_requests_changed(setting, value, **kwargs):
+    if setting == 'PROFILE_REQUESTS':
+        _profile_templates(value)
+
+
+class ProfilingMiddleware:
+    """Goes first in MIDDLEWARE, so the total covers the rest of the stack."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_REQUESTS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = request.profile = RequestProfile()
+        token = _active.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _active.reset(token)
+        profile.total_ms = (time.perf_counter() - started) * 1000
+        if request.resolver_match:
+            profile.url_name = request.resolver_match.url_name
+        response['Server-Timing'] = profile.server_timing()
+        logger.debug(f"Profiled {profile}")
+        return response
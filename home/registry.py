@@ -0,0 +1,82 @@
+# home/registry.py
+"""
+Cached lookups for the rows nearly every page needs but that change about
+once a month: the post and video categories, with their published counts,
+and the AboutPage.
+
+Each snapshot is built by a couple of queries and stored in the shared cache
+under its namespace's listing version (see caching.py), and each process
+also keeps the last snapshot it read. Saving a category, post, video or the
+AboutPage already bumps that version (see signals.py), so the next read
+anywhere misses and rebuilds. A read costs one cache lookup for the version
+and no database query.
+
+Snapshots are shared by every request a process serves: read them, never
+modify the objects in them.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import listing_version
+from .models import AboutPage, Post, PostCategory, Video, VideoCategory
+
+# name: (version, snapshot), for this process.
+_local = {}
+
+
+class CategoryRegistry:
+    """
+    The categories of one kind in menu order, each with a `published_count`,
+    plus lookup by slug and the number of published featured items.
+    """
+
+    def __init__(self, categories, featured_count):
+        self.categories = categories
+        self.by_slug = {category.slug: category for category in categories}
+        self.featured_count = featured_count
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def get(self, slug):
+        return self.by_slug.get(slug)
+
+
+def _snapshot(namespace, name, build):
+    version = listing_version(namespace)
+    local = _local.get(name)
+    if local is not None and local[0] == version:
+        return local[1]
+    key = f"registry:{name}:{version}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build()
+        cache.set(key, snapshot, settings.LISTING_CACHE_TIMEOUT)
+    _local[name] = (version, snapshot)
+    return snapshot
+
+
+def _categories(category_model, related_name, item_model):
+    published = Q(**{f'{related_name}__is_published': True})
+    categories = list(category_model.objects.annotate(published_count=Count(related_name, filter=published)))
+    featured_count = item_model.objects.filter(is_published=True, is_featured=True).count()
+    return CategoryRegistry(categories, featured_count)
+
+
+def post_categories():
+    return _snapshot('blog', 'post_categories', lambda: _categories(PostCategory, 'posts', Post))
+
+
+def video_categories():
+    return _snapshot('video', 'video_categories', lambda: _categories(VideoCategory, 'videos', Video))
+
+
+def about_page():
+    """The AboutPage, or None if there isn't one yet."""
+    # Wrapped in a tuple so a missing page is cached too.
+    return _snapshot('about', 'about_page', lambda: (AboutPage.objects.first(),))[0]
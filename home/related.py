@@ -0,0 +1,324 @@
+# home/related.py
+"""
+Precomputed "related" lists for posts and videos.
+
+Similarity is TF-IDF cosine over each item's SearchDocument, which already
+holds the title, excerpt and content-block text. Titles count twice, and
+items in the same category get their score multiplied by CATEGORY_BOOST.
+Posts are only related to posts, and videos to videos. The top RELATED_LIMIT
+items for each source are stored as RelatedContent rows, so a detail page
+reads its list in one indexed query.
+
+Each item keeps only its TERMS_PER_ITEM heaviest terms, stored as
+RelatedTerm rows, and the IDF of every term is stored as TermIdf rows. The
+RelatedTerm rows double as an inverted index. A list's candidates are the
+CHAMPIONS_PER_TERM items that weigh each of its terms most (champion lists),
+ranked by the part of their score those terms give. Only the best RESCORED
+of them are scored in full. Work per list is bounded by the number of terms,
+not by the size of the corpus.
+
+When an item changes, `refresh_related` re-vectorizes that item alone, using
+the stored IDF, and recomputes its own list. It recomputes the lists it was
+in, and adds it in place to the lists it now belongs in, since none of their
+other scores changed. When an item is unpublished or deleted, its
+SearchDocument takes its rows in other lists with it, and the lists left with
+a gap in their ranks are recomputed. IDF drifts as items come and go.
+`rebuild_related` recomputes everything, IDF included, and is meant to run
+now and then (a nightly cron, or after a bulk import).
+"""
+
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, F, Max, Min
+
+from .models import Post, RelatedContent, RelatedTerm, SearchDocument, TermIdf, Video
+
+logger = logging.getLogger(__name__)
+
+RELATED_LIMIT = 6
+CATEGORY_BOOST = 1.5
+TERMS_PER_ITEM = 20
+CHAMPIONS_PER_TERM = 50
+RESCORED = 30
+MAX_TERM_LENGTH = 64
+WORD_RE = re.compile(r'[^\W\d_]{3,}')
+STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out day get has him his how man new now old
+    see two way who boy did its let put say she too use that with have this will your from they know want
+    been good much some time very when come here just like long make many more only over such take than
+    them well were what into about there their which would could these other after first also being where
+""".split())
+
+
+def _tokens(text):
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH
+    ]
+
+
+def _counts(title, body):
+    return Counter(_tokens(title) * 2 + _tokens(body))
+
+
+def _idf(total, documents):
+    return math.log((1 + total) / (1 + documents))
+
+
+def _vector(counts, idf):
+    """The TERMS_PER_ITEM heaviest terms of `counts`, L2-normalized; `idf` maps term to IDF."""
+    weights = [((1 + math.log(count)) * idf[term], term) for term, count in counts.items()]
+    top = [(weight, term) for weight, term in heapq.nlargest(TERMS_PER_ITEM, weights) if weight > 0]
+    norm = math.sqrt(sum(weight * weight for weight, _ in top)) or 1.0
+    return {term: weight / norm for weight, term in top}
+
+
+class Index:
+    """
+    Term vectors, champion lists, categories and SearchDocument ids for one
+    content type. During a rebuild everything is passed in; otherwise each
+    is read from the database the first time it's needed.
+    """
+
+    def __init__(self, model, vectors=None, categories=None, documents=None):
+        self.model = model
+        self.content_type = ContentType.objects.get_for_model(model)
+        self.complete = vectors is not None
+        self._vectors = vectors if vectors is not None else {}
+        self._categories = categories if categories is not None else {}
+        self._documents = documents if documents is not None else {}
+        self._champions = {}
+        if self.complete:
+            postings = defaultdict(list)
+            for object_id, vector in vectors.items():
+                for term, weight in vector.items():
+                    postings[term].append((weight, object_id))
+            self._champions = {
+                term: [(object_id, weight) for weight, object_id in heapq.nlargest(CHAMPIONS_PER_TERM, entries)]
+                for term, entries in postings.items()
+            }
+
+    def _missing(self, cache, object_ids):
+        return [] if self.complete else [object_id for object_id in object_ids if object_id not in cache]
+
+    def champions(self, term):
+        if term not in self._champions:
+            self._champions[term] = [] if self.complete else list(
+                RelatedTerm.objects.filter(content_type=self.content_type, term=term)
+                .order_by('-weight').values_list('object_id', 'weight')[:CHAMPIONS_PER_TERM]
+            )
+        return self._champions[term]
+
+    def vectors(self, object_ids):
+        missing = self._missing(self._vectors, object_ids)
+        if missing:
+            for object_id in missing:
+                self._vectors[object_id] = {}
+            for object_id, term, weight in RelatedTerm.objects.filter(
+                    content_type=self.content_type, object_id__in=missing).values_list('object_id', 'term', 'weight'):
+                self._vectors[object_id][term] = weight
+        return {object_id: self._vectors.get(object_id, {}) for object_id in object_ids}
+
+    def categories(self, object_ids):
+        missing = self._missing(self._categories, object_ids)
+        if missing:
+            self._categories.update(dict.fromkeys(missing))
+            self._categories.update(self.model.objects.filter(pk__in=missing).values_list('pk', 'category_id'))
+        return {object_id: self._categories.get(object_id) for object_id in object_ids}
+
+    def documents(self, object_ids):
+        """object_id: SearchDocument id, for the given items that have one."""
+        missing = self._missing(self._documents, object_ids)
+        if missing:
+            self._documents.update(dict.fromkeys(missing))
+            self._documents.update(SearchDocument.objects.filter(
+                content_type=self.content_type, object_id__in=missing).values_list('object_id', 'id'))
+        return {object_id: self._documents[object_id] for object_id in object_ids
+                if self._documents.get(object_id) is not None}
+
+    def set_vector(self, object_id, vector):
+        self._vectors[object_id] = vector
+        for term in vector:
+            self._champions.pop(term, None)
+
+    def score(self, a, b):
+        vectors = self.vectors([a, b])
+        first, second = vectors[a], vectors[b]
+        if len(first) > len(second):
+            first, second = second, first
+        similarity = sum(weight * second.get(term, 0.0) for term, weight in first.items())
+        categories = self.categories([a, b])
+        if categories[a] is not None and categories[a] == categories[b]:
+            similarity *= CATEGORY_BOOST
+        return similarity
+
+    def candidates(self, object_id):
+        """Items in the champion lists of `object_id`'s terms: the part of their score those terms give."""
+        partial = defaultdict(float)
+        for term, weight in self.vectors([object_id])[object_id].items():
+            for other, other_weight in self.champions(term):
+                partial[other] += weight * other_weight
+        partial.pop(object_id, None)
+        categories = self.categories([object_id, *partial])
+        if categories[object_id] is not None:
+            for other in partial:
+                if categories[other] == categories[object_id]:
+                    partial[other] *= CATEGORY_BOOST
+        return partial
+
+    def top(self, object_id):
+        """[(score, object_id)] of the RELATED_LIMIT items most similar to `object_id`."""
+        partial = self.candidates(object_id)
+        shortlist = heapq.nlargest(RESCORED, partial, key=lambda other: (partial[other], -other))
+        vectors = self.vectors([object_id, *shortlist])
+        categories = self.categories([object_id, *shortlist])
+        vector, category = vectors[object_id], categories[object_id]
+        scored = []
+        for other in shortlist:
+            other_vector = vectors[other]
+            score = sum(weight * other_vector.get(term, 0.0) for term, weight in vector.items())
+            if category is not None and categories[other] == category:
+                score *= CATEGORY_BOOST
+            if score > 0:
+                scored.append((score, other))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:RELATED_LIMIT]
+
+    def rows(self, lists):
+        """RelatedContent rows for {object_id: [(score, object_id)]}, skipping items no longer indexed."""
+        documents = self.documents({target for entries in lists.values() for _, target in entries})
+        rows = []
+        for object_id, entries in lists.items():
+            entries = [(score, target) for score, target in entries if target in documents]
+            rows += [
+                RelatedContent(content_type=self.content_type, object_id=object_id,
+                               target_id=documents[target], score=score, rank=rank)
+                for rank, (score, target) in enumerate(entries)
+            ]
+        return rows
+
+    def write(self, lists):
+        with transaction.atomic():
+            RelatedContent.objects.filter(content_type=self.content_type, object_id__in=list(lists)).delete()
+            RelatedContent.objects.bulk_create(self.rows(lists))
+
+
+def _term_rows(content_type, object_id, vector):
+    return [RelatedTerm(content_type=content_type, object_id=object_id, term=term, weight=weight)
+            for term, weight in vector.items()]
+
+
+def _rebuild(model):
+    content_type = ContentType.objects.get_for_model(model)
+    documents = SearchDocument.objects.filter(content_type=content_type)
+
+    # Two passes over the text, so only the short vectors are held in memory.
+    document_frequency, total = Counter(), 0
+    for title, body in documents.values_list('title', 'body').iterator(chunk_size=2000):
+        document_frequency.update(set(_tokens(title) + _tokens(body)))
+        total += 1
+    idf = {term: _idf(total, count) for term, count in document_frequency.items()}
+    vectors = {
+        object_id: _vector(_counts(title, body), idf)
+        for object_id, title, body in documents.values_list('object_id', 'title', 'body').iterator(chunk_size=2000)
+    }
+
+    index = Index(
+        model, vectors,
+        categories=dict(model.objects.filter(pk__in=list(vectors)).values_list('pk', 'category_id')),
+        documents=dict(documents.values_list('object_id', 'id')),
+    )
+    lists = {object_id: index.top(object_id) for object_id in vectors}
+
+    with transaction.atomic():
+        TermIdf.objects.filter(content_type=content_type).delete()
+        TermIdf.objects.bulk_create(
+            [TermIdf(content_type=content_type, term=term, idf=value) for term, value in idf.items()],
+            batch_size=2000,
+        )
+        RelatedTerm.objects.filter(content_type=content_type).delete()
+        RelatedTerm.objects.bulk_create(
+            [row for object_id, vector in vectors.items() for row in _term_rows(content_type, object_id, vector)],
+            batch_size=2000,
+        )
+        RelatedContent.objects.filter(content_type=content_type).delete()
+        RelatedContent.objects.bulk_create(index.rows(lists), batch_size=2000)
+
+
+def rebuild_related():
+    """Recomputes every term vector, IDF and related list. Returns the number of rows written."""
+    for model in (Post, Video):
+        _rebuild(model)
+    return RelatedContent.objects.count()
+
+
+def _broken_lists(content_type):
+    """Lists that lost an entry other than their last one (its SearchDocument was deleted)."""
+    return set(
+        RelatedContent.objects.filter(content_type=content_type).values('object_id')
+        .annotate(entries=Count('id'), last=Max('rank')).filter(entries__lte=F('last'))
+        .values_list('object_id', flat=True)
+    )
+
+
+def _stored_vector(content_type, document):
+    counts = _counts(document.title, document.body)
+    idf = dict(TermIdf.objects.filter(content_type=content_type, term__in=list(counts)).values_list('term', 'idf'))
+    # A term no item had at the last rebuild is in this item alone.
+    unseen = _idf(SearchDocument.objects.filter(content_type=content_type).count(), 1)
+    return _vector(counts, {term: idf.get(term, unseen) for term in counts})
+
+
+def refresh_related(model, pk):
+    """
+    Recomputes the related list of one changed Post or Video, and updates
+    the lists of other items it enters, leaves or no longer fits in.
+    Returns the number of lists written.
+    """
+    index = Index(model)
+    content_type = index.content_type
+    document = SearchDocument.objects.filter(content_type=content_type, object_id=pk).first()
+
+    with transaction.atomic():
+        RelatedTerm.objects.filter(content_type=content_type, object_id=pk).delete()
+        if document is None:
+            # Unpublished or deleted: rows pointing at it went with its SearchDocument.
+            RelatedContent.objects.filter(content_type=content_type, object_id=pk).delete()
+            index.set_vector(pk, {})
+            lists = {object_id: index.top(object_id) for object_id in _broken_lists(content_type)}
+        else:
+            vector = _stored_vector(content_type, document)
+            RelatedTerm.objects.bulk_create(_term_rows(content_type, pk, vector))
+            index.set_vector(pk, vector)
+            lists = {pk: index.top(pk)}
+
+            # Lists it was in: its score changed, so they're recomputed in full.
+            containing = set(RelatedContent.objects.filter(content_type=content_type, target=document)
+                             .exclude(object_id=pk).values_list('object_id', flat=True))
+            for object_id in containing:
+                lists[object_id] = index.top(object_id)
+
+            # Lists it may enter: the other scores in them are unchanged, so it's merged in.
+            partial = index.candidates(pk)
+            current = defaultdict(list)
+            for object_id, score, target in RelatedContent.objects.filter(
+                    content_type=content_type, object_id__in=list(partial.keys() - containing)).values_list(
+                    'object_id', 'score', 'target__object_id'):
+                current[object_id].append((score, target))
+            index.vectors(list(partial))
+            for object_id in partial.keys() - containing:
+                score = index.score(object_id, pk)
+                entries = current[object_id]
+                if score > 0 and (len(entries) < RELATED_LIMIT or score > min(entries)[0]):
+                    entries = sorted(entries + [(score, pk)], key=lambda item: (-item[0], item[1]))
+                    lists[object_id] = entries[:RELATED_LIMIT]
+
+        index.write(lists)
+    logger.info(f"Refreshed related lists of {len(lists)} {model._meta.model_name}s after #{pk} changed.")
+    return len(lists)
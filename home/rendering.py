@@ -0,0 +1,40 @@
+# home/rendering.py
+"""
+Pre-rendered post bodies.
+
+A post's content blocks are rendered to one HTML fragment and stored on the
+Post with its word count, so blog_detail emits a single string instead of
+looping over the blocks and running `linebreaks` on every request. The
+fragment is refreshed after any block is saved or deleted (once per
+transaction) and after a block image's responsive variants are generated.
+"""
+
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .deferred import on_commit_once
+from .models import ContentBlock, Post
+
+TEXT_BLOCK_TYPES = ('rich_text', 'heading')
+
+
+def render_post_body(blocks):
+    """Returns (html, word_count) for an ordered sequence of content blocks."""
+    html = render_to_string('partials/post_body.html', {'blocks': blocks})
+    words = sum(len(block.content.split()) for block in blocks if block.block_type in TEXT_BLOCK_TYPES)
+    return html, words
+
+
+def refresh_post_body(post_id):
+    """Re-renders and stores a post's body. Returns the rendered HTML."""
+    blocks = list(ContentBlock.objects.filter(post_id=post_id).order_by('order'))
+    html, words = render_post_body(blocks)
+    now = timezone.now()
+    # A queryset update doesn't fire post_save, so this can't re-trigger itself.
+    # updated_at moves so the detail page's ETag changes with the body.
+    Post.objects.filter(pk=post_id).update(body_html=html, word_count=words, body_rendered_at=now, updated_at=now)
+    return html
+
+
+def schedule_post_body_refresh(post_id):
+    on_commit_once(refresh_post_body, post_id)
@@ -2,45 +2,66 @@
 
 import resend
 from django.core.mail.backends.base import BaseEmailBackend
-from django.conf import settings
+from .email_client import RESEND_BATCH_LIMIT, get_resend_client
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ResendEmailBackend(BaseEmailBackend):
+    """
+    Sends Django email messages through Resend's batch endpoint over the
+    shared keep-alive connection pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = None
+
     def open(self):
-        resend.api_key = settings.RESEND_API_KEY
+        if self.client is not None:
+            return False
+        self.client = get_resend_client()
         return True
 
     def close(self):
-        pass
+        # The pool is shared with the background tasks, so just let go of it.
+        self.client = None
+
+    def _build_params(self, msg):
+        params = {
+            "from": msg.from_email,
+            "to": msg.to,
+            "subject": msg.subject,
+            "text": msg.body,
+        }
+
+        # Attach HTML alternative if present
+        for content, mimetype in getattr(msg, 'alternatives', []):
+            if mimetype == 'text/html':
+                params["html"] = content
+                break
+        return params
 
     def send_messages(self, email_messages):
+        email_messages = [msg for msg in email_messages if msg.recipients()]
+        if not email_messages:
+            return 0
+
+        new_connection = self.open()
         sent = 0
-        resend.api_key = settings.RESEND_API_KEY
-
-        for msg in email_messages:
-            try:
-                # Build params
-                params = {
-                    "from": msg.from_email,
-                    "to": msg.to,
-                    "subject": msg.subject,
-                    "text": msg.body,
-                }
-
-                # Attach HTML alternative if present
-                for content, mimetype in getattr(msg, 'alternatives', []):
-                    if mimetype == 'text/html':
-                        params["html"] = content
-                        break
-
-                resend.Emails.send(params)
-                sent += 1
-                logger.info(f"Resend: email sent to {msg.to}")
-            except Exception as e:
-                logger.error(f"Resend error: {e}")
-                if not self.fail_silently:
-                    raise
-
-        return sent
\ No newline at end of file
+        try:
+            for start in range(0, len(email_messages), RESEND_BATCH_LIMIT):
+                batch = email_messages[start:start + RESEND_BATCH_LIMIT]
+                try:
+                    resend.Batch.send([self._build_params(msg) for msg in batch])
+                    sent += len(batch)
+                    logger.info(f"Resend: batch of {len(batch)} emails sent.")
+                except Exception as e:
+                    logger.error(f"Resend error: {e}")
+                    if not self.fail_silently:
+                        raise
+        finally:
+            if new_connection:
+                self.close()
+
+        return sent
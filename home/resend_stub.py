@@ -0,0 +1,121 @@
+# home/resend_stub.py
+"""
+A local stand-in for the Resend HTTP API, used by the tests and the email
+benchmarks. It accepts `POST /emails` and `POST /emails/batch`, keeps
+connections alive, and counts connections, requests and emails.
+
+    with ResendStub(latency=0.02) as stub:
+        resend.Emails.send({...})
+        stub.connections, stub.requests, stub.emails
+
+It also records each request's Idempotency-Key, and answers the requests
+numbered in `failing_requests` (counting from 1) with a 500, to exercise
+retries.
+
+The server runs on its own asyncio loop in a background thread, so it can
+hold many concurrent keep-alive connections without a thread per client.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import uuid
+
+import resend
+
+
+class ResendStub:
+    """Runs the stub server on a free local port and points the SDK at it."""
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.emails = 0
+        self.idempotency_keys = []
+        self.failing_requests = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._writers = set()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait()
+        self._previous_url = resend.api_url
+        resend.api_url = self.url
+        return self
+
+    def __exit__(self, *exc_info):
+        resend.api_url = self._previous_url
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self, started):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0, backlog=512)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            # Closing the transports hands each idle handler an EOF so it can finish.
+            for writer in self._writers:
+                writer.close()
+            self._loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(self._loop)))
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, response = self._respond(method, path.rstrip('/'), body, headers)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                content = json.dumps(response).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _respond(self, method, path, body, headers):
+        if method != 'POST' or path not in ('/emails', '/emails/batch'):
+            return '404 Not Found', {'statusCode': 404, 'name': 'not_found', 'message': 'Not found'}
+        payload = json.loads(body or b'null')
+        self.requests += 1
+        self.idempotency_keys.append(headers.get('idempotency-key'))
+        if self.requests in self.failing_requests:
+            return '500 Internal Server Error', {'statusCode': 500, 'name': 'application_error', 'message': 'Stub failure'}
+        if path == '/emails/batch':
+            self.emails += len(payload)
+            return '200 OK', {'data': [{'id': str(uuid.uuid4())} for _ in payload]}
+        self.emails += 1
+        return '200 OK', {'id': str(uuid.uuid4())}
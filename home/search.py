@@ -0,0 +1,202 @@
+# home/search.py
+"""
+Full-text search over published posts (title, excerpt, content blocks) and
+videos (title, excerpt, description).
+
+Each indexed object has one SearchDocument row. On SQLite, triggers copy that
+row into an FTS5 table and results are ranked with bm25(). On PostgreSQL a
+generated tsvector column with a GIN index is ranked with ts_rank_cd(). Both
+are set up by migration 0015. Any other database falls back to icontains.
+
+Saves and deletes only queue the object (see deferred.py), so an admin save
+with a dozen inline content blocks reindexes the post once, after commit.
+"""
+
+import html
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.utils.safestring import mark_safe
+
+from .deferred import on_commit_once
+from .models import ContentBlock, Post, SearchDocument, Video
+
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+SNIPPET_WORDS = 24
+# Control characters can't appear in the indexed text or survive html.escape().
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+class SearchResult:
+    def __init__(self, document, rank, snippet):
+        self.document = document
+        self.rank = rank
+        self.snippet = snippet
+
+    @property
+    def kind(self):
+        return self.document.kind
+
+
+def _terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _highlight(snippet):
+    escaped = html.escape(snippet or '')
+    return mark_safe(escaped.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+# --- Indexing ---
+
+def _document_fields(obj):
+    if isinstance(obj, Post):
+        blocks = [block.content for block in obj.content_blocks.all() if block.content]
+        blocks += [block.caption for block in obj.content_blocks.all() if block.caption]
+        body = '\n'.join([obj.excerpt, *blocks])
+    else:
+        body = '\n'.join(filter(None, [obj.excerpt, obj.description]))
+    return {
+        'title': obj.title,
+        'body': body,
+        'url': obj.get_absolute_url(),
+        'published_date': obj.published_date,
+    }
+
+
+def index_object(obj):
+    """Brings the SearchDocument for a Post or Video in line with the object."""
+    content_type = ContentType.objects.get_for_model(obj)
+    if not obj.is_published:
+        SearchDocument.objects.filter(content_type=content_type, object_id=obj.pk).delete()
+        return
+    SearchDocument.objects.update_or_create(
+        content_type=content_type, object_id=obj.pk, defaults=_document_fields(obj),
+    )
+
+
+def _reindex(model, pk):
+    queryset = model.objects.filter(pk=pk)
+    if model is Post:
+        queryset = queryset.prefetch_related('content_blocks')
+    obj = queryset.first()
+    if obj is None:
+        SearchDocument.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id=pk).delete()
+    else:
+        index_object(obj)
+
+
+def schedule_reindex(model, pk):
+    """Queues a Post or Video for reindexing after the current transaction commits."""
+    on_commit_once(_reindex, model, pk)
+
+
+def schedule_reindex_for(instance):
+    if isinstance(instance, ContentBlock):
+        schedule_reindex(Post, instance.post_id)
+    else:
+        schedule_reindex(type(instance), instance.pk)
+
+
+def rebuild_index(batch_size=500):
+    """Reindexes every post and video. Returns the number of documents."""
+    SearchDocument.objects.all().delete()
+    querysets = [
+        Post.objects.filter(is_published=True).prefetch_related('content_blocks'),
+        Video.objects.filter(is_published=True),
+    ]
+    for queryset in querysets:
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(content_type=content_type, object_id=obj.pk, **_document_fields(obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+    return SearchDocument.objects.count()
+
+
+# --- Querying ---
+
+def _sqlite_hits(terms, content_type_id, limit, offset):
+    # Every term is a \w+ run, so quoting it makes it a plain FTS5 string.
+    # Only the last term is a prefix match, since it may still be being typed.
+    match = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+    type_clause = 'AND d.content_type_id = %s' if content_type_id else ''
+    sql = f"""
+        SELECT d.id, -bm25(home_searchdocument_fts, 10.0, 1.0) AS rank,
+               snippet(home_searchdocument_fts, 1, %s, %s, '…', {SNIPPET_WORDS})
+        FROM home_searchdocument_fts
+        JOIN home_searchdocument d ON d.id = home_searchdocument_fts.rowid
+        WHERE home_searchdocument_fts MATCH %s {type_clause}
+        ORDER BY bm25(home_searchdocument_fts, 10.0, 1.0), d.published_date DESC
+        LIMIT %s OFFSET %s
+    """
+    params = [MARK_START, MARK_END, match, *([content_type_id] if content_type_id else []), limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _postgres_hits(terms, content_type_id, limit, offset):
+    tsquery = ' & '.join([*terms[:-1], f'{terms[-1]}:*'])
+    type_clause = 'AND d.content_type_id = %s' if content_type_id else ''
+    # ts_headline is slow, so it only runs on the page of hits.
+    sql = f"""
+        SELECT id, rank, ts_headline('english', body, query, %s)
+        FROM (
+            SELECT d.id, d.body, d.published_date, q.query, ts_rank_cd(d.search_vector, q.query) AS rank
+            FROM home_searchdocument d, to_tsquery('english', %s) AS q(query)
+            WHERE d.search_vector @@ q.query {type_clause}
+            ORDER BY rank DESC, d.published_date DESC
+            LIMIT %s OFFSET %s
+        ) hits
+        ORDER BY rank DESC, published_date DESC
+    """
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=10, MaxFragments=1'
+    params = [options, tsquery, *([content_type_id] if content_type_id else []), limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _fallback_hits(terms, content_type_id, limit, offset):
+    queryset = SearchDocument.objects.order_by('-published_date')
+    if content_type_id:
+        queryset = queryset.filter(content_type_id=content_type_id)
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    rows = queryset.values_list('id', 'body')[offset:offset + limit]
+    return [(pk, 0.0, ' '.join(body.split()[:SNIPPET_WORDS])) for pk, body in rows]
+
+
+BACKENDS = {
+    'sqlite': _sqlite_hits,
+    'postgresql': _postgres_hits,
+}
+
+
+def search(query, model=None, limit=10, offset=0):
+    """
+    Ranked results for `query`, optionally limited to Post or Video.
+    Returns (results, has_next).
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], False
+
+    content_type_id = ContentType.objects.get_for_model(model).id if model else None
+    hits = BACKENDS.get(connection.vendor, _fallback_hits)(terms, content_type_id, limit + 1, offset)
+    has_next = len(hits) > limit
+    hits = hits[:limit]
+
+    documents = SearchDocument.objects.select_related('content_type').in_bulk([pk for pk, _, _ in hits])
+    results = [
+        SearchResult(documents[pk], rank, _highlight(snippet))
+        for pk, rank, snippet in hits if pk in documents
+    ]
+    return results, has_next
@@ -0,0 +1,174 @@
+# home/seeding.py
+"""
+Deterministic synthetic data for development and load testing.
+
+Everything is written with bulk_create in batches and generated from one
+random.Random(seed), so the same arguments always give the same titles,
+slugs, dates and emails. Rows are generated batch by batch, never as one
+list, so a million subscribers take no more memory than a thousand.
+
+bulk_create skips save() and signals. The seeder therefore fills in what
+those would have set: slugs, spread-out published dates, and new listing
+cache versions. It doesn't index the posts for search or render their
+bodies; blog_detail renders a body on first view, and populate_db runs
+`rebuild_index` once everything is written.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .caching import bump_listing_version
+from .models import AboutPage, ContentBlock, Post, PostCategory, Subscriber, Video, VideoCategory
+
+WORDS = """
+    light frame shadow colour portrait street morning travel story lens studio film city river mountain
+    quiet journey season window market festival harbour forest desert evening rain village craft edit
+    archive moment detail texture silence memory colour grain focus horizon coast bridge temple garden
+    workshop print darkroom exposure composition people culture road night north south island valley
+""".split()
+YOUTUBE_URLS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?v=3JZ_D3ELwOQ',
+    'https://www.youtube.com/watch?v=C0DPdy98e4c',
+]
+EMAIL_DOMAINS = ['example.com', 'example.org', 'example.net', 'mail.example.com']
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Lets bulk_create keep the published_date/updated_at values we set instead of now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    def __init__(self, seed=1, batch_size=2000, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def words(self, count):
+        return ' '.join(self.rng.choices(WORDS, k=count))
+
+    def sentence(self, count):
+        return self.words(count).capitalize() + '.'
+
+    def paragraph(self, sentences):
+        return ' '.join(self.sentence(self.rng.randint(8, 16)) for _ in range(sentences))
+
+    def _published_date(self, i, total, span_days):
+        # Newest last, so ids and dates grow together like real content.
+        offset = timedelta(days=span_days) * (1 - (i + 1) / total)
+        return self.now - offset - timedelta(seconds=self.rng.randint(0, 3600))
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def categories(self, post_count=5, video_count=3):
+        post_categories = PostCategory.objects.bulk_create([
+            PostCategory(name=f"{word.capitalize()} {i}", slug=f"{word}-{i}", description=self.sentence(8))
+            for i, word in enumerate(self.rng.sample(WORDS, post_count))
+        ])
+        video_categories = VideoCategory.objects.bulk_create([
+            VideoCategory(name=f"{word.capitalize()} Videos {i}", slug=f"{word}-videos-{i}", description=self.sentence(8))
+            for i, word in enumerate(self.rng.sample(WORDS, video_count))
+        ])
+        return post_categories, video_categories
+
+    def posts(self, total, categories, blocks_per_post=3, span_days=3650):
+        category_ids = [category.pk for category in categories]
+        created = 0
+        with explicit_timestamps(Post):
+            for batch in self._batches(total):
+                posts = []
+                for i in batch:
+                    title = self.sentence(self.rng.randint(4, 9)).rstrip('.')
+                    published = self._published_date(i, total, span_days)
+                    posts.append(Post(
+                        title=title, slug=f"{slugify(title)[:180]}-{i}", excerpt=self.paragraph(2),
+                        category_id=self.rng.choice(category_ids), published_date=published, updated_at=published,
+                        is_published=self.rng.random() < 0.9, is_featured=self.rng.random() < 0.1,
+                    ))
+                # SQLite and PostgreSQL both set the new ids, which the blocks need.
+                Post.objects.bulk_create(posts)
+                ContentBlock.objects.bulk_create([
+                    block for post in posts for block in self._blocks(post, blocks_per_post)
+                ])
+                created += len(posts)
+                self.log(f"  posts: {created}/{total}")
+        bump_listing_version('blog')
+        return created
+
+    def _blocks(self, post, count):
+        for order in range(1, count + 1):
+            if order == 1:
+                yield ContentBlock(post=post, order=order, block_type='heading', content=self.sentence(4))
+            elif order % 3 == 0:
+                yield ContentBlock(post=post, order=order, block_type='image', caption=self.sentence(8))
+            else:
+                content = ''.join(f"<p>{self.paragraph(4)}</p>" for _ in range(2))
+                yield ContentBlock(post=post, order=order, block_type='rich_text', content=content)
+
+    def videos(self, total, categories, span_days=3650):
+        category_ids = [category.pk for category in categories]
+        created = 0
+        with explicit_timestamps(Video):
+            for batch in self._batches(total):
+                videos = []
+                for i in batch:
+                    title = self.sentence(self.rng.randint(3, 8)).rstrip('.')
+                    published = self._published_date(i, total, span_days)
+                    videos.append(Video(
+                        title=title, slug=f"{slugify(title)[:180]}-{i}", excerpt=self.paragraph(1),
+                        description=self.paragraph(3), video_url=self.rng.choice(YOUTUBE_URLS),
+                        category_id=self.rng.choice(category_ids), published_date=published, updated_at=published,
+                        is_published=self.rng.random() < 0.9, is_featured=self.rng.random() < 0.1,
+                    ))
+                Video.objects.bulk_create(videos)
+                created += len(videos)
+                self.log(f"  videos: {created}/{total}")
+        bump_listing_version('video')
+        return created
+
+    def subscribers(self, total):
+        created = 0
+        with explicit_timestamps(Subscriber):
+            for batch in self._batches(total):
+                Subscriber.objects.bulk_create([
+                    Subscriber(
+                        email=f"{self.rng.choice(WORDS)}.{self.rng.choice(WORDS)}{i}@{self.rng.choice(EMAIL_DOMAINS)}",
+                        is_active=self.rng.random() < 2 / 3,
+                        subscribed_at=self.now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 365 * 3)),
+                    )
+                    for i in batch
+                ], ignore_conflicts=True)
+                created += len(batch)
+                if created % (self.batch_size * 50) == 0 or created == total:
+                    self.log(f"  subscribers: {created}/{total}")
+        return created
+
+    def about_page(self):
+        AboutPage.objects.get_or_create(
+            title="About Me",
+            defaults={
+                'subtitle': self.sentence(8),
+                'content': f"<h2>{self.sentence(6)}</h2><p>{self.paragraph(10)}</p>",
+            },
+        )
+        bump_listing_version('about')
@@ -0,0 +1,88 @@
+# home/signals.py
+
+from background_task.signals import task_created
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .caching import bump_listing_version
+from .deferred import on_commit_once
+from .images import IMAGE_FIELDS
+from .rendering import schedule_post_body_refresh
+from .search import schedule_reindex_for
+from .task_wakeup import notify_task_queued
+from .models import AboutPage, ContentBlock, Post, PostCategory, Video, VideoCategory
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=PostCategory)
+def invalidate_blog_listing(sender, **kwargs):
+    bump_listing_version('blog')
+
+
+@receiver([post_save, post_delete], sender=Video)
+@receiver([post_save, post_delete], sender=VideoCategory)
+def invalidate_video_listing(sender, **kwargs):
+    bump_listing_version('video')
+
+
+@receiver([post_save, post_delete], sender=AboutPage)
+def invalidate_about(sender, **kwargs):
+    bump_listing_version('about')
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=ContentBlock)
+@receiver([post_save, post_delete], sender=Video)
+def update_search_index(sender, instance, **kwargs):
+    from .tasks import refresh_related_content_task
+
+    schedule_reindex_for(instance)
+    # Queued after the reindex, so the task sees the updated SearchDocument.
+    model = Post if sender is ContentBlock else sender
+    pk = instance.post_id if sender is ContentBlock else instance.pk
+    on_commit_once(refresh_related_content_task, model._meta.label, pk)
+
+@receiver([post_save, post_delete], sender=ContentBlock)
+def invalidate_post_body(sender, instance, **kwargs):
+    schedule_post_body_refresh(instance.post_id)
+
+
+def _image_field_names(model):
+    return [field_name for label, field_name in IMAGE_FIELDS if label == model._meta.label]
+
+
+def _image_name(instance, field_name):
+    # Read from __dict__ so a deferred image field isn't fetched just for this.
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=ContentBlock)
+@receiver(post_init, sender=Video)
+@receiver(post_init, sender=AboutPage)
+def remember_image_names(sender, instance, **kwargs):
+    instance._image_names = {name: _image_name(instance, name) for name in _image_field_names(sender)}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ContentBlock)
+@receiver(post_save, sender=Video)
+@receiver(post_save, sender=AboutPage)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Generates responsive variants in the background whenever an image is uploaded or replaced."""
+    from .tasks import generate_image_derivatives_task
+
+    for field_name in _image_field_names(sender):
+        name = _image_name(instance, field_name)
+        if name and name != instance._image_names.get(field_name):
+            transaction.on_commit(
+                lambda field_name=field_name: generate_image_derivatives_task(sender._meta.label, instance.pk, field_name)
+            )
+    remember_image_names(sender, instance)
+
+
+@receiver(task_created)
+def wake_task_workers(sender, task, **kwargs):
+    notify_task_queued(task.queue)
@@ -0,0 +1,145 @@
+# home/signups.py
+"""
+Newsletter signups: rate limits and coalesced writes for views.subscribe.
+
+Rate limits are fixed-window counters in the cache, one per client IP and
+one for the whole site, shared by every Gunicorn worker. The default file
+cache increments with a read and a write, so a burst can slip a few
+requests past a limit; set REDIS_URL for exact counts.
+
+Accepted addresses are not written one request at a time. They go into the
+process's SignupBuffer, which is flushed when it holds SUBSCRIBE_BATCH_SIZE
+addresses or when the oldest has waited SUBSCRIBE_FLUSH_INTERVAL seconds.
+A flush is one transaction: a read of which addresses already exist, one
+bulk_create(ignore_conflicts=True), and one welcome-email task for the new
+ones. A burst of signups costs a few writes instead of two per request.
+The buffer is flushed at interpreter exit, so a graceful Gunicorn restart
+keeps it. A crashed worker loses at most one flush interval of signups.
+SUBSCRIBE_FLUSH_INTERVAL = 0 writes each signup during its request.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from .models import Subscriber
+
+logger = logging.getLogger(__name__)
+
+
+# --- Rate limiting ---
+
+def client_ip(request):
+    """
+    The client's address. Behind TRUSTED_PROXY_COUNT proxies it is that many
+    entries from the right of X-Forwarded-For, since entries further left are
+    whatever the client sent.
+    """
+    hops = settings.TRUSTED_PROXY_COUNT
+    forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _over_limit(name, limit, window):
+    window_start = int(time.time() // window)
+    key = f"ratelimit:{name}:{window_start}"
+    # add() is a no-op if the counter exists, and incr() is atomic on Redis and memcached.
+    cache.add(key, 0, window + 1)
+    try:
+        return cache.incr(key) > limit
+    except ValueError:  # Expired between add() and incr().
+        cache.set(key, 1, window + 1)
+        return False
+
+
+def signup_rate_limited(request):
+    """Counts this request against the per-IP and site-wide limits. True if either is exceeded."""
+    window = settings.SUBSCRIBE_RATE_WINDOW
+    return (
+        _over_limit(f"subscribe:ip:{client_ip(request)}", settings.SUBSCRIBE_RATE_LIMIT_PER_IP, window)
+        or _over_limit("subscribe:all", settings.SUBSCRIBE_RATE_LIMIT_GLOBAL, window)
+    )
+
+
+# --- Coalesced writes ---
+
+def save_signups(emails):
+    """Subscribes `emails` and queues one welcome task for those that are new. Returns the new ones."""
+    from .tasks import send_welcome_emails_task
+
+    with transaction.atomic():
+        existing = set(Subscriber.objects.filter(email__in=emails).values_list('email', flat=True))
+        new = [email for email in emails if email not in existing]
+        if new:
+            Subscriber.objects.bulk_create([Subscriber(email=email) for email in new], ignore_conflicts=True)
+            send_welcome_emails_task(new)
+    logger.info(f"Saved {len(new)} new subscribers from a batch of {len(emails)} signups.")
+    return new
+
+
+class SignupBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def __contains__(self, email):
+        return email in self._pending
+
+    def add(self, email):
+        """Queues an address. Returns False if it is already waiting to be saved."""
+        if settings.SUBSCRIBE_FLUSH_INTERVAL <= 0:
+            return bool(save_signups([email]))
+        with self._lock:
+            if email in self._pending:
+                return False
+            self._pending[email] = None
+            full = len(self._pending) >= settings.SUBSCRIBE_BATCH_SIZE
+            if not full:
+                self._schedule_flush()
+        if full:
+            self.flush()
+        return True
+
+    def flush(self):
+        with self._lock:
+            emails = list(self._pending)
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not emails:
+            return
+        try:
+            save_signups(emails)
+        except Exception as e:
+            logger.error(f"Could not save {len(emails)} signups, keeping them for the next flush: {e}")
+            with self._lock:
+                for email in emails:
+                    self._pending.setdefault(email, None)
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Called with the lock held.
+        if self._timer is None:
+            self._timer = threading.Timer(settings.SUBSCRIBE_FLUSH_INTERVAL, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own database connection.
+            connections.close_all()
+
+
+signup_buffer = SignupBuffer()
+atexit.register(signup_buffer.flush)
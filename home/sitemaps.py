@@ -0,0 +1,154 @@
+# home/sitemaps.py
+"""
+Streamed, cached sitemap.xml.
+
+Up to SITEMAP_LIMIT URLs are served as one <urlset>. Past that, sitemap.xml
+becomes a <sitemapindex> pointing at /sitemap-<section>.xml?p=N pages of at
+most SITEMAP_LIMIT URLs each. Rows are read with .iterator() and written out
+in batches, so a large sitemap never sits in memory as model instances.
+The output is cached until the next blog, video or about change (see
+caching.py).
+"""
+
+import math
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .caching import cache_while_streaming, versioned_key
+from .models import AboutPage, Post, PostCategory, Video, VideoCategory
+
+SITEMAP_LIMIT = 50_000
+NAMESPACES = ('blog', 'video', 'about')
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+BATCH_SIZE = 1000
+
+
+class Section:
+    """One group of URLs, built from (key, lastmod) rows of a queryset."""
+
+    def __init__(self, name, queryset, url):
+        self.name = name
+        self.queryset = queryset
+        self.url = url
+
+    def count(self):
+        return self.queryset.count()
+
+    def entries(self, start=0, stop=None):
+        for key, lastmod in self.queryset[start:stop].iterator(chunk_size=2000):
+            yield self.url(key), lastmod
+
+
+class PagesSection:
+    """The fixed pages. There are only a handful, so no pagination."""
+    name = 'pages'
+
+    def _pages(self):
+        about = AboutPage.objects.aggregate(lastmod=Max('updated_at'))['lastmod']
+        return [
+            (reverse('home'), None),
+            (reverse('blog_list'), Post.objects.filter(is_published=True).aggregate(lastmod=Max('updated_at'))['lastmod']),
+            (reverse('video_list'), Video.objects.filter(is_published=True).aggregate(lastmod=Max('updated_at'))['lastmod']),
+            (reverse('about_detail'), about),
+        ]
+
+    def count(self):
+        return 4
+
+    def entries(self, start=0, stop=None):
+        return iter(self._pages()[start:stop])
+
+
+def _url_pattern(name):
+    # reverse() once, then substitute each slug: reversing 50k times is slow.
+    template = reverse(name, args=['__slug__'])
+    return lambda slug: template.replace('__slug__', slug)
+
+
+def sections():
+    post_url = _url_pattern('blog_detail')
+    video_url = _url_pattern('video_detail')
+    published_posts = Q(posts__is_published=True)
+    published_videos = Q(videos__is_published=True)
+    return [
+        PagesSection(),
+        Section('posts', Post.objects.filter(is_published=True).order_by('id').values_list('slug', 'updated_at'), post_url),
+        Section('videos', Video.objects.filter(is_published=True).order_by('id').values_list('slug', 'updated_at'), video_url),
+        Section(
+            'post-categories',
+            PostCategory.objects.annotate(lastmod=Max('posts__updated_at', filter=published_posts))
+            .filter(lastmod__isnull=False).order_by('id').values_list('slug', 'lastmod'),
+            lambda slug: f"{reverse('blog_list')}?category={slug}",
+        ),
+        Section(
+            'video-categories',
+            VideoCategory.objects.annotate(lastmod=Max('videos__updated_at', filter=published_videos))
+            .filter(lastmod__isnull=False).order_by('id').values_list('slug', 'lastmod'),
+            lambda slug: f"{reverse('video_list')}?category={slug}",
+        ),
+    ]
+
+
+def _absolute(path):
+    return escape(f"{settings.SITE_DOMAIN.rstrip('/')}{path}")
+
+
+def _urlset(entries):
+    yield XML_DECLARATION + '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    batch = []
+    for path, lastmod in entries:
+        lastmod_tag = f"<lastmod>{lastmod.isoformat(timespec='seconds')}</lastmod>" if lastmod else ''
+        batch.append(f"<url><loc>{_absolute(path)}</loc>{lastmod_tag}</url>\n")
+        if len(batch) >= BATCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    yield ''.join(batch) + '</urlset>\n'
+
+
+def _sitemap_index(counts):
+    yield XML_DECLARATION + '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for name, count in counts:
+        for page in range(1, math.ceil(count / SITEMAP_LIMIT) + 1):
+            path = reverse('sitemap_section', args=[name]) + (f"?p={page}" if page > 1 else '')
+            yield f"<sitemap><loc>{_absolute(path)}</loc></sitemap>\n"
+    yield '</sitemapindex>\n'
+
+
+def _streamed(request, build):
+    key = versioned_key('sitemap', NAMESPACES, request)
+    cached = cache.get(key)
+    if cached is not None:
+        return HttpResponse(cached, content_type=CONTENT_TYPE)
+    return StreamingHttpResponse(cache_while_streaming(key, build()), content_type=CONTENT_TYPE)
+
+
+def sitemap(request):
+    def build():
+        all_sections = sections()
+        counts = [(section.name, section.count()) for section in all_sections]
+        if sum(count for _, count in counts) <= SITEMAP_LIMIT:
+            return _urlset(entry for section in all_sections for entry in section.entries())
+        return _sitemap_index([(name, count) for name, count in counts if count])
+    return _streamed(request, build)
+
+
+def sitemap_section(request, section):
+    matches = [candidate for candidate in sections() if candidate.name == section]
+    try:
+        page = int(request.GET.get('p', 1))
+    except ValueError:
+        raise Http404("Invalid sitemap page.")
+    if not matches or page < 1:
+        raise Http404("No such sitemap.")
+
+    section = matches[0]
+    start = (page - 1) * SITEMAP_LIMIT
+    if page > 1 and start >= section.count():
+        raise Http404("No such sitemap page.")
+    return _streamed(request, lambda: _urlset(section.entries(start, start + SITEMAP_LIMIT)))
@@ -0,0 +1,172 @@
+# home/static_images.py
+"""
+Optimized variants of the images in static/images.
+
+`manage.py optimize_static_images` writes AVIF and WebP copies of every
+image at the IMAGE_DERIVATIVE_WIDTHS, plus a JPEG (or PNG, if the image has
+transparency) fallback, to static/images/optimized/. It also writes the
+favicon sizes browsers and phones ask for; the favicon source itself gets
+no other variants. Everything it wrote is recorded in
+static/images/optimized/manifest.json with the SHA-256 of each source and
+the widths and formats used, so a re-run only re-encodes images whose
+content, or those settings, changed. The output is committed with the
+sources, and collectstatic fingerprints it like any other static file.
+
+{% picture %} and {% favicon_links %} read the manifest. For an image that
+isn't in it they link the original.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from PIL import Image
+
+from .images import FORMATS, encode_image, enabled_formats, load_image
+
+SOURCE_DIR = 'images'
+OUTPUT_DIR = 'images/optimized'
+MANIFEST = f'{OUTPUT_DIR}/manifest.json'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+FAVICON_SOURCE = 'images/ss-icon.png'
+# file name: square size in pixels.
+FAVICON_PNGS = {'favicon-32.png': 32, 'apple-touch-icon.png': 180, 'icon-192.png': 192, 'icon-512.png': 512}
+FAVICON_ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+
+
+def _sha256(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _has_transparency(image):
+    return image.mode == 'RGBA' and image.getextrema()[3][0] < 255
+
+
+class StaticImageOptimizer:
+    def __init__(self, static_dir, force=False, log=None):
+        self.static_dir = Path(static_dir)
+        self.force = force
+        self.log = log or (lambda message: None)
+        manifest_path = self.static_dir / MANIFEST
+        self.previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        self.options = {
+            'widths': sorted(set(settings.IMAGE_DERIVATIVE_WIDTHS)),
+            'formats': [fmt for fmt in enabled_formats() if fmt in ('avif', 'webp')],
+        }
+
+    def sources(self):
+        for path in sorted((self.static_dir / SOURCE_DIR).rglob('*')):
+            name = path.relative_to(self.static_dir).as_posix()
+            if (path.suffix.lower() in IMAGE_EXTENSIONS and not name.startswith(f'{OUTPUT_DIR}/')
+                    and name != FAVICON_SOURCE):
+                yield name, path
+
+    def _up_to_date(self, entry, digest):
+        return (not self.force and entry and entry['sha256'] == digest
+                and all((self.static_dir / name).exists() for name in entry['files']))
+
+    def _remove(self, entry):
+        for name in entry.get('files', []):
+            (self.static_dir / name).unlink(missing_ok=True)
+
+    def _save(self, name, content):
+        path = self.static_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return name
+
+    def run(self):
+        """Brings the output in line with the sources. Returns (processed, unchanged, removed) counts."""
+        images, processed, unchanged = {}, 0, 0
+        previous_images = self.previous.get('images', {})
+        same_options = self.previous.get('options') == self.options
+        for name, path in self.sources():
+            digest = _sha256(path)
+            entry = previous_images.get(name)
+            if same_options and self._up_to_date(entry, digest):
+                images[name] = entry
+                unchanged += 1
+                continue
+            if entry:
+                self._remove(entry)
+            images[name] = self._variants(name, path, digest)
+            processed += 1
+
+        removed = [name for name in previous_images if name not in images]
+        for name in removed:
+            self._remove(previous_images[name])
+
+        favicons = self.previous.get('favicons')
+        favicon_path = self.static_dir / FAVICON_SOURCE
+        if favicon_path.exists() and not self._up_to_date(favicons, _sha256(favicon_path)):
+            if favicons:
+                self._remove(favicons)
+            favicons = self._favicons(favicon_path)
+            processed += 1
+
+        manifest = {'options': self.options, 'images': images, 'favicons': favicons}
+        self._save(MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode())
+        return processed, unchanged, len(removed)
+
+    def _variants(self, name, path, digest):
+        with path.open('rb') as fh:
+            original = load_image(fh)
+        fallback = 'png' if _has_transparency(original) else 'jpeg'
+        formats = self.options['formats'] + [fallback]
+        widths = sorted({min(width, original.width) for width in self.options['widths']})
+        stem = f"{OUTPUT_DIR}/{Path(name).relative_to(SOURCE_DIR).with_suffix('').as_posix()}"
+
+        entry = {'sha256': digest, 'width': original.width, 'height': original.height,
+                 'fallback': fallback, 'formats': {}, 'files': []}
+        for width in widths:
+            height = round(original.height * width / original.width)
+            resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                variant = self._save(f"{stem}.{width}w.{FORMATS[fmt]['ext']}", encode_image(resized, fmt))
+                entry['formats'].setdefault(fmt, []).append([width, variant])
+                entry['files'].append(variant)
+
+        smallest = min((self.static_dir / entry['formats'][fmt][-1][1]).stat().st_size for fmt in formats)
+        self.log(f"  {name}: {path.stat().st_size // 1024} KB -> {smallest // 1024} KB at {widths[-1]}px "
+                 f"({', '.join(formats)})")
+        return entry
+
+    def _favicons(self, path):
+        with path.open('rb') as fh:
+            icon = load_image(fh).convert('RGBA')
+        entry = {'sha256': _sha256(path), 'files': [], 'png': {}}
+        for file_name, size in FAVICON_PNGS.items():
+            buffer = BytesIO()
+            icon.resize((size, size), Image.LANCZOS).save(buffer, 'PNG', optimize=True)
+            name = self._save(f'{OUTPUT_DIR}/{file_name}', buffer.getvalue())
+            entry['png'][file_name] = name
+            entry['files'].append(name)
+        buffer = BytesIO()
+        icon.save(buffer, 'ICO', sizes=FAVICON_ICO_SIZES)
+        entry['ico'] = self._save(f'{OUTPUT_DIR}/favicon.ico', buffer.getvalue())
+        entry['files'].append(entry['ico'])
+        self.log(f"  {FAVICON_SOURCE}: favicon.ico and {len(FAVICON_PNGS)} PNG sizes")
+        return entry
+
+
+@lru_cache(maxsize=None)
+def manifest():
+    """The optimizer's manifest, read once per process. Empty until the command has run."""
+    path = finders.find(MANIFEST)
+    if not path:
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def static_image(name):
+    """The manifest entry for static image `name`, or None."""
+    return manifest().get('images', {}).get(name)
+
+
+def favicons():
+    return manifest().get('favicons')
@@ -0,0 +1,120 @@
+# home/storage.py
+
+import hashlib
+import logging
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import build_bundles
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Uploads stream into these before they are renamed to their hash.
+TEMP_PREFIX = '.upload-'
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[^./]+)?$')
+
+
+def blob_name(directory, digest, extension):
+    return posixpath.join(directory, f"{digest}{extension.lower()}")
+
+
+def is_blob_name(name):
+    """True for `<dir>/<sha256>.<ext>`, a name save_blob() gave."""
+    return bool(BLOB_NAME_RE.match(posixpath.basename(name)))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that can also store a file under the SHA-256 of its
+    content (save_blob). Identical uploads share one file, and a blob's name
+    never changes meaning, so it can be cached forever. save() is unchanged;
+    image derivatives and their manifests are written with it.
+
+    A blob may be referenced by several rows, so nothing deletes it when one
+    of them goes away; `manage.py gc_media` removes blobs no row references.
+    """
+
+    def save_blob(self, name, content, max_length=None):
+        """
+        Stores `content` as `<directory of name>/<sha256>.<ext>` and returns
+        that name. The content is hashed as it streams to disk; if the blob
+        already exists the copy is dropped instead of written again.
+        """
+        directory, extension = posixpath.dirname(name), posixpath.splitext(name)[1]
+        directory_path = self.path(directory)
+        os.makedirs(directory_path, exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Large uploads are already on disk: hash them there and move them into place.
+            temp_path, owned = content.temporary_file_path(), False
+            digest = file_sha256(temp_path)
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=directory_path, prefix=TEMP_PREFIX)
+            owned = True
+            sha256 = hashlib.sha256()
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    for chunk in content.chunks(CHUNK_SIZE):
+                        sha256.update(chunk)
+                        fh.write(chunk)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            digest = sha256.hexdigest()
+
+        stored = blob_name(directory, digest, extension)
+        if max_length is not None and len(stored) > max_length:
+            if owned:
+                os.unlink(temp_path)
+            raise SuspiciousFileOperation(f"Storage can not store {stored!r}: it is longer than {max_length} characters.")
+
+        path = self.path(stored)
+        if os.path.exists(path):
+            if owned:
+                os.unlink(temp_path)
+            logger.info(f"{name} is already stored as {stored}.")
+            return stored
+        if owned:
+            os.replace(temp_path, path)
+        else:
+            file_move_safe(temp_path, path)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return stored
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's fingerprinting and gzip/Brotli storage, plus the bundles
+    from home.assets, built before the collected files are hashed so they
+    are fingerprinted and compressed too.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = {**paths, **build_bundles(self, paths)}
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def stored_name(self, name):
+        # Without a manifest collectstatic hasn't run here (tests, a fresh
+        # checkout with DEBUG off), so link the files unhashed. With one, a
+        # file missing from it is an error, as in ManifestStaticFilesStorage.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
@@ -0,0 +1,149 @@
+# home/subscribers.py
+"""
+Bulk import and streaming export of subscriber lists.
+
+Imports read the CSV one row at a time and insert IMPORT_BATCH_SIZE rows per
+bulk_create(ignore_conflicts=True). Memory use doesn't grow with the file,
+and rows that are already subscribed are skipped by the unique index on the
+lower-cased email, not by a lookup, whatever case the stored address has.
+An existing subscriber is never changed. In particular, an import can't
+re-activate someone who unsubscribed.
+
+Exports stream CSV rows read with .iterator(), so they never hold the whole
+list either.
+"""
+
+import csv
+import io
+import logging
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from .models import Subscriber
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_HEADER = ('email', 'is_active', 'subscribed_at')
+# Invalid rows reported back by line number; the rest are only counted.
+MAX_REPORTED_ERRORS = 20
+EMAIL_MAX_LENGTH = Subscriber._meta.get_field('email').max_length
+FALSE_VALUES = frozenset({'0', 'false', 'no', 'n', 'f', 'inactive'})
+
+
+def normalize_email(value):
+    """Stripped, lower-cased address, or None if it isn't a valid email."""
+    email = (value or '').strip().lower()
+    if len(email) > EMAIL_MAX_LENGTH:
+        return None
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.invalid = 0
+        self.errors = []
+
+    @property
+    def skipped(self):
+        """Valid rows that were already subscribed, or repeated in the file."""
+        return self.rows - self.created - self.invalid
+
+    def add_error(self, line, value):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {value!r} is not a valid email")
+
+    def __str__(self):
+        return (f"{self.rows} rows: {self.created} subscribers added, "
+                f"{self.skipped} already subscribed, {self.invalid} invalid")
+
+
+def _columns(first_row):
+    """(email index, is_active index or None, whether first_row is a header)."""
+    header = [cell.strip().lower() for cell in first_row]
+    if 'email' in header:
+        return header.index('email'), header.index('is_active') if 'is_active' in header else None, True
+    return 0, None, False
+
+
+def _insert(batch):
+    Subscriber.objects.bulk_create(
+        [Subscriber(email=email, is_active=active) for email, active in batch.items()],
+        ignore_conflicts=True,
+    )
+
+
+def import_subscribers(stream):
+    """
+    Imports subscribers from a text stream of CSV. The email column is the
+    one headed `email`, or the first column if there's no header. An
+    optional `is_active` column (as written by the export) is honoured for
+    new subscribers.
+    """
+    result = ImportResult()
+    before = Subscriber.objects.count()
+    reader = csv.reader(stream)
+    email_index, active_index, has_header = None, None, False
+    batch = {}
+
+    for row in reader:
+        if email_index is None:
+            email_index, active_index, has_header = _columns(row)
+            if has_header:
+                continue
+        if not any(cell.strip() for cell in row):
+            continue
+        result.rows += 1
+        value = row[email_index] if email_index < len(row) else ''
+        email = normalize_email(value)
+        if email is None:
+            result.add_error(reader.line_num, value)
+            continue
+        active = True
+        if active_index is not None and active_index < len(row):
+            active = row[active_index].strip().lower() not in FALSE_VALUES
+        batch.setdefault(email, active)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _insert(batch)
+            batch = {}
+
+    if batch:
+        _insert(batch)
+    # ignore_conflicts doesn't report which rows went in, so count instead.
+    result.created = Subscriber.objects.count() - before
+    logger.info(f"Subscriber import: {result}.")
+    return result
+
+
+class _Echo:
+    """A file-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """Yields the CSV of `queryset`, header first, EXPORT_CHUNK_SIZE rows per chunk."""
+    writer = csv.writer(_Echo())
+    rows = queryset.order_by('id').values_list(*EXPORT_HEADER).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    chunk = [writer.writerow(EXPORT_HEADER)]
+    for email, is_active, subscribed_at in rows:
+        chunk.append(writer.writerow((email, 'true' if is_active else 'false', subscribed_at.isoformat())))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk)
+
+
+def open_text(binary_file):
+    """Wraps an uploaded or opened binary file as UTF-8 text (BOM tolerated)."""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
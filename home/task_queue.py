@@ -0,0 +1,237 @@
+# home/task_queue.py
+"""
+Prioritized, multi-worker runner for django-background-tasks.
+
+Tasks choose a lane with @background(queue=...):
+
+    'interactive'  contact and welcome emails, which someone is waiting for
+    'default'      derived data such as image variants and related lists
+    'bulk'         subscriber broadcasts, which can run for many minutes
+
+Tasks with no queue, or with an unknown one, belong to 'default'. A worker
+claims the oldest, highest-priority task in the first of its lanes that has
+one, so a waiting email is always taken before the next broadcast. Reserved
+workers serve only 'interactive', so an email still starts within one poll
+when every other worker is busy with a broadcast.
+
+On PostgreSQL (and any backend with SKIP LOCKED), a task is claimed with
+SELECT ... FOR UPDATE SKIP LOCKED, and concurrent workers never contend
+for a row. SQLite has no row locks. There the claim is a compare-and-set
+UPDATE on locked_by, and the loser moves on to the next candidate.
+
+Idle workers sleep until task_wakeup.py signals a newly queued task, the
+next delayed task falls due, or the fallback poll interval passes. Each run
+is recorded as a TaskRun row with its queue wait (claim time minus the time
+it became due) and run time; see `manage.py task_queue_stats`.
+
+Claimed tasks run through django-background-tasks' own runner, so retries,
+CompletedTask rows and signals behave as they do under process_tasks. A
+worker stopped mid-task (SIGKILL, or the shutdown grace period running out)
+leaves its task locked until MAX_RUN_TIME passes, then any worker retries it.
+"""
+
+import logging
+import os
+import signal
+import threading
+from datetime import timedelta
+
+from background_task.models import Task
+from background_task.settings import app_settings
+from background_task.tasks import bg_runner, tasks
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Case, IntegerField, Min, Q, Value, When
+from django.db.utils import InterfaceError, OperationalError
+from django.utils import timezone
+
+from .models import TaskRun
+from .task_wakeup import waiter_for
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = 'interactive'
+LANE_DEFAULT = 'default'
+LANE_BULK = 'bulk'
+LANES = (LANE_INTERACTIVE, LANE_DEFAULT, LANE_BULK)
+# Compare-and-set candidates tried per claim before giving up on SQLite.
+CLAIM_CANDIDATES = 5
+
+
+def _lane_filter(lane):
+    if lane == LANE_DEFAULT:
+        return Q(queue__isnull=True) | ~Q(queue__in=[LANE_INTERACTIVE, LANE_BULK])
+    return Q(queue=lane)
+
+
+def _lanes_filter(lanes):
+    lane_filter = Q()
+    for lane in lanes:
+        lane_filter |= _lane_filter(lane)
+    return lane_filter
+
+
+def _runnable(lanes, now):
+    return Task.objects.unlocked(now).filter(_lanes_filter(lanes), failed_at=None, task_name__in=list(tasks._tasks))
+
+
+def ready_tasks(lanes, now=None):
+    """Unlocked, due tasks in `lanes`, in the order they should be claimed."""
+    now = now or timezone.now()
+    lane_rank = Case(
+        *[When(_lane_filter(lane), then=Value(rank)) for rank, lane in enumerate(lanes)],
+        default=Value(len(lanes)), output_field=IntegerField(),
+    )
+    priority = f'{app_settings.BACKGROUND_TASK_PRIORITY_ORDERING}priority'
+    return (
+        _runnable(lanes, now).filter(run_at__lte=now)
+        .annotate(lane_rank=lane_rank)
+        .order_by('lane_rank', priority, 'run_at', 'id')
+    )
+
+
+def next_due(lanes):
+    """When the next delayed task in `lanes` falls due, or None."""
+    now = timezone.now()
+    return _runnable(lanes, now).filter(run_at__gt=now).aggregate(next_due=Min('run_at'))['next_due']
+
+
+def _claim_skip_locked(lanes, worker_name):
+    now = timezone.now()
+    with transaction.atomic():
+        task = ready_tasks(lanes, now).select_for_update(skip_locked=True).first()
+        if task is None:
+            return None
+        Task.objects.filter(pk=task.pk).update(locked_by=worker_name, locked_at=now)
+    task.locked_by, task.locked_at = worker_name, now
+    return task
+
+
+def _claim_compare_and_set(lanes, worker_name):
+    now = timezone.now()
+    for pk in ready_tasks(lanes, now).values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        if Task.objects.unlocked(now).filter(pk=pk).update(locked_by=worker_name, locked_at=now):
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def claim_next(lanes, worker_name):
+    """Locks and returns the next task for a worker serving `lanes`, or None."""
+    if connection.features.has_select_for_update_skip_locked:
+        return _claim_skip_locked(lanes, worker_name)
+    return _claim_compare_and_set(lanes, worker_name)
+
+
+class Worker:
+    """
+    Claims and runs tasks until `stop` is set. A running task is always
+    finished first; `stop` only ends the wait between polls.
+    """
+
+    def __init__(self, lanes, stop, poll_interval=1.0, burst=False):
+        self.lanes = lanes
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.processed = 0
+        self.waiter = None
+
+    @property
+    def name(self):
+        # The pid alone, so the admin's "locked by pid running" column works.
+        return str(os.getpid())
+
+    def run(self):
+        if not self.burst:
+            self.waiter = waiter_for(self.stop)
+        mode = 'wakeups' if self.waiter else f'{self.poll_interval}s polling'
+        logger.info(f"Worker {self.name} started on lanes {', '.join(self.lanes)} ({mode}).")
+        try:
+            while not self.stop.is_set():
+                if not self.run_next():
+                    if self.burst:
+                        break
+                    self.wait()
+        finally:
+            if self.waiter:
+                self.waiter.close()
+            connection.close()
+            logger.info(f"Worker {self.name} stopped after {self.processed} tasks.")
+
+    def wait(self):
+        if self.waiter is None:
+            self.stop.wait(self.poll_interval)
+            return
+        timeout = settings.TASK_WAKEUP_POLL_INTERVAL
+        try:
+            due = next_due(self.lanes)
+            if due is not None:
+                timeout = min(timeout, max((due - timezone.now()).total_seconds(), 0))
+            self.waiter.wait(timeout)
+        except (DatabaseError, OSError) as e:
+            # e.g. the LISTEN connection dropped: poll until a new waiter works.
+            logger.warning(f"Worker {self.name} lost its wakeup channel: {e}")
+            self.waiter.close()
+            self.waiter = None
+            self.stop.wait(self.poll_interval)
+            self.waiter = waiter_for(self.stop)
+
+    def run_next(self):
+        """Runs one task if one is ready. Returns whether it did."""
+        close_old_connections()
+        try:
+            task = claim_next(self.lanes, self.name)
+        except (OperationalError, InterfaceError) as e:
+            # SQLite "database is locked", or a dropped connection: try again next poll.
+            logger.warning(f"Worker {self.name} could not claim a task: {e}")
+            connection.close()
+            return False
+        if task is None:
+            return False
+
+        # A failed attempt moves run_at to its retry time, so keep the originals.
+        run = TaskRun(
+            task_name=task.task_name, queue=task.queue or LANE_DEFAULT, worker=self.name,
+            due_at=task.run_at, claimed_at=task.locked_at,
+        )
+        logger.info(f"Worker {self.name} running {task} (lane {run.queue}, waited {run.wait.total_seconds():.2f}s).")
+        bg_runner(tasks._tasks[task.task_name], task)
+        self.processed += 1
+        run.finished_at = timezone.now()
+        self.record(run, task)
+        return True
+
+    def record(self, run, task):
+        try:
+            run.save()
+        except DatabaseError as e:
+            logger.warning(f"Could not record run of {task}: {e}")
+
+
+def prune_task_runs():
+    """Deletes TaskRun rows older than TASK_METRICS_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=settings.TASK_METRICS_RETENTION_DAYS)
+    return TaskRun.objects.filter(claimed_at__lt=cutoff).delete()[0]
+
+
+def worker_lanes(index, reserved):
+    """The first `reserved` workers only serve interactive tasks."""
+    return (LANE_INTERACTIVE,) if index < reserved else LANES
+
+
+def handle_shutdown_signals(stop):
+    """Sets `stop` on SIGTERM or SIGINT, instead of dying mid-task."""
+    def request_stop(signum, frame):
+        if not stop.is_set():
+            logger.info(f"Received {signal.Signals(signum).name}, finishing current tasks.")
+        stop.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, request_stop)
+
+
+def run_worker_process(lanes, poll_interval, burst):
+    """Entry point of a forked worker process."""
+    stop = threading.Event()
+    handle_shutdown_signals(stop)
+    Worker(lanes, stop, poll_interval, burst).run()
@@ -0,0 +1,178 @@
+# home/task_wakeup.py
+"""
+Wakes idle task workers as soon as a task is queued, so they don't have to
+poll the database every second to keep latency low.
+
+On PostgreSQL, queueing a task runs pg_notify() on CHANNEL, and every worker
+LISTENs on a connection of its own. The notification goes out when the
+queueing transaction commits, and is dropped if it rolls back.
+
+On other databases (SQLite in development, one host), each worker binds a
+Unix datagram socket in TASK_WAKEUP_DIR. Queueing sends one byte to every
+socket there after commit. Sockets left by crashed workers are removed.
+
+Wakeups are best-effort. Idle workers still check every
+TASK_WAKEUP_POLL_INTERVAL seconds, which covers delayed tasks, expired locks
+and lost notifications, so a missed wakeup only costs latency.
+"""
+
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .deferred import on_commit_once
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'home_background_tasks'
+# Longest a wait blocks in one select() call, so a stop request is seen promptly.
+STOP_CHECK_INTERVAL = 1.0
+
+
+def _postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _sockets_supported():
+    return hasattr(socket, 'AF_UNIX')
+
+
+def wakeup_enabled():
+    return settings.TASK_WAKEUP and (_postgres() or _sockets_supported())
+
+
+# --- Sending ---
+
+def _wake_sockets():
+    wakeup_dir = Path(settings.TASK_WAKEUP_DIR)
+    if not wakeup_dir.is_dir():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for path in wakeup_dir.glob('*.sock'):
+            try:
+                sender.sendto(b'\x01', str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            except BlockingIOError:
+                pass  # The worker already has unread wakeups queued.
+            except OSError as e:
+                logger.warning(f"Could not wake task worker at {path}: {e}")
+
+
+def notify_task_queued(queue):
+    """Wakes idle workers once the current transaction commits."""
+    if not wakeup_enabled():
+        return
+    if _postgres():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, queue or ''])
+    else:
+        on_commit_once(_wake_sockets)
+
+
+# --- Waiting ---
+
+class _Waiter(ABC):
+    """Waits on a file descriptor that becomes readable when a task is queued."""
+
+    def __init__(self, stop):
+        self.stop = stop
+
+    @abstractmethod
+    def fileno(self):
+        """The descriptor select() waits on."""
+
+    @abstractmethod
+    def drain(self):
+        """Reads every pending wakeup. Returns whether there was one."""
+
+    @abstractmethod
+    def close(self):
+        """Releases the connection or socket."""
+
+    def wait(self, timeout):
+        """
+        Blocks until a wakeup arrives, `timeout` seconds pass or `stop` is
+        set. Returns whether it was woken by a notification.
+        """
+        deadline = time.monotonic() + timeout
+        while not self.stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self], [], [], min(remaining, STOP_CHECK_INTERVAL))
+            if readable and self.drain():
+                return True
+        return False
+
+
+class PostgresWaiter(_Waiter):
+    """LISTENs on a dedicated connection, separate from the one running tasks."""
+
+    def __init__(self, stop):
+        super().__init__(stop)
+        self.connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.connection.ensure_connection()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+
+    def fileno(self):
+        return self.connection.connection.fileno()
+
+    def drain(self):
+        raw = self.connection.connection
+        raw.poll()
+        woken = bool(raw.notifies)
+        raw.notifies.clear()
+        return woken
+
+    def close(self):
+        self.connection.close()
+
+
+class SocketWaiter(_Waiter):
+    def __init__(self, stop):
+        super().__init__(stop)
+        wakeup_dir = Path(settings.TASK_WAKEUP_DIR)
+        wakeup_dir.mkdir(parents=True, exist_ok=True)
+        self.path = wakeup_dir / f'{os.getpid()}-{threading.get_ident()}.sock'
+        self.path.unlink(missing_ok=True)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.bind(str(self.path))
+        self.socket.setblocking(False)
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def drain(self):
+        woken = False
+        while True:
+            try:
+                self.socket.recv(64)
+                woken = True
+            except BlockingIOError:
+                return woken
+
+    def close(self):
+        self.socket.close()
+        self.path.unlink(missing_ok=True)
+
+
+def waiter_for(stop):
+    """A waiter for the current database, or None when workers have to poll."""
+    if not wakeup_enabled():
+        return None
+    try:
+        return PostgresWaiter(stop) if _postgres() else SocketWaiter(stop)
+    except Exception as e:
+        logger.warning(f"Task wakeups unavailable, polling instead: {e}")
+        return None
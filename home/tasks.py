@@ -1,74 +1,132 @@
 # home/tasks.py
-import resend
 import logging
+import resend
 from background_task import background
+from django.apps import apps
 from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
-from .models import Post, Video, Subscriber 
+from .broadcast import run_broadcast
+from .caching import bump_listing_version
+from .email_client import RESEND_BATCH_LIMIT, get_resend_client
+from .emails import personalize, render_email
+from .images import generate_derivatives
+from .related import refresh_related
+from .rendering import refresh_post_body
+from .task_queue import LANE_BULK, LANE_DEFAULT, LANE_INTERACTIVE
+from .models import ContentBlock, Post, Video, Subscriber
 
 logger = logging.getLogger(__name__)
 
-@background(schedule=1)
+@background(schedule=1, queue=LANE_BULK)
 def send_post_notification_email_task(post_id):
     """Broadcasts a new post alert to all active subscribers via Resend API."""
-    resend.api_key = settings.RESEND_API_KEY
+    get_resend_client()
     try:
         post = Post.objects.get(id=post_id)
         if post.notification_sent_at:
             return f"Notification for '{post.title}' already sent."
 
-        # Fetch active subscribers
-        recipient_list = list(Subscriber.objects.filter(is_active=True).values_list('email', flat=True))
-
-        if not recipient_list:
+        if not Subscriber.objects.filter(is_active=True).exists():
             return "No active subscribers found."
 
         post_url = f"{settings.SITE_DOMAIN}{reverse('blog_detail', args=[post.slug])}"
-        
+        subject = f"New Blog Post: {post.title}"
+        rendered = render_email('post_notification', {'post': post, 'post_url': post_url}, obj=post)
+
         # Use Resend API directly to bypass Railway's port blocks
-        resend.Emails.send({
+        broadcast = run_broadcast(post, lambda email: {
             "from": settings.DEFAULT_FROM_EMAIL,
-            "to": recipient_list,
-            "subject": f"New Blog Post: {post.title}",
-            "html": f"<h3>{post.title}</h3><p>{post.excerpt}</p><a href='{post_url}'>Read More</a>"
+            "to": [email],
+            "subject": subject,
+            **personalize(rendered, email),
         })
 
         post.notification_sent_at = timezone.now()
         post.save(update_fields=['notification_sent_at'])
-        logger.info(f"Broadcasted post {post_id} to {len(recipient_list)} users.")
+        logger.info(f"Broadcasted post {post_id} to {broadcast.recipients_sent} users.")
 
     except Exception as e:
         logger.error(f"Error in post notification: {e}")
         raise e
 
-@background(schedule=1)
+@background(schedule=1, queue=LANE_BULK)
 def send_video_notification_email_task(video_id):
     """Broadcasts a new video alert to all active subscribers via Resend API."""
-    resend.api_key = settings.RESEND_API_KEY
+    get_resend_client()
     try:
         video = Video.objects.get(id=video_id)
         if video.notification_sent_at:
             return f"Notification for '{video.title}' already sent."
 
-        recipient_list = list(Subscriber.objects.filter(is_active=True).values_list('email', flat=True))
-
-        if not recipient_list:
+        if not Subscriber.objects.filter(is_active=True).exists():
             return "No active subscribers found."
 
         video_url = f"{settings.SITE_DOMAIN}{reverse('video_detail', args=[video.slug])}"
-        
-        resend.Emails.send({
+        subject = f"New Video: {video.title}"
+        rendered = render_email('video_notification', {'video': video, 'video_url': video_url}, obj=video)
+
+        broadcast = run_broadcast(video, lambda email: {
             "from": settings.DEFAULT_FROM_EMAIL,
-            "to": recipient_list,
-            "subject": f"New Video: {video.title}",
-            "html": f"<h3>{video.title}</h3><p>{video.excerpt}</p><a href='{video_url}'>Watch Now</a>"
+            "to": [email],
+            "subject": subject,
+            **personalize(rendered, email),
         })
 
         video.notification_sent_at = timezone.now()
         video.save(update_fields=['notification_sent_at'])
-        logger.info(f"Broadcasted video {video_id} to {len(recipient_list)} users.")
+        logger.info(f"Broadcasted video {video_id} to {broadcast.recipients_sent} users.")
 
     except Exception as e:
         logger.error(f"Error in video notification: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+@background(queue=LANE_INTERACTIVE)
+def send_welcome_emails_task(emails):
+    """Welcomes a batch of new subscribers, up to 100 per Resend batch call."""
+    get_resend_client()
+    rendered = render_email('welcome')
+    # Signup batches are smaller than RESEND_BATCH_LIMIT, so a retry normally
+    # repeats a single call rather than re-sending earlier chunks.
+    for start in range(0, len(emails), RESEND_BATCH_LIMIT):
+        resend.Batch.send([
+            {
+                "from": settings.DEFAULT_FROM_EMAIL,
+                "to": [email],
+                "subject": 'Welcome to the Newsletter!',
+                **personalize(rendered, email),
+            }
+            for email in emails[start:start + RESEND_BATCH_LIMIT]
+        ])
+    logger.info(f"Sent welcome emails to {len(emails)} new subscribers.")
+
+@background(schedule=1, queue=LANE_DEFAULT)
+def generate_image_derivatives_task(model_label, pk, field_name):
+    """Builds the responsive variants of one uploaded image."""
+    model = apps.get_model(model_label)
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return f"{model_label} #{pk} no longer exists."
+
+    field_file = getattr(obj, field_name)
+    if not field_file:
+        return f"{model_label} #{pk} has no {field_name}."
+
+    generate_derivatives(field_file)
+
+    # Pages showing the image now render srcsets, so their ETags and cached
+    # listings must move on. Queryset updates keep this from re-queueing us.
+    if model is ContentBlock:
+        refresh_post_body(obj.post_id)
+    else:
+        model.objects.filter(pk=pk).update(updated_at=timezone.now())
+    if model in (Post, ContentBlock):
+        bump_listing_version('blog')
+    elif model is Video:
+        bump_listing_version('video')
+
+@background(schedule=5, queue=LANE_DEFAULT)
+def refresh_related_content_task(model_label, pk):
+    """Updates the related lists affected by a change to one post or video."""
+    refreshed = refresh_related(apps.get_model(model_label), pk)
+    return f"Refreshed {refreshed} related lists."
@@ -0,0 +1,58 @@
+# home/templatetags/assets.py
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from home import assets
+
+register = template.Library()
+
+
+def _urls(name, kind):
+    if settings.STATIC_BUNDLES:
+        return [static(assets.bundle_path(name, kind))]
+    sources = assets.CSS_BUNDLES[name] if kind == 'css' else assets.JS_BUNDLES[name]
+    return [static(source) for source in sources]
+
+
+@register.simple_tag
+def css_bundle(name, defer=False):
+    """
+    Stylesheet link(s) for a CSS bundle. defer=True loads it without blocking
+    rendering; use it only after {% critical_css %} for the same bundle.
+    Usage: {% css_bundle 'blog' %}
+    """
+    urls = [(url,) for url in _urls(name, 'css')]
+    if defer:
+        return format_html_join(
+            '\n', '<link rel="preload" as="style" href="{0}" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                  '<noscript><link rel="stylesheet" href="{0}"></noscript>', urls,
+        )
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', urls)
+
+
+@register.simple_tag
+def js_bundle(name):
+    """Usage: {% js_bundle 'home' %}"""
+    return format_html_join('\n', '<script src="{}"></script>', ((url,) for url in _urls(name, 'js')))
+
+
+@register.simple_tag
+def critical_css(name):
+    """Inlines the above-the-fold rules of a CSS bundle. Usage: {% critical_css 'home' %}"""
+    # Our own stylesheets, not user input.
+    return format_html('<style>{}</style>', mark_safe(assets.critical_css(name)))
+
+
+@register.simple_tag
+def vendor_css(name):
+    """Usage: {% vendor_css 'icons' %}"""
+    return format_html('<link rel="stylesheet" href="{}">', assets.vendor_url(name))
+
+
+@register.simple_tag
+def vendor_js(name):
+    """Usage: {% vendor_js 'htmx' %}"""
+    return format_html('<script src="{}"></script>', assets.vendor_url(name))
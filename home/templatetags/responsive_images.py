@@ -0,0 +1,109 @@
+# home/templatetags/responsive_images.py
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from home.images import FORMATS, image_variants
+from home.static_images import FAVICON_SOURCE, favicons, static_image
+
+register = template.Library()
+
+
+def _srcset(field_file, variants):
+    return ', '.join(f"{field_file.storage.url(name)} {width}w" for width, name in variants)
+
+
+@register.simple_tag
+def srcset(field_file, fmt='jpeg'):
+    """
+    srcset value for an uploaded image in one format, or '' until its
+    derivatives exist.
+    Usage: <img src="{{ post.image.url }}" srcset="{% srcset post.image 'webp' %}" sizes="...">
+    """
+    manifest = image_variants(field_file)
+    if not manifest or fmt not in manifest['formats']:
+        return ''
+    return _srcset(field_file, manifest['formats'][fmt])
+
+
+@register.inclusion_tag('partials/responsive_image.html')
+def responsive_image(field_file, alt='', sizes='100vw', css_class='', lazy=True):
+    """
+    <picture> with AVIF/WebP sources and a JPEG fallback for an uploaded image.
+    Usage: {% responsive_image post.image alt=post.title sizes="(max-width: 768px) 100vw, 33vw" %}
+    """
+    manifest = image_variants(field_file)
+    context = {
+        'src': field_file.url,
+        'alt': alt,
+        'sizes': sizes,
+        'css_class': css_class,
+        'lazy': lazy,
+        'sources': [],
+        'srcset': '',
+    }
+    if manifest:
+        formats = manifest['formats']
+        context['sources'] = [
+            {'type': FORMATS[fmt]['mime'], 'srcset': _srcset(field_file, formats[fmt])}
+            for fmt in ('avif', 'webp') if fmt in formats
+        ]
+        if 'jpeg' in formats:
+            context['srcset'] = _srcset(field_file, formats['jpeg'])
+            # The largest JPEG is still far smaller than the original upload.
+            context['src'] = field_file.storage.url(formats['jpeg'][-1][1])
+        context['width'] = manifest['width']
+        context['height'] = manifest['height']
+    return context
+
+
+def _static_srcset(variants):
+    return ', '.join(f"{static(name)} {width}w" for width, name in variants)
+
+
+@register.inclusion_tag('partials/responsive_image.html')
+def picture(name, alt='', sizes='100vw', css_class='', lazy=True, **attrs):
+    """
+    <picture> with AVIF/WebP sources and a JPEG/PNG fallback for an image in
+    static/images, from the variants written by optimize_static_images.
+    Other keyword arguments become <img> attributes, with _ read as -.
+    Usage: {% picture 'images/blog.png' alt='Blog' sizes='(max-width: 768px) 100vw, 50vw' data_modal_title='Blog' %}
+    """
+    entry = static_image(name)
+    context = {
+        'src': static(name),
+        'alt': alt,
+        'sizes': sizes,
+        'css_class': css_class,
+        'lazy': lazy,
+        'sources': [],
+        'srcset': '',
+        'attrs': [(key.replace('_', '-'), value) for key, value in attrs.items()],
+    }
+    if entry:
+        formats = entry['formats']
+        context['sources'] = [
+            {'type': FORMATS[fmt]['mime'], 'srcset': _static_srcset(formats[fmt])}
+            for fmt in ('avif', 'webp') if fmt in formats
+        ]
+        fallback = formats[entry['fallback']]
+        context['srcset'] = _static_srcset(fallback)
+        context['src'] = static(fallback[-1][1])
+        # The intrinsic size of the largest variant, so the browser reserves the right space.
+        context['width'] = fallback[-1][0]
+        context['height'] = round(entry['height'] * fallback[-1][0] / entry['width'])
+    return context
+
+
+@register.simple_tag
+def favicon_links():
+    """Favicon, PNG icon and Apple touch icon links, or the original icon until they are generated."""
+    icons = favicons()
+    if not icons:
+        return format_html('<link rel="icon" type="image/png" href="{}">', static(FAVICON_SOURCE))
+    return format_html(
+        '<link rel="icon" sizes="any" href="{}">\n'
+        '<link rel="icon" type="image/png" sizes="32x32" href="{}">\n'
+        '<link rel="apple-touch-icon" sizes="180x180" href="{}">',
+        static(icons['ico']), static(icons['png']['favicon-32.png']), static(icons['png']['apple-touch-icon.png']),
+    )
@@ -0,0 +1,102 @@
+import os
+import statistics
+
+from django.core.cache import cache
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Post, Video
+from .pagination import encode_cursor
+from .profiling import _profiled_render, _template_render
+from .related import rebuild_related
+from .search import rebuild_index
+from .seeding import Seeder
+
+# url name: (SQL queries with an empty cache, with a warm cache, median milliseconds).
+# Query counts must not depend on the page size or the amount of data: a
+# view that goes over is doing a query per row. Wall-clock time depends on
+# the machine, so the time budgets are only checked with
+# CHECK_TIME_BUDGETS=1, on a quiet machine; bench_views measures it properly.
+VIEW_BUDGETS = {
+    'blog_list': (5, 0, 250),
+    'blog_list_partial': (5, 0, 250),
+    'blog_detail': (3, 3, 150),
+    'video_list': (5, 0, 250),
+    'video_detail': (4, 4, 150),
+}
+REQUESTS_PER_URL = 3
+CHECK_TIME_BUDGETS = os.environ.get('CHECK_TIME_BUDGETS') == '1'
+
+
+@override_settings(PROFILE_REQUESTS=True, SECURE_SSL_REDIRECT=False)
+class ViewBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seeder = Seeder(seed=1)
+        post_categories, video_categories = seeder.categories()
+        seeder.posts(300, post_categories)
+        seeder.videos(100, video_categories)
+        rebuild_index()
+        rebuild_related()
+
+    def urls(self):
+        """url name: the (path, headers) pairs covering the ways the view is reached."""
+        htmx = {'HTTP_HX_REQUEST': 'true'}
+        post = Post.objects.filter(is_published=True).order_by('-published_date', '-id')[20]
+        video = Video.objects.filter(is_published=True).latest('published_date')
+        category = post.category.slug
+        return {
+            'blog_list': [
+                (f"{reverse('blog_list')}?{query}", {})
+                for query in ('', 'page=3', f'category={category}', 'featured=true')
+            ],
+            'blog_list_partial': [
+                (f"{reverse('blog_list_partial')}?{query}", htmx)
+                for query in ('page=2', f'category={category}', f'cursor={encode_cursor(post)}')
+            ],
+            'blog_detail': [(reverse('blog_detail', args=[post.slug]), {})],
+            'video_list': [(f"{reverse('video_list')}?{query}", {}) for query in ('', 'page=2', 'featured=true')],
+            'video_detail': [(reverse('video_detail', args=[video.slug]), {})],
+        }
+
+    def profile(self, path, headers):
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200, path)
+        self.assertIn('Server-Timing', response)
+        return response.wsgi_request.profile
+
+    def test_views_stay_within_budget(self):
+        urls = self.urls()
+        for name, (cold_queries, warm_queries, budget_ms) in VIEW_BUDGETS.items():
+            for path, headers in urls[name]:
+                with self.subTest(path=path):
+                    # Loads templates and renders the post body on first view.
+                    self.profile(path, headers)
+
+                    cold = []
+                    for _ in range(REQUESTS_PER_URL):
+                        cache.clear()
+                        cold.append(self.profile(path, headers))
+                    warm = [self.profile(path, headers) for _ in range(REQUESTS_PER_URL)]
+
+                    self.assertEqual(cold[0].url_name, name)
+                    self.assertLessEqual(max(p.queries for p in cold), cold_queries, f'{path} with an empty cache')
+                    self.assertLessEqual(max(p.queries for p in warm), warm_queries, f'{path} with a warm cache')
+                    if CHECK_TIME_BUDGETS:
+                        self.assertLessEqual(statistics.median(p.total_ms for p in cold), budget_ms, path)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('blog_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+;desc="templates", total;dur=[\d.]+$')
+        profile = response.wsgi_request.profile
+        self.assertGreater(profile.template_ms, 0)
+        # Queries run while rendering count towards both db and tpl.
+        self.assertLessEqual(max(profile.db_ms, profile.template_ms), profile.total_ms)
+
+    def test_template_hook_follows_the_setting(self):
+        self.assertIs(Template.render, _profiled_render)
+        with override_settings(PROFILE_REQUESTS=False):
+            self.assertIs(Template.render, _template_render)
+        self.assertIs(Template.render, _profiled_render)
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import resend
+from background_task.models import Task
+from django.core.files.base import ContentFile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .assets import minify_css, minify_js
+from .broadcast import run_broadcast
+from .conditional import release
+from .emails import personalize, unsubscribe_token
+from .forms import NormalizedImageField, SubscriberImportForm
+from .media import HASHED_NAME_RE
+from .models import (
+    AboutPage, Broadcast, NotificationDelivery, Post, PostCategory, RelatedContent, RelatedTerm, Subscriber,
+)
+from .pagination import CursorPaginator
+from .registry import about_page, post_categories
+from .related import rebuild_related, refresh_related
+from .resend_backend import ResendEmailBackend
+from .resend_stub import ResendStub
+from .search import index_object, rebuild_index, search
+from .signups import SignupBuffer
+from .static_images import FAVICON_SOURCE, OUTPUT_DIR, StaticImageOptimizer
+from .storage import ContentAddressedStorage
+from .subscribers import import_subscribers
+from .task_queue import LANES, claim_next, worker_lanes
+from .tasks import send_post_notification_email_task, send_welcome_emails_task
+
+
+class ResendBackendPoolingTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(setattr, resend, 'default_http_client', resend.default_http_client)
+        self.messages = [
+            EmailMessage('Hello', 'Body', 'hello@example.com', [f'user{i}@example.com'])
+            for i in range(200)
+        ]
+
+    def test_backend_uses_fewer_connections_and_requests(self):
+        # Today's path: one Emails.send per message on the SDK's default client.
+        with ResendStub() as stub:
+            resend.default_http_client = resend.RequestsClient()
+            for msg in self.messages:
+                resend.Emails.send({'from': msg.from_email, 'to': msg.to, 'subject': msg.subject, 'text': msg.body})
+            serial_connections = stub.connections
+
+        with ResendStub() as stub:
+            sent = ResendEmailBackend().send_messages(self.messages)
+
+        self.assertEqual(sent, len(self.messages))
+        self.assertEqual(stub.emails, len(self.messages))
+        self.assertEqual(stub.requests, 2)
+        self.assertEqual(stub.connections, 1)
+        self.assertEqual(serial_connections, len(self.messages))
+
+    def test_connection_is_kept_alive_across_backend_instances(self):
+        with ResendStub() as stub:
+            for msg in self.messages[:3]:
+                ResendEmailBackend().send_messages([msg])
+
+        self.assertEqual(stub.requests, 3)
+        self.assertEqual(stub.connections, 1)
+
+
+class MinifyTests(SimpleTestCase):
+    def test_js_keeps_strings_regexes_and_line_breaks(self):
+        source = (
+            "// comment\n"
+            "const re = /^[^\\s@]+@[^/]+$/g;  /* block */\n"
+            "let url = '//not-a-comment', t = `  ${a / b}  `;\n"
+            "x = a++ + ++b\n"
+            "y = a - -b\n"
+        )
+        self.assertEqual(minify_js(source), (
+            "const re=/^[^\\s@]+@[^/]+$/g;\n"
+            "let url='//not-a-comment',t=`  ${a / b}  `;\n"
+            "x=a++ + ++b\n"
+            "y=a- -b\n"
+        ))
+
+    def test_css_keeps_strings_and_significant_spaces(self):
+        source = '/*! license */ .a :hover , .b > .c { content: " ; } " ; margin : 0 auto ; }\n' \
+                 '@media screen and (max-width: 768px) { .d { color: red !important; } }'
+        self.assertEqual(minify_css(source), (
+            '/*! license */.a :hover,.b>.c{content:" ; } ";margin :0 auto}'
+            '@media screen and (max-width:768px){.d{color:red!important}}'
+        ))
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+        self.content = b'\xff\xd8 not really a jpeg ' * 100_000
+        self.digest = hashlib.sha256(self.content).hexdigest()
+
+    def test_identical_uploads_share_one_immutable_file(self):
+        first = self.storage.save_blob('blog/f5.JPG', ContentFile(self.content))
+        second = self.storage.save_blob('blog/f5_22UpMKG.jpg', ContentFile(self.content))
+
+        self.assertEqual(first, f'blog/{self.digest}.jpg')
+        self.assertEqual(second, first)
+        self.assertEqual(os.listdir(self.storage.path('blog')), [f'{self.digest}.jpg'])
+        self.assertTrue(HASHED_NAME_RE.search(first))
+        self.assertFalse(HASHED_NAME_RE.search(f'blog/{self.digest}.480w.webp'))
+
+    def test_large_upload_is_moved_into_place(self):
+        upload = TemporaryUploadedFile('big.jpg', 'image/jpeg', len(self.content), None)
+        self.addCleanup(upload.close)
+        upload.write(self.content)
+        upload.flush()
+
+        name = self.storage.save_blob('about/big.jpg', upload)
+
+        self.assertEqual(name, f'about/{self.digest}.jpg')
+        with self.storage.open(name, 'rb') as fh:
+            self.assertEqual(fh.read(), self.content)
+        self.assertFalse(os.path.exists(upload.temporary_file_path()))
+
+
+def _jpeg(width, height, **save_options):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, 'JPEG', **save_options)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_UPLOAD_MAX_EDGE=1000, IMAGE_UPLOAD_MAX_PIXELS=20_000_000)
+class UploadNormalizationTests(SimpleTestCase):
+    def test_photo_is_turned_upright_stripped_and_downscaled(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise.
+        exif[0x010F] = 'Camera maker'
+        upload = SimpleUploadedFile('photo.jpg', _jpeg(4000, 3000, exif=exif), 'image/jpeg')
+
+        cleaned = NormalizedImageField().clean(upload)
+
+        with Image.open(cleaned) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (750, 1000))
+            self.assertFalse(image.getexif())
+        self.assertEqual(cleaned.name, 'photo.jpg')
+        self.assertLess(cleaned.size, upload.size)
+
+    def test_small_clean_image_is_kept_byte_for_byte(self):
+        upload = SimpleUploadedFile('small.jpg', _jpeg(800, 600), 'image/jpeg')
+        self.assertIs(NormalizedImageField().clean(upload), upload)
+
+    def test_too_many_pixels_is_refused_before_decoding(self):
+        upload = SimpleUploadedFile('huge.jpg', _jpeg(5000, 5000), 'image/jpeg')
+        with self.assertRaisesMessage(ValidationError, 'the limit is 20 megapixels'):
+            NormalizedImageField().clean(upload)
+
+    @override_settings(UPLOAD_MAX_BYTES=1024)
+    def test_oversized_upload_is_dropped_and_rejected(self):
+        content = b'email\n' + b'reader@example.com\n' * 1000
+        request = RequestFactory().post('/', {'csv_file': SimpleUploadedFile('subscribers.csv', content)})
+
+        upload = request.FILES['csv_file']
+        form = SubscriberImportForm(request.POST, request.FILES)
+
+        self.assertTrue(upload.oversized)
+        self.assertEqual(upload.size, len(content))
+        self.assertFalse(form.is_valid())
+        self.assertIn('uploads are limited to 1.0\xa0KB', form.errors['csv_file'][0])
+
+
+class MediaGCTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        media_root = override_settings(MEDIA_ROOT=self.root)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.content = b'\xff\xd8 not really a jpeg ' * 1000
+        self.digest = hashlib.sha256(self.content).hexdigest()
+        self.write('blog/f5.jpg', self.content)
+        self.write('blog/f5_22UpMKG.jpg', self.content)
+        self.write('blog/f5.480w.webp', b'webp')
+        self.write('blog/f5.variants.json', json.dumps({'formats': {'webp': [[480, 'blog/f5.480w.webp']]}}).encode())
+        self.write('blog/old.jpg', b'old')
+        # Everything so far is two days old; this one was just uploaded.
+        self.write('blog/new.jpg', b'new', age=0)
+
+        category = PostCategory.objects.create(name='Travel')
+        self.first = Post.objects.create(title='First', excerpt='x', category=category, image='blog/f5.jpg')
+        self.copy = Post.objects.create(title='Copy', excerpt='x', category=category, image='blog/f5_22UpMKG.jpg')
+
+    def write(self, name, content, age=2 * 24 * 60 * 60):
+        path = os.path.join(self.root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        os.utime(path, (time.time() - age,) * 2)
+
+    def files(self):
+        return sorted(os.listdir(os.path.join(self.root, 'blog')))
+
+    def test_dry_run_changes_nothing(self):
+        before = self.files()
+        output = io.StringIO()
+        call_command('gc_media', verbosity=2, stdout=output)
+
+        self.assertIn('orphan: blog/old.jpg', output.getvalue())
+        self.assertNotIn('blog/new.jpg', output.getvalue())
+        self.assertEqual(self.files(), before)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.image.name, 'blog/f5.jpg')
+
+    def test_copies_collapse_into_one_blob_with_their_derivatives(self):
+        call_command('gc_media', apply=True, stdout=io.StringIO())
+
+        blob = f'blog/{self.digest}.jpg'
+        for post in (self.first, self.copy):
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, blob)
+        self.assertEqual(self.files(), sorted([
+            f'{self.digest}.jpg', f'{self.digest}.480w.webp', f'{self.digest}.variants.json', 'new.jpg',
+        ]))
+        with open(os.path.join(self.root, 'blog', f'{self.digest}.variants.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['formats']['webp'], [[480, f'blog/{self.digest}.480w.webp']])
+
+
+class StaticImageOptimizerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.static_dir = directory.name
+        os.makedirs(os.path.join(self.static_dir, 'images'))
+        Image.new('RGB', (600, 400), 'teal').save(os.path.join(self.static_dir, 'images', 'card.jpg'))
+        Image.new('RGBA', (64, 64), 'orange').save(os.path.join(self.static_dir, FAVICON_SOURCE))
+
+    def run_optimizer(self):
+        return StaticImageOptimizer(self.static_dir).run()
+
+    @override_settings(IMAGE_DERIVATIVE_WIDTHS=[480])
+    def test_favicon_source_only_gets_favicons(self):
+        self.run_optimizer()
+        files = os.listdir(os.path.join(self.static_dir, OUTPUT_DIR))
+        self.assertIn('favicon.ico', files)
+        self.assertFalse([name for name in files if name.startswith('ss-icon.')])
+
+    def test_changed_widths_re_encode_unchanged_sources(self):
+        with override_settings(IMAGE_DERIVATIVE_WIDTHS=[480]):
+            self.assertEqual(self.run_optimizer(), (2, 0, 0))
+            self.assertEqual(self.run_optimizer(), (0, 1, 0))
+        with override_settings(IMAGE_DERIVATIVE_WIDTHS=[240, 480]):
+            self.assertEqual(self.run_optimizer(), (1, 0, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.static_dir, OUTPUT_DIR, 'card.240w.jpg')))
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_categories_are_read_without_queries_until_content_changes(self):
+        finance = PostCategory.objects.create(name='Finance')
+        PostCategory.objects.create(name='Fitness')
+        Post.objects.create(title='Budgeting', excerpt='x', category=finance, is_featured=True)
+        Post.objects.create(title='Draft', excerpt='x', category=finance, is_published=False)
+
+        with self.assertNumQueries(2):
+            categories = post_categories()
+        with self.assertNumQueries(0):
+            self.assertIs(post_categories(), categories)
+            self.assertEqual([c.name for c in categories], ['Finance', 'Fitness'])
+            self.assertEqual(categories.get('finance').published_count, 1)
+            self.assertEqual(categories.featured_count, 1)
+            self.assertIsNone(categories.get('missing'))
+
+        Post.objects.create(title='Investing', excerpt='x', category=finance)
+        self.assertEqual(post_categories().get('finance').published_count, 2)
+
+    def test_about_page_is_cached_even_when_missing(self):
+        self.assertIsNone(about_page())
+        with self.assertNumQueries(0):
+            self.assertIsNone(about_page())
+
+        page = AboutPage.objects.create(title='About')
+        self.assertEqual(about_page(), page)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = PostCategory.objects.create(name='Finance')
+        self.post = Post.objects.create(title='Budgeting', excerpt='x', category=category)
+        self.url = reverse('blog_list_partial')
+
+    def partial(self):
+        return self.client.get(self.url, {'category': 'finance'}, HTTP_HX_REQUEST='true').content.decode()
+
+    def test_fragment_is_served_from_cache_until_a_post_is_saved(self):
+        self.assertIn('Budgeting', self.partial())
+
+        # update() sends no signals, so the cached fragment is still current as far as the cache knows.
+        Post.objects.filter(pk=self.post.pk).update(title='Saving')
+        self.assertIn('Budgeting', self.partial())
+
+        self.post.refresh_from_db()
+        self.post.save()
+        content = self.partial()
+        self.assertIn('Saving', content)
+        self.assertNotIn('Budgeting', content)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        category = PostCategory.objects.create(name='Finance')
+        Post.objects.bulk_create([Post(title=f'Post {i}', slug=f'post-{i}', excerpt='x', category=category)
+                                  for i in range(12)])
+        # Half the posts share a timestamp, so only the id keeps their order stable.
+        Post.objects.filter(pk__in=Post.objects.order_by('id').values('id')[:6]).update(
+            published_date=Post.objects.latest('published_date').published_date,
+        )
+        self.paginator = CursorPaginator(Post.objects.all(), 5)
+
+    def test_pages_follow_each_other_without_overlap(self):
+        seen, cursor = [], None
+        while True:
+            page = self.paginator.get_page(cursor)
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+        expected = list(Post.objects.order_by('-published_date', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 12)
+
+    def test_malformed_cursor_falls_back_to_the_first_page(self):
+        self.assertEqual(list(self.paginator.get_page('not a cursor!')), list(self.paginator.get_page()))
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_next_page_link_keeps_filters_intact(self):
+        Post.objects.update(is_featured=True)
+        response = self.client.get(reverse('blog_list_partial'), {'featured': 'yes & #1'}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, '&featured=yes%20%26%20%231"')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SitemapFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = PostCategory.objects.create(name='Travel')
+        self.kyoto = Post.objects.create(title='Temples of Kyoto', excerpt='x', category=self.category)
+
+    def fetch(self, name):
+        response = self.client.get(reverse(name))
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return content.decode()
+
+    def test_outputs_are_cached_and_pick_up_new_posts(self):
+        self.assertIn(self.kyoto.get_absolute_url(), self.fetch('sitemap'))
+        self.assertIn('Temples of Kyoto', self.fetch('post_feed'))
+        with self.assertNumQueries(0):
+            self.fetch('sitemap')
+            self.fetch('post_feed')
+
+        nara = Post.objects.create(title='Temples of Nara', excerpt='x', category=self.category)
+        self.assertIn(nara.get_absolute_url(), self.fetch('sitemap'))
+        self.assertIn('Temples of Nara', self.fetch('post_feed'))
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        # The broadcast has been waiting longer, but the welcome email is in a faster lane.
+        self.bulk = send_post_notification_email_task(1, schedule=timezone.now() - timedelta(minutes=5))
+        self.interactive = send_welcome_emails_task(['reader@example.com'], schedule=0)
+
+    def test_interactive_task_is_claimed_before_an_older_broadcast(self):
+        self.assertEqual(claim_next(LANES, 'worker-1'), self.interactive)
+        self.assertEqual(claim_next(LANES, 'worker-2'), self.bulk)
+        self.assertIsNone(claim_next(LANES, 'worker-3'))
+
+    def test_reserved_worker_never_takes_a_broadcast(self):
+        reserved = worker_lanes(0, reserved=1)
+        self.assertEqual(claim_next(reserved, 'worker-1'), self.interactive)
+        self.assertIsNone(claim_next(reserved, 'worker-1'))
+        self.assertIsNone(Task.objects.get(pk=self.bulk.pk).locked_by)
+
+
+class RelatedContentTests(TestCase):
+    def setUp(self):
+        self.category = PostCategory.objects.create(name='Travel')
+        self.kyoto = self._post('Temples of Kyoto', 'kyoto temples gardens shrines')
+        self.nara = self._post('Deer park in Nara', 'nara deer temples gardens')
+        self.bread = self._post('Sourdough bread', 'sourdough flour starter oven')
+        rebuild_index()
+        rebuild_related()
+
+    def _post(self, title, excerpt):
+        return Post.objects.create(title=title, excerpt=excerpt, category=self.category)
+
+    def _reindex(self, post):
+        post.refresh_from_db()
+        index_object(post)
+        refresh_related(Post, post.pk)
+
+    def test_lists_follow_changes_without_a_rebuild(self):
+        self.assertEqual(list(self.kyoto.get_related_posts()), [self.nara])
+        # Nothing similar: the newest other posts in its category instead.
+        self.assertEqual(list(self.bread.get_related_posts()), [self.nara, self.kyoto])
+
+        osaka = self._post('Osaka temples', 'osaka castle temples gardens')
+        self._reindex(osaka)
+        self.assertIn(self.kyoto, osaka.get_related_posts())
+        self.assertIn(osaka, self.kyoto.get_related_posts())
+
+        Post.objects.filter(pk=self.nara.pk).update(is_published=False)
+        self._reindex(self.nara)
+        self.assertEqual(list(self.kyoto.get_related_posts()), [osaka])
+
+    def test_backfill_computes_lists_for_existing_items(self):
+        RelatedTerm.objects.all().delete()
+        RelatedContent.objects.all().delete()
+
+        call_command('rebuild_related_content', if_empty=True, stdout=io.StringIO())
+
+        self.assertTrue(RelatedTerm.objects.exists())
+        self.assertEqual(list(self.nara.get_related_posts()), [self.kyoto])
+
+    def test_backfill_leaves_computed_lists_alone(self):
+        osaka = self._post('Osaka temples', 'osaka castle temples gardens')
+        index_object(osaka)
+
+        call_command('rebuild_related_content', if_empty=True, stdout=io.StringIO())
+        self.assertFalse(RelatedTerm.objects.filter(object_id=osaka.pk).exists())
+
+
+class SearchTests(TestCase):
+    def test_backfill_indexes_published_posts_only(self):
+        category = PostCategory.objects.create(name='Travel')
+        Post.objects.create(title='Harbour at dawn', excerpt='Fishing boats in the harbour', category=category)
+        Post.objects.create(title='Harbour draft', excerpt='Not yet', category=category, is_published=False)
+        self.assertEqual(search('harbour'), ([], False))
+
+        call_command('rebuild_search_index', if_empty=True, stdout=io.StringIO())
+
+        results, has_next = search('harb')
+        self.assertEqual([result.document.title for result in results], ['Harbour at dawn'])
+        self.assertFalse(has_next)
+        self.assertIn('<mark>harbour</mark>', results[0].snippet)
+
+    def test_backfill_leaves_an_existing_index_alone(self):
+        category = PostCategory.objects.create(name='Travel')
+        Post.objects.create(title='Harbour at dawn', excerpt='Fishing boats in the harbour', category=category)
+        rebuild_index()
+        Post.objects.create(title='Harbour at dusk', excerpt='Boats coming home', category=category)
+
+        call_command('rebuild_search_index', if_empty=True, stdout=io.StringIO())
+        self.assertEqual(search('dusk'), ([], False))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, RELEASE='a')
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        release.cache_clear()
+        self.addCleanup(release.cache_clear)
+        category = PostCategory.objects.create(name='Travel')
+        self.kyoto = Post.objects.create(title='Temples of Kyoto', excerpt='kyoto temples gardens', category=category)
+        self.nara = Post.objects.create(title='Temples of Nara', excerpt='nara temples gardens', category=category)
+        rebuild_index()
+        rebuild_related()
+        self.url = self.kyoto.get_absolute_url()
+        # The first view renders the post body, which moves updated_at.
+        self.client.get(self.url)
+
+    def revalidate(self):
+        etag = self.client.get(self.url)['ETag']
+        return lambda: self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_page_is_not_modified(self):
+        self.assertEqual(self.revalidate()(), 304)
+
+    def test_new_related_list_changes_the_etag(self):
+        status = self.revalidate()
+        osaka = Post.objects.create(title='Temples of Osaka', excerpt='osaka temples gardens', category=self.kyoto.category)
+        index_object(osaka)
+        refresh_related(Post, osaka.pk)
+        self.assertEqual(status(), 200)
+
+    def test_new_release_changes_the_etag(self):
+        status = self.revalidate()
+        release.cache_clear()
+        with self.settings(RELEASE='b'):
+            self.assertEqual(status(), 200)
+
+
+class SubscriberImportTests(TestCase):
+    def test_import_skips_addresses_stored_in_another_case(self):
+        # bulk_create skips save(), like rows written before emails were normalized.
+        Subscriber.objects.bulk_create([Subscriber(email='Foo@Example.com', is_active=False)])
+
+        result = import_subscribers(io.StringIO('email\nfoo@example.com\nFOO@example.com\nnew@example.com\n'))
+
+        self.assertEqual((result.rows, result.created, result.skipped), (3, 1, 2))
+        self.assertEqual(Subscriber.objects.count(), 2)
+        self.assertFalse(Subscriber.objects.get(email='Foo@Example.com').is_active)
+
+    def test_save_lower_cases_the_email(self):
+        self.assertEqual(Subscriber.objects.create(email=' Ann@Example.com ').email, 'ann@example.com')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SUBSCRIBE_BATCH_SIZE=3, SUBSCRIBE_FLUSH_INTERVAL=60,
+                   SUBSCRIBE_RATE_LIMIT_PER_IP=3, SUBSCRIBE_RATE_LIMIT_GLOBAL=100)
+class SubscribeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        buffer = SignupBuffer()
+        self.addCleanup(buffer.flush)
+        patcher = mock.patch('home.views.signup_buffer', buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def subscribe(self, email, ip='203.0.113.1'):
+        return self.client.post(reverse('subscribe'), {'email': email}, REMOTE_ADDR=ip)
+
+    def test_signups_are_written_in_one_batch(self):
+        self.subscribe('a@example.com')
+        self.subscribe('b@example.com', ip='203.0.113.2')
+        self.assertEqual(self.subscribe('A@example.com', ip='203.0.113.3').json()['message'], 'Already subscribed!')
+        self.assertFalse(Subscriber.objects.exists())
+
+        self.subscribe('c@example.com', ip='203.0.113.4')
+        self.assertEqual(sorted(Subscriber.objects.values_list('email', flat=True)),
+                         ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(Task.objects.filter(task_name__endswith='send_welcome_emails_task').count(), 1)
+
+    def test_client_over_its_limit_is_refused(self):
+        statuses = [self.subscribe(f'user{i}@example.com').status_code for i in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(self.subscribe('other@example.com', ip='203.0.113.9').status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnsubscribeTests(TestCase):
+    def setUp(self):
+        self.subscriber = Subscriber.objects.create(email='ann@example.com')
+        self.url = reverse('unsubscribe', args=[unsubscribe_token('ann@example.com')])
+
+    def test_get_only_asks_for_confirmation(self):
+        response = self.client.get(self.url)
+
+        self.assertContains(response, '<form method="post"')
+        self.subscriber.refresh_from_db()
+        self.assertTrue(self.subscriber.is_active)
+
+    def test_one_click_post_unsubscribes_without_a_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(self.url, 'List-Unsubscribe=One-Click', content_type='application/x-www-form-urlencoded')
+
+        self.assertContains(response, "You're unsubscribed")
+        self.subscriber.refresh_from_db()
+        self.assertFalse(self.subscriber.is_active)
+
+    def test_emails_carry_one_click_headers(self):
+        headers = personalize({'text': 'Bye: __UNSUBSCRIBE_URL__'}, 'ann@example.com')['headers']
+
+        self.assertEqual(headers['List-Unsubscribe-Post'], 'List-Unsubscribe=One-Click')
+        self.assertTrue(headers['List-Unsubscribe'].endswith(f'{self.url}>'))
+
+
+class StaticReferenceTests(SimpleTestCase):
+    def test_templates_only_link_static_files_that_exist(self):
+        # With a manifest, stored_name() raises for a missing file, so a broken link would be a 500.
+        reference = re.compile(r"""{% (?:static|picture) '([^']+)'""")
+        missing = []
+        for directory in settings.TEMPLATES[0]['DIRS']:
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    with open(os.path.join(root, filename), encoding='utf-8') as f:
+                        missing += [path for path in reference.findall(f.read()) if not finders.find(path)]
+        self.assertEqual(missing, [])
+
+
+@override_settings(BROADCAST_CHUNK_SIZE=2, BROADCAST_CONCURRENCY=2, BROADCAST_RATE_LIMIT=2)
+class BroadcastTests(TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, resend, 'api_key', resend.api_key)
+        resend.api_key = 're_test'
+        category = PostCategory.objects.create(name='Travel')
+        self.post = Post.objects.create(title='Harbour at dawn', excerpt='x', category=category)
+        Subscriber.objects.bulk_create([Subscriber(email=f'user{i}@example.com') for i in range(5)])
+        Subscriber.objects.create(email='gone@example.com', is_active=False)
+
+    def test_subscribers_are_sent_in_rate_limited_batches(self):
+        with ResendStub() as stub:
+            started = time.monotonic()
+            broadcast = run_broadcast(self.post, lambda email: {
+                'from': 'news@example.com', 'to': [email], 'subject': 'New post', 'text': 'Hello',
+            })
+            elapsed = time.monotonic() - started
+
+        # Three batch requests of at most two emails, the third held back by the two-per-second limit.
+        self.assertEqual((stub.requests, stub.emails), (3, 5))
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertEqual((broadcast.chunks_sent, broadcast.recipients_sent), (3, 5))
+        self.assertIsNotNone(broadcast.completed_at)
+        self.assertFalse(NotificationDelivery.objects.filter(subscriber__email='gone@example.com').exists())
+
+
+@override_settings(BROADCAST_CHUNK_SIZE=2, BROADCAST_CONCURRENCY=1, BROADCAST_RATE_LIMIT=1000)
+class BroadcastResumeTests(TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, resend, 'api_key', resend.api_key)
+        resend.api_key = 're_test'
+        category = PostCategory.objects.create(name='Travel')
+        self.post = Post.objects.create(title='Harbour at dawn', excerpt='x', category=category)
+        Subscriber.objects.bulk_create([Subscriber(email=f'user{i}@example.com') for i in range(5)])
+
+    def broadcast(self):
+        return run_broadcast(self.post, lambda email: {
+            'from': 'news@example.com', 'to': [email], 'subject': 'New post', 'text': 'Hello',
+        })
+
+    def statuses(self):
+        return list(NotificationDelivery.objects.order_by('subscriber_id').values_list('status', flat=True))
+
+    def test_rerun_sends_only_rows_not_marked_sent(self):
+        with ResendStub() as stub:
+            # The first chunk goes through, the second fails.
+            stub.failing_requests = {2}
+            with self.assertRaises(Exception):
+                self.broadcast()
+        self.assertEqual(self.statuses(), ['sent', 'sent', 'failed', 'failed'])
+
+        with ResendStub() as stub:
+            broadcast = self.broadcast()
+
+        self.assertEqual(stub.emails, 3)
+        self.assertEqual(self.statuses(), ['sent'] * 5)
+        self.assertIsNotNone(broadcast.completed_at)
+        self.assertEqual(NotificationDelivery.objects.get(subscriber__email='user2@example.com').attempts, 2)
+
+    def test_chunk_keeps_its_idempotency_key_when_the_worker_dies_before_recording_it(self):
+        with ResendStub() as stub:
+            with mock.patch.object(NotificationDelivery.objects, 'bulk_update', side_effect=RuntimeError('killed')):
+                with self.assertRaises(RuntimeError):
+                    self.broadcast()
+            self.broadcast()
+
+        # The provider accepted the first chunk, the ledger never heard; the rerun repeats its key.
+        first, *rerun = stub.idempotency_keys
+        self.assertEqual(rerun[0], first)
+        self.assertEqual(len(set(rerun)), 3)
+        self.assertTrue(Broadcast.objects.get(object_id=self.post.pk).completed_at)
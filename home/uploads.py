@@ -0,0 +1,140 @@
+# home/uploads.py
+"""
+Upload limits and image normalization.
+
+LimitedUploadHandler streams every upload to a temporary file, so no upload
+is held in memory, and stops writing once a file passes UPLOAD_MAX_BYTES.
+The rest of that file is read and dropped, and the form gets an
+OversizedUpload to reject with a proper error instead of a reset connection.
+
+normalize_image() runs on every image submitted through the admin forms
+(see NormalizedImageField). Images with more than IMAGE_UPLOAD_MAX_PIXELS
+pixels are refused from their header, before anything is decoded. The rest
+are turned upright, have their EXIF removed (camera data and GPS position
+included) and are scaled down to IMAGE_UPLOAD_MAX_EDGE. JPEGs are decoded
+at a reduced scale with draft(), and large reductions go through reduce()
+before the final resample. An image that is already upright, small enough
+and free of EXIF is stored byte for byte.
+"""
+
+import logging
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Pillow format: save() options. Other formats (GIF, ...) are only checked, not rewritten.
+NORMALIZED_FORMATS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90, 'method': 4},
+}
+# resize() after reduce() once the image is this many times the target size.
+REDUCING_GAP = 3.0
+
+
+class OversizedUpload(UploadedFile):
+    """Stands in for a file that passed UPLOAD_MAX_BYTES; only its name and size are kept."""
+
+    oversized = True
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    def error_message(self):
+        return (f"{self.name} is {filesizeformat(self.size)}; "
+                f"uploads are limited to {filesizeformat(settings.UPLOAD_MAX_BYTES)}.")
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Every upload goes to a temporary file, and at most UPLOAD_MAX_BYTES of it."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.oversized and start + len(raw_data) > settings.UPLOAD_MAX_BYTES:
+            self.oversized = True
+            logger.warning(f"Upload {self.file_name!r} is over {settings.UPLOAD_MAX_BYTES} bytes; dropping it.")
+        if not self.oversized:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return super().file_complete(file_size)
+        self.file.close()
+        return OversizedUpload(self.file_name, self.content_type, file_size, self.charset, self.content_type_extra)
+
+
+def validate_upload_size(upload):
+    if getattr(upload, 'oversized', False):
+        raise ValidationError(upload.error_message(), code='file_too_large')
+
+
+def check_image_limits(upload):
+    """
+    Refuses an image over IMAGE_UPLOAD_MAX_PIXELS from its header, before
+    any of it is decoded. Files Pillow can't identify are left to the form
+    field's own validation.
+    """
+    upload.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            with Image.open(upload) as image:
+                pixels = image.width * image.height
+        except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+            pixels = None
+        except (OSError, ValueError):
+            return
+        finally:
+            upload.seek(0)
+    if pixels is None or pixels > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        limit = settings.IMAGE_UPLOAD_MAX_PIXELS / 1_000_000
+        raise ValidationError(f"{upload.name} has too many pixels; the limit is {limit:g} megapixels.",
+                              code='too_many_pixels')
+
+
+def normalize_image(upload):
+    """
+    Returns `upload` upright, without EXIF and no larger than
+    IMAGE_UPLOAD_MAX_EDGE, as a new temporary file, or `upload` itself if
+    it needs none of that. Call check_image_limits() first.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    fmt, max_edge = image.format, settings.IMAGE_UPLOAD_MAX_EDGE
+    if (fmt not in NORMALIZED_FORMATS or getattr(image, 'is_animated', False)
+            or (not image.getexif() and max(image.size) <= max_edge)):
+        upload.seek(0)
+        return upload
+
+    original_size = image.size
+    if fmt == 'JPEG':
+        # Decodes at 1/2, 1/4 or 1/8 scale, as long as the result is still at least max_edge.
+        image.draft('RGB', (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_edge:
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    # EXIF is only written when passed to save(), so leaving it out drops it.
+    options = dict(NORMALIZED_FORMATS[fmt])
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    normalized = TemporaryUploadedFile(upload.name, upload.content_type, 0, upload.charset,
+                                       upload.content_type_extra)
+    image.save(normalized.file, fmt, **options)
+    normalized.size = normalized.file.tell()
+    normalized.file.seek(0)
+    logger.info(f"Normalized {upload.name}: {original_size[0]}x{original_size[1]} -> "
+                f"{image.width}x{image.height}, {upload.size} -> {normalized.size} bytes.")
+    return normalized
@@ -1,8 +1,9 @@
 # home/urls.py
 
 from django.urls import path
-from . import views
-
+from . import sitemaps, views
+from .caching import cached_response
+from .feeds import PostAtomFeed, PostFeed, VideoAtomFeed, VideoFeed
 
 
 urlpatterns = [
@@ -19,10 +20,27 @@ urlpatterns = [
     path('videos/partial/', views.video_list_partial, name='video_list_partial'),
     path('videos/<slug:video_slug>/', views.video_detail, name='video_detail'),
 
+    # Search
+    path('search/', views.search, name='search'),
+    path('search/partial/', views.search_partial, name='search_partial'),
+
     # About
     path('about/', views.about_detail, name='about_detail'),
 
+    # Sitemaps & Feeds
+    path('sitemap.xml', sitemaps.sitemap, name='sitemap'),
+    path('sitemap-<slug:section>.xml', sitemaps.sitemap_section, name='sitemap_section'),
+    path('feeds/blog.rss', cached_response('blog')(PostFeed()), name='post_feed'),
+    path('feeds/blog.atom', cached_response('blog')(PostAtomFeed()), name='post_atom_feed'),
+    path('feeds/blog/<slug:category_slug>.rss', cached_response('blog')(PostFeed()), name='post_category_feed'),
+    path('feeds/blog/<slug:category_slug>.atom', cached_response('blog')(PostAtomFeed()), name='post_category_atom_feed'),
+    path('feeds/videos.rss', cached_response('video')(VideoFeed()), name='video_feed'),
+    path('feeds/videos.atom', cached_response('video')(VideoAtomFeed()), name='video_atom_feed'),
+    path('feeds/videos/<slug:category_slug>.rss', cached_response('video')(VideoFeed()), name='video_category_feed'),
+    path('feeds/videos/<slug:category_slug>.atom', cached_response('video')(VideoAtomFeed()), name='video_category_atom_feed'),
+
     # Contact & Subscribe (AJAX)
     path('contact/', views.contact, name='contact'),
     path('subscribe/', views.subscribe, name='subscribe'),
+    path('unsubscribe/<str:token>/', views.unsubscribe, name='unsubscribe'),
 ]
\ No newline at end of file
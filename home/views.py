@@ -2,15 +2,30 @@
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, Http404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.core.paginator import Paginator
-from .models import (
-    PostCategory, Post, Subscriber, AboutPage,
-    Video, VideoCategory
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+from django.views.decorators.vary import vary_on_headers
+from .caching import cached_listing
+from .conditional import (
+    PAGE_CACHE_CONTROL, PARTIAL_CACHE_CONTROL, conditional_view,
+    about_stamp, blog_listing_stamp, post_stamp, video_listing_stamp, video_stamp,
 )
+from .pagination import CursorPaginator
+from .registry import about_page, post_categories, video_categories
+from .rendering import refresh_post_body
+from .search import search as search_index
+from .signups import signup_buffer, signup_rate_limited
+from .subscribers import normalize_email
+from .task_queue import LANE_INTERACTIVE
+from .models import Post, Subscriber, Video
 import logging
 import resend  # Ensure 'resend' is in your requirements.txt
+from .email_client import get_resend_client
+from .emails import email_from_unsubscribe_token, personalize, render_email
 from background_task import background
 
 logger = logging.getLogger(__name__)
@@ -19,10 +34,10 @@ logger = logging.getLogger(__name__)
 # BACKGROUND TASKS (Direct API calls bypass Railway SMTP blocks)
 # ==================================================================
 
-@background(schedule=1)
+@background(queue=LANE_INTERACTIVE)
 def async_send_contact_email(name, email, message, from_email, contact_email):
     """Handles sending the contact form email via Resend API."""
-    resend.api_key = settings.RESEND_API_KEY
+    get_resend_client()
     try:
         resend.Emails.send({
             "from": from_email,
@@ -36,29 +51,22 @@ def async_send_contact_email(name, email, message, from_email, contact_email):
         raise e
 
 
-@background(schedule=1)
+@background(queue=LANE_INTERACTIVE)
 def async_send_subscription_email(user_email, from_email):
-    """Handles sending the welcome email via Resend API."""
-    resend.api_key = settings.RESEND_API_KEY
-    
-    html_content = f"""
-    <div style="font-family: 'Segoe UI', sans-serif; color: #333; line-height: 1.6;">
-        <h2>Newsletter Subscription Successful!</h2>
-        <p><strong>Welcome aboard, friend</strong></p>
-        <p>In a world that rushes, this is a pause.<br>
-        A place to breathe, think, and return to what matters.<br>
-        We speak of everything under the sky — but only the things that truly matter.<br>
-        I’m glad you’re here — let’s learn to live deliberately.</p>
-        <p><strong>Every Saturday at 8 PM</strong>, a quiet reflection awaits you in your inbox.</p>
-    </div>
     """
+    Handles sending the welcome email via Resend API. Signups now queue
+    tasks.send_welcome_emails_task per batch; this stays for queued tasks.
+    """
+    get_resend_client()
+    
+    rendered = render_email('welcome')
 
     try:
         resend.Emails.send({
             "from": from_email,
             "to": [user_email],
             "subject": 'Welcome to the Newsletter!',
-            "html": html_content,
+            **personalize(rendered, user_email),
         })
         logger.info(f"Background task: Subscription email sent to {user_email}.")
     except Exception as e:
@@ -73,110 +81,161 @@ def async_send_subscription_email(user_email, from_email):
 def home(request):
     return render(request, 'index.html')
 
-def blog_list(request):
-    post_list = Post.objects.filter(is_published=True).select_related('category').order_by('-published_date')
-    categories = PostCategory.objects.all()
+def _published_posts(request):
+    post_list = Post.objects.filter(is_published=True).select_related('category').defer('body_html')
     category_slug = request.GET.get('category')
     featured = request.GET.get('featured')
 
     if category_slug:
-        post_list = post_list.filter(category__slug=category_slug)
+        category = post_categories().get(category_slug)
+        post_list = post_list.filter(category=category) if category else post_list.none()
     if featured:
         post_list = post_list.filter(is_featured=True)
+    return post_list
 
-    paginator = Paginator(post_list, 9)
-    page_obj = paginator.get_page(request.GET.get('page'))
+def _render_blog_list_content(request, cursor_pagination=False):
+    post_list = _published_posts(request)
+    if cursor_pagination:
+        page_obj = CursorPaginator(post_list, 9).get_page()
+    else:
+        paginator = Paginator(post_list.order_by('-published_date'), 9)
+        page_obj = paginator.get_page(request.GET.get('page'))
 
     context = {
         'posts': page_obj,
-        'categories': categories,
-        'active_category': category_slug,
-        'has_featured': Post.objects.filter(is_published=True, is_featured=True).exists(),
+        'categories': post_categories(),
+        'active_category': request.GET.get('category'),
     }
-    return render(request, 'blog_list.html', context)
+    return render_to_string('partials/blog_list_content.html', context, request=request)
+
+def _render_blog_list_items(request):
+    page_obj = CursorPaginator(_published_posts(request), 9).get_page(request.GET.get('cursor'))
+    return render_to_string('partials/blog_list_items.html', {'posts': page_obj}, request=request)
+
+@conditional_view(blog_listing_stamp, PAGE_CACHE_CONTROL)
+def blog_list(request):
+    list_content = cached_listing('blog', 'blog_list', request, lambda: _render_blog_list_content(request))
+    return render(request, 'blog_list.html', {'list_content': list_content})
 
+@conditional_view(blog_listing_stamp, PARTIAL_CACHE_CONTROL, vary=('HX-Request',))
 def blog_list_partial(request):
+    """
+    HTMX endpoint. Numbered page links (?page=) get the numbered fragment;
+    filter clicks get the first cursor page with a "Load More" trigger, and
+    ?cursor= requests return just the next cards to append.
+    """
     if not request.headers.get('HX-Request'):
         return redirect(f"{reverse('blog_list')}?{request.META['QUERY_STRING']}")
 
-    post_list = Post.objects.filter(is_published=True).select_related('category').order_by('-published_date')
-    category_slug = request.GET.get('category')
-    featured = request.GET.get('featured')
-
-    if category_slug:
-        post_list = post_list.filter(category__slug=category_slug)
-    if featured:
-        post_list = post_list.filter(is_featured=True)
-
-    paginator = Paginator(post_list, 9)
-    page_obj = paginator.get_page(request.GET.get('page'))
-
-    context = {
-        'posts': page_obj,
-        'categories': PostCategory.objects.all(),
-        'active_category': category_slug,
-        'has_featured': Post.objects.filter(is_published=True, is_featured=True).exists(),
-    }
-    return render(request, 'partials/blog_list_content.html', context)
+    if 'cursor' in request.GET:
+        render_content = lambda: _render_blog_list_items(request)
+    else:
+        render_content = lambda: _render_blog_list_content(request, cursor_pagination='page' not in request.GET)
+    return HttpResponse(cached_listing('blog', 'blog_list_partial', request, render_content))
 
+@conditional_view(post_stamp, PAGE_CACHE_CONTROL)
 def blog_detail(request, post_slug):
-    post = get_object_or_404(Post.objects.prefetch_related('content_blocks'), slug=post_slug, is_published=True)
-    return render(request, 'blog_detail.html', {'post': post})
-
+    post = get_object_or_404(Post.objects.select_related('category'), slug=post_slug, is_published=True)
+    if post.body_rendered_at is None:
+        # Posts written before bodies were pre-rendered are filled in on first view.
+        refresh_post_body(post.pk)
+        post.refresh_from_db(fields=['body_html', 'word_count'])
+    return render(request, 'blog_detail.html', {'post': post, 'related_posts': post.get_related_posts()})
+
+@conditional_view(about_stamp, PAGE_CACHE_CONTROL)
 def about_detail(request):
-    about_page = AboutPage.objects.first()
-    return render(request, 'about_detail.html', {'about_page': about_page})
+    return render(request, 'about_detail.html', {'about_page': about_page()})
 
-def video_list(request):
-    videos_list = Video.objects.select_related('category').filter(is_published=True).order_by('-published_date')
-    categories = VideoCategory.objects.all()
+def _published_videos(request):
+    videos_list = Video.objects.select_related('category').filter(is_published=True)
     category_slug = request.GET.get('category')
     featured = request.GET.get('featured')
 
     if category_slug:
-        videos_list = videos_list.filter(category__slug=category_slug)
+        category = video_categories().get(category_slug)
+        videos_list = videos_list.filter(category=category) if category else videos_list.none()
     if featured:
         videos_list = videos_list.filter(is_featured=True)
+    return videos_list
 
-    paginator = Paginator(videos_list, 9)
-    page_obj = paginator.get_page(request.GET.get('page'))
+def _render_video_list_content(request, cursor_pagination=False):
+    videos_list = _published_videos(request)
+    if cursor_pagination:
+        page_obj = CursorPaginator(videos_list, 9).get_page()
+    else:
+        paginator = Paginator(videos_list.order_by('-published_date'), 9)
+        page_obj = paginator.get_page(request.GET.get('page'))
 
     context = {
         'videos': page_obj,
-        'categories': categories,
-        'active_category': category_slug,
-        'has_featured': Video.objects.filter(is_published=True, is_featured=True).exists(),
+        'categories': video_categories(),
+        'active_category': request.GET.get('category'),
     }
-    return render(request, 'video_list.html', context)
+    return render_to_string('partials/video_list_content.html', context, request=request)
+
+def _render_video_list_items(request):
+    page_obj = CursorPaginator(_published_videos(request), 9).get_page(request.GET.get('cursor'))
+    return render_to_string('partials/video_list_items.html', {'videos': page_obj}, request=request)
 
+@conditional_view(video_listing_stamp, PAGE_CACHE_CONTROL)
+def video_list(request):
+    list_content = cached_listing('video', 'video_list', request, lambda: _render_video_list_content(request))
+    return render(request, 'video_list.html', {'list_content': list_content})
+
+@conditional_view(video_listing_stamp, PARTIAL_CACHE_CONTROL, vary=('HX-Request',))
 def video_list_partial(request):
+    """HTMX endpoint; paginates like blog_list_partial."""
     if not request.headers.get('HX-Request'):
         return redirect(f"{reverse('video_list')}?{request.META['QUERY_STRING']}")
 
-    videos_list = Video.objects.select_related('category').filter(is_published=True).order_by('-published_date')
-    category_slug = request.GET.get('category')
-    featured = request.GET.get('featured')
+    if 'cursor' in request.GET:
+        render_content = lambda: _render_video_list_items(request)
+    else:
+        render_content = lambda: _render_video_list_content(request, cursor_pagination='page' not in request.GET)
+    return HttpResponse(cached_listing('video', 'video_list_partial', request, render_content))
 
-    if category_slug:
-        videos_list = videos_list.filter(category__slug=category_slug)
-    if featured:
-        videos_list = videos_list.filter(is_featured=True)
+@conditional_view(video_stamp, PAGE_CACHE_CONTROL)
+def video_detail(request, video_slug):
+    video = get_object_or_404(Video, slug=video_slug, is_published=True)
+    related_videos = video.get_related_videos()
+    return render(request, 'video_detail.html', {'video': video, 'related_videos': related_videos})
 
-    paginator = Paginator(videos_list, 9)
-    page_obj = paginator.get_page(request.GET.get('page'))
+SEARCH_KINDS = {'post': Post, 'video': Video}
+SEARCH_PAGE_SIZE = 10
 
-    context = {
-        'videos': page_obj,
-        'categories': VideoCategory.objects.all(),
-        'active_category': category_slug,
-        'has_featured': Video.objects.filter(is_published=True, is_featured=True).exists(),
+def _search_context(request):
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind')
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    results, has_next = search_index(
+        query, model=SEARCH_KINDS.get(kind), limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE,
+    )
+    return {
+        'query': query,
+        'kind': kind if kind in SEARCH_KINDS else '',
+        'results': results,
+        'next_page': page + 1 if has_next else None,
     }
-    return render(request, 'partials/video_list_content.html', context)
 
-def video_detail(request, video_slug):
-    video = get_object_or_404(Video, slug=video_slug, is_published=True)
-    related_videos = Video.objects.filter(category=video.category, is_published=True).exclude(id=video.id)[:3]
-    return render(request, 'video_detail.html', {'video': video, 'related_videos': related_videos})
+def search(request):
+    return render(request, 'search.html', _search_context(request))
+
+@vary_on_headers('HX-Request')
+def search_partial(request):
+    """
+    HTMX endpoint for the search box. ?page=2+ returns only the next results
+    to append, like the listing "Load More" requests.
+    """
+    if not request.headers.get('HX-Request'):
+        return redirect(f"{reverse('search')}?{request.META['QUERY_STRING']}")
+
+    context = _search_context(request)
+    template = 'partials/search_result_items.html' if 'page' in request.GET else 'partials/search_results.html'
+    return render(request, template, context)
 
 def contact(request):
     if request.method == 'POST':
@@ -192,19 +251,38 @@ def contact(request):
 
     return render(request, 'index.html')
 
+@require_POST
 def subscribe(request):
-    if request.method == 'POST':
-        email = request.POST.get('email', '').strip()
-        if not email:
-            return JsonResponse({'success': False, 'message': 'Email required.'}, status=400)
-
-        try:
-            subscriber, created = Subscriber.objects.get_or_create(email=email)
-            if created:
-                async_send_subscription_email(email, settings.DEFAULT_FROM_EMAIL)
-                return JsonResponse({'success': True, 'message': 'Subscription successful!'})
+    email = normalize_email(request.POST.get('email', ''))
+    if email is None:
+        message = 'Please enter a valid email address.' if request.POST.get('email', '').strip() else 'Email required.'
+        return JsonResponse({'success': False, 'message': message}, status=400)
+
+    if signup_rate_limited(request):
+        return JsonResponse({'success': False, 'message': 'Too many requests. Please try again in a minute.'}, status=429)
+
+    try:
+        if email in signup_buffer or Subscriber.objects.filter(email=email).exists():
             return JsonResponse({'success': True, 'message': 'Already subscribed!'})
-                
-        except Exception as e:
-            logger.error(f"Subscription error: {e}")
-            return JsonResponse({'success': False, 'message': 'Error processing subscription.'}, status=500)
\ No newline at end of file
+        # Saved in a batch with other signups; the welcome email is queued then too.
+        if signup_buffer.add(email):
+            return JsonResponse({'success': True, 'message': 'Subscription successful!'})
+        return JsonResponse({'success': True, 'message': 'Already subscribed!'})
+
+    except Exception as e:
+        logger.error(f"Subscription error: {e}")
+        return JsonResponse({'success': False, 'message': 'Error processing subscription.'}, status=500)
+
+# Mail clients send RFC 8058 one-click unsubscribes as a bare POST with no
+# CSRF token; the signed token in the URL is what authorizes it.
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def unsubscribe(request, token):
+    email = email_from_unsubscribe_token(token)
+    if email is None:
+        raise Http404("Invalid unsubscribe link.")
+
+    # GET only asks for confirmation, so link scanners and prefetchers can't unsubscribe anyone.
+    if request.method == 'POST':
+        Subscriber.objects.filter(email=email).update(is_active=False)
+    return render(request, 'unsubscribe.html', {'email': email, 'unsubscribed': request.method == 'POST'})
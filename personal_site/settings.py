@@ -1,5 +1,6 @@
 # personal_site/settings.py
 import os
+import tempfile
 from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
@@ -28,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'home.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -65,6 +67,29 @@ DATABASES = {
     )
 }
 
+# --- Cache ---
+# Gunicorn and run_task_workers are separate processes, and both write to
+# the cache (listing version bumps, image manifests, rate-limit counters),
+# so the default must be shared between them. That is Redis when REDIS_URL
+# is set, otherwise files under the temp directory, which every process in
+# the container sees. Local memory is per process and only fit for tests
+# or runserver.
+REDIS_URL = config('REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default=(
+            'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        )),
+        'LOCATION': config('CACHE_LOCATION', default=REDIS_URL or os.path.join(tempfile.gettempdir(), 'personal-site-cache')),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('FileBasedCache'):
+    # Listings are cached per filter and page; the default of 300 files would cull them constantly.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10_000, cast=int)}
+# Seconds a rendered blog/video listing stays cached. Edits invalidate it sooner.
+LISTING_CACHE_TIMEOUT = config('LISTING_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
 # --- Site & Contact Configuration ---
 SITE_DOMAIN = config('SITE_DOMAIN', default='http://127.0.0.1:8000')
 CONTACT_EMAIL = config('CONTACT_EMAIL', default='')
@@ -87,17 +112,99 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    # Uploaded images are stored once per distinct content, under their SHA-256 (see home/storage.py).
+    'default': {'BACKEND': 'home.storage.ContentAddressedStorage'},
+    # WhiteNoise's fingerprinted, gzip/Brotli-compressed storage, plus the page bundles in home/assets.py.
+    'staticfiles': {'BACKEND': 'home.storage.BundledStaticFilesStorage'},
+}
+# Link one minified bundle per page instead of the source files. The bundles
+# are built by collectstatic, so this is off by default in DEBUG.
+STATIC_BUNDLES = config('STATIC_BUNDLES', default=not DEBUG, cast=bool)
+# Identifies the deployed code in page ETags (see home/conditional.py), so a
+# deploy that only changes templates still invalidates browser caches.
+RELEASE = config('RELEASE', default=config('RAILWAY_GIT_COMMIT_SHA', default=''))
 
 # Media File Configuration (Points to Railway Volume Mount Path)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = config('MEDIA_MOUNT_PATH', default=BASE_DIR / 'media')
+# 'django' streams files from the worker; 'x-accel' (nginx) or 'x-sendfile'
+# (Apache/lighttpd/Caddy) hand the body off to the front server.
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='django')
+# Internal nginx location that aliases MEDIA_ROOT, used in 'x-accel' mode.
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Browser cache lifetime for media without a content hash in the filename.
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=60 * 60 * 24, cast=int)
+
+# --- Responsive Images ---
+# Widths (px) and formats generated for uploaded images. AVIF is skipped
+# automatically if the installed Pillow can't encode it.
+IMAGE_DERIVATIVE_WIDTHS = config('IMAGE_DERIVATIVE_WIDTHS', default='480,960,1600', cast=Csv(int))
+IMAGE_DERIVATIVE_FORMATS = config('IMAGE_DERIVATIVE_FORMATS', default='avif,webp,jpeg', cast=Csv())
+
+# --- Uploads ---
+# Uploads stream to a temporary file rather than memory, and files larger
+# than UPLOAD_MAX_BYTES are rejected by the form (see home/uploads.py).
+FILE_UPLOAD_HANDLERS = ['home.uploads.LimitedUploadHandler']
+UPLOAD_MAX_BYTES = config('UPLOAD_MAX_BYTES', default=25 * 1024 * 1024, cast=int)
+# Images over this many pixels are refused before they are decoded.
+IMAGE_UPLOAD_MAX_PIXELS = config('IMAGE_UPLOAD_MAX_PIXELS', default=60_000_000, cast=int)
+# Uploaded images are stored no larger than this on their longest edge: twice
+# the widest derivative, for high-density screens.
+IMAGE_UPLOAD_MAX_EDGE = config('IMAGE_UPLOAD_MAX_EDGE', default=3200, cast=int)
 
 # --- Email Configuration (Resend API — works on Railway Hobby) ---
 EMAIL_BACKEND = 'home.resend_backend.ResendEmailBackend'
 RESEND_API_KEY = config('RESEND_API_KEY')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='hello@sudheeshsathya.com')
 
+# --- Subscriber Broadcasts ---
+# Recipients per Resend batch call (the batch endpoint accepts at most 100).
+BROADCAST_CHUNK_SIZE = config('BROADCAST_CHUNK_SIZE', default=100, cast=int)
+# Batch calls kept in flight at once.
+BROADCAST_CONCURRENCY = config('BROADCAST_CONCURRENCY', default=2, cast=int)
+# Batch calls allowed per second (Resend's default account limit is 2 req/s).
+BROADCAST_RATE_LIMIT = config('BROADCAST_RATE_LIMIT', default=2.0, cast=float)
+
+# --- Background Tasks ---
+# Defaults for `manage.py run_task_workers`. Reserved workers only take
+# contact and welcome emails, so those never wait behind a broadcast.
+TASK_WORKERS = config('TASK_WORKERS', default=3, cast=int)
+TASK_RESERVED_WORKERS = config('TASK_RESERVED_WORKERS', default=1, cast=int)
+# 'process' forks one process per worker; 'thread' keeps them in one process.
+TASK_WORKER_MODE = config('TASK_WORKER_MODE', default='process')
+TASK_POLL_INTERVAL = config('TASK_POLL_INTERVAL', default=1.0, cast=float)
+# Seconds running tasks get to finish after SIGTERM before workers are killed.
+TASK_SHUTDOWN_GRACE = config('TASK_SHUTDOWN_GRACE', default=30.0, cast=float)
+# Wake idle workers when a task is queued: LISTEN/NOTIFY on PostgreSQL,
+# Unix sockets in TASK_WAKEUP_DIR otherwise. Without it workers poll every
+# TASK_POLL_INTERVAL seconds.
+TASK_WAKEUP = config('TASK_WAKEUP', default=True, cast=bool)
+TASK_WAKEUP_DIR = config('TASK_WAKEUP_DIR', default=os.path.join(tempfile.gettempdir(), 'personal-site-task-wakeup'))
+# Fallback check for workers that get wakeups (expired locks, lost notifications).
+TASK_WAKEUP_POLL_INTERVAL = config('TASK_WAKEUP_POLL_INTERVAL', default=30.0, cast=float)
+# Days of per-task queue wait records kept for `manage.py task_queue_stats`.
+TASK_METRICS_RETENTION_DAYS = config('TASK_METRICS_RETENTION_DAYS', default=14, cast=int)
+
+# --- Newsletter Signups ---
+# Signups allowed per client IP, and across the site, per window (seconds).
+# Counters live in the cache, so use a shared cache (Redis) in production.
+SUBSCRIBE_RATE_LIMIT_PER_IP = config('SUBSCRIBE_RATE_LIMIT_PER_IP', default=5, cast=int)
+SUBSCRIBE_RATE_LIMIT_GLOBAL = config('SUBSCRIBE_RATE_LIMIT_GLOBAL', default=300, cast=int)
+SUBSCRIBE_RATE_WINDOW = config('SUBSCRIBE_RATE_WINDOW', default=60, cast=int)
+# Signups are saved in batches of up to this many, at most this many seconds
+# after they arrive. 0 saves each signup during its request.
+SUBSCRIBE_BATCH_SIZE = config('SUBSCRIBE_BATCH_SIZE', default=50, cast=int)
+SUBSCRIBE_FLUSH_INTERVAL = config('SUBSCRIBE_FLUSH_INTERVAL', default=2.0, cast=float)
+# Reverse proxies in front of the app (Railway's edge is one), used to find
+# the client IP in X-Forwarded-For. 0 trusts only REMOTE_ADDR.
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=1, cast=int)
+
+# --- Request Profiling ---
+# Adds Server-Timing headers (queries, DB, template and total time) to every
+# response. On by default only in DEBUG.
+PROFILE_REQUESTS = config('PROFILE_REQUESTS', default=DEBUG, cast=bool)
+
 # --- Default primary key field type ---
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
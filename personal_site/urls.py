@@ -3,19 +3,18 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
+from home.media import serve_media
 
 urlpatterns = [
     path('django_admin/', admin.site.urls),
     path('', include('home.urls')), 
 ]
 
-# When DEBUG=False, Django won't serve media. This forces it to serve 
-# uploaded files out of the Railway Volume in production.
+# When DEBUG=False, Django won't serve media. This serves uploaded files
+# out of the Railway Volume in production (see home/media.py for the
+# Range/304/X-Accel-Redirect handling).
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
+    re_path(r'^media/(?P<path>.*)$', serve_media),
 ]
 
 if settings.DEBUG: